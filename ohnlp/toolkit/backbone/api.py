@@ -1,23 +1,178 @@
 from __future__ import annotations
 
+import asyncio
+import functools
+import hashlib
+import inspect
 import json
+import threading
+import time
 import uuid
+import weakref
 from abc import abstractmethod, ABC
+from collections import deque, OrderedDict
+from concurrent.futures import Future
+from datetime import date, datetime, time as datetime_time, timedelta, timezone
 from enum import Enum
-from typing import Any, Generic, TypeVar, Union, Dict, List, Type, Optional
+from typing import Any, Generic, TypeVar, Union, Dict, List, Type, Optional, Set, Tuple, Deque, Callable, Iterator
 from uuid import UUID
 
-from py4j.java_collections import JavaMap, ListConverter
-from py4j.java_gateway import JavaGateway, JVMView, JavaObject, is_instance_of
+from py4j.java_collections import JavaList, JavaMap
+from py4j.java_gateway import JavaGateway, JVMView, JavaObject, JavaClass, is_instance_of
+from py4j.protocol import Py4JError, Py4JJavaError, Py4JNetworkError
 
-from ohnlp.toolkit.backbone.api import TypeName
+from ohnlp.toolkit.backbone import arrow, metrics, pipelining, profiling, references, result_cache, shared_memory
 
-# Global Component/Function Registries
-_registered_components: Dict[str, Type[Transform]] = {}
-_registered_udfs: Dict[str, Type[UserDefinedPartitionMappingFunction]] = {}
-_active_components: Dict[str, Transform] = {}
-_active_udfs: Dict[str, UserDefinedPartitionMappingFunction] = {}
-_gateway: JavaGateway
+# Component/Function Registries
+class ModuleRegistry(object):
+    r"""
+    A registry namespace: the component and UDF classes declared by a backbone module, along with the active instances
+    created from them by a single bridge. Each module decorated with @ModuleDeclaration has its own declarations, and
+    each bridge serving a module has its own namespace of active instances (see :meth:`new_namespace`), so that
+    several modules and bridges can be hosted within one process.
+
+    The registry is read without locking by the threads handling concurrent bridge calls. Its dicts are only ever
+    mutated by single (and therefore atomic) dict operations, i.e. assignment, setdefault, and pop, so a reader sees
+    either the state before or after any concurrent registration or teardown
+    """
+
+    def __init__(self, registered_components: Dict[str, Type[Transform]] = None,
+                 registered_udfs: Dict[str, Type[UserDefinedPartitionMappingFunction]] = None):
+        self.registered_components: Dict[str, Type[Transform]] = \
+            registered_components if registered_components is not None else {}
+        self.registered_udfs: Dict[str, Type[UserDefinedPartitionMappingFunction]] = \
+            registered_udfs if registered_udfs is not None else {}
+        self.active_components: Dict[str, Transform] = {}
+        self.active_udfs: Dict[str, UserDefinedPartitionMappingFunction] = {}
+        # Reference arenas of active UDF instances that opted into bundle_scoped_references, by instance UID
+        self.reference_arenas: Dict[str, references.ReferenceArena] = {}
+        # Micro-batch schedulers of active UDF instances that opted into adaptive_batching, by instance UID
+        self.batch_schedulers: Dict[str, _MicroBatchScheduler] = {}
+        # Locks serializing the bundle lifecycle calls of active UDF instances, by instance UID
+        self.instance_locks: Dict[str, threading.Lock] = {}
+        # Locks held for the duration of a bundle of active UDF instances that carry state across the calls of a
+        # bundle, and the identity of the thread handling the bundle holding each, by instance UID
+        self.bundle_locks: Dict[str, threading.Lock] = {}
+        self.bundle_owners: Dict[str, int] = {}
+        # Schema indices of the input rows of active UDF instances, by instance UID, resolved on their first element
+        self.input_schema_indices: Dict[str, _SchemaIndex] = {}
+        # Identifies the namespace within the UDF instance pool, so that warm instances (which may be bound to the
+        # bridge's JVM or worker pool) are only reused by the bridge that created them
+        self.namespace_uid = str(uuid.uuid4())
+
+    def new_namespace(self) -> ModuleRegistry:
+        """ :return: A registry sharing this registry's declarations, without any active instances """
+        return ModuleRegistry(self.registered_components, self.registered_udfs)
+
+
+# Process-wide registry holding the declarations of every module imported by this process
+_default_registry = ModuleRegistry()
+_registered_components: Dict[str, Type[Transform]] = _default_registry.registered_components
+_registered_udfs: Dict[str, Type[UserDefinedPartitionMappingFunction]] = _default_registry.registered_udfs
+
+# The gateway of the most recently initialized bridge, and the gateway of the bridge whose call is being handled by the
+# current thread (if any)
+_gateway: Optional[JavaGateway] = None
+_bridge_call_state = threading.local()
+
+
+def get_gateway() -> Optional[JavaGateway]:
+    """ :return: The gateway of the bridge whose call is being handled by the current thread, or otherwise the gateway
+    of the most recently initialized bridge """
+    gateway = getattr(_bridge_call_state, 'gateway', None)
+    return gateway if gateway is not None else _gateway
+
+
+def _bridge_call(func):
+    """ Binds the calling thread to the gateway of the :class:`ToolkitModule` handling a bridge call for the duration
+    of the call, so that rows and schemas created during the call are created within the correct JVM """
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        previous = getattr(_bridge_call_state, 'gateway', None)
+        _bridge_call_state.gateway = self._gateway
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            _bridge_call_state.gateway = previous
+
+    return wrapper
+
+
+def _bundle_references(func):
+    """ Adopts the java references handed to a UDF instance during a bundle lifecycle call into the reference arena
+    of the instance's current bundle (if the instance opted in via bundle_scoped_references), releasing the arena
+    once the bundle finishes """
+    release = func.__name__ == 'call_udf_on_bundle_finish'
+
+    @functools.wraps(func)
+    def wrapper(self, udf_uid: str, *args, **kwargs):
+        # noinspection PyProtectedMember
+        arena = self._get_reference_arena(udf_uid)
+        if arena is None:
+            return func(self, udf_uid, *args, **kwargs)
+        try:
+            with references.bind(arena):
+                return func(self, udf_uid, *args, **kwargs)
+        finally:
+            if release:
+                arena.release()
+
+    return wrapper
+
+
+def _instance_serialized(func):
+    """ Serializes the bundle lifecycle calls of a UDF instance that may not be called concurrently (see
+    :meth:`ToolkitModule._get_instance_lock`), so that threads handling bundles of different instances run in parallel
+    while threads calling the same instance take turns """
+
+    @functools.wraps(func)
+    def wrapper(self, udf_uid: str, *args, **kwargs):
+        # noinspection PyProtectedMember
+        lock = self._get_instance_lock(udf_uid)
+        if lock is None:
+            return func(self, udf_uid, *args, **kwargs)
+        with lock:
+            return func(self, udf_uid, *args, **kwargs)
+
+    return wrapper
+
+
+def _bundle_exclusive(func):
+    """ Holds a UDF instance that carries state across the calls of a bundle (see :func:`_carries_bundle_state`) for
+    the thread handling one of its bundles from the bundle's start until it finishes, so that concurrent bundles of the
+    instance take turns rather than receiving each other's buffered elements, outputs or java references. Held before
+    the per-call lock of :func:`_instance_serialized`, so that a thread waiting for the instance never holds the
+    latter """
+    start = func.__name__ == 'call_udf_on_bundle_start'
+
+    @functools.wraps(func)
+    def wrapper(self, udf_uid: str, *args, **kwargs):
+        # noinspection PyProtectedMember
+        lock = self._get_bundle_lock(udf_uid)
+        if lock is None:
+            return func(self, udf_uid, *args, **kwargs)
+        owner = threading.get_ident()
+        if start:
+            # py4j pins each JVM thread to a python thread, so a thread already holding the instance is one whose
+            # previous bundle failed without finishing
+            if self._registry.bundle_owners.get(udf_uid.lower()) != owner:
+                lock.acquire()
+                try:
+                    # The instance may have been torn down while waiting
+                    self.check_and_get_active_function(udf_uid)
+                except NameError:
+                    lock.release()
+                    raise
+                self._registry.bundle_owners[udf_uid.lower()] = owner
+            return func(self, udf_uid, *args, **kwargs)
+        try:
+            return func(self, udf_uid, *args, **kwargs)
+        finally:
+            # noinspection PyProtectedMember
+            self._release_bundle_lock(udf_uid, owner)
+
+    return wrapper
 
 
 # Configuration Types
@@ -103,6 +258,12 @@ class FunctionIdentifier(object):
         return function
 
 
+class DataPlane(Enum):
+    """ The transport used to move bundle elements between the JVM and a UDF """
+    PY4J = 'py4j'
+    ARROW = 'arrow'
+
+
 # Data Structure Types
 class WrappedJavaObject(ABC):
     _gateway: JavaGateway = None
@@ -119,74 +280,588 @@ class WrappedJavaObject(ABC):
         pass
 
 
+class _SchemaIndex(object):
+    r"""
+    Python-side field lookup tables for a schema, shared by every row of that schema. Indices of java schemas also
+    hold the python field definitions of the schema (if every field type has a python equivalent), and the indices of
+    the schemas of nested row fields and of the rows nested within collection fields (the elements of ARRAY/ITERABLE
+    fields and the values of MAP fields), so that nested rows need no schema lookups of their own
+    """
+
+    def __init__(self, field_names: List[str], row_field_indices: Set[int], java_schema=None, key: str = None,
+                 fields: Optional[List[Field]] = None, row_field_schemas: Optional[Dict[int, _SchemaIndex]] = None,
+                 element_row_schemas: Optional[Dict[int, _SchemaIndex]] = None):
+        self.java_schema = java_schema
+        self.key = key
+        self.field_indices: Dict[str, int] = {name: idx for idx, name in enumerate(field_names)}
+        self.row_field_indices: Set[int] = row_field_indices
+        self.fields: Optional[List[Field]] = fields
+        self.row_field_schemas: Dict[int, _SchemaIndex] = row_field_schemas if row_field_schemas is not None else {}
+        self.element_row_schemas: Dict[int, _SchemaIndex] = \
+            element_row_schemas if element_row_schemas is not None else {}
+
+    @staticmethod
+    def of_java(java_schema, key: str) -> _SchemaIndex:
+        # noinspection PyProtectedMember
+        return _read_java_schemas(java_schema._gateway_client, [java_schema], [key])[0]
+
+    def __getstate__(self):
+        # Java references are only valid within the bridge process, the key is used to re-associate the java schema
+        # when the index is returned to the bridge process
+        state = self.__dict__.copy()
+        state['java_schema'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        gateway = get_gateway()
+        if self.java_schema is None and gateway is not None:
+            # noinspection PyProtectedMember
+            index = _schema_indices.get((id(gateway._gateway_client), self.key))
+            if index is not None:
+                self.java_schema = index.java_schema
+
+
+# Process-wide cache of schema lookup tables keyed by gateway and the string representation of the java schema, which
+# includes both its structure and its UUID (if any)
+_schema_indices: Dict[Tuple[int, str], _SchemaIndex] = {}
+# Process-wide caches of java schemas and field types keyed by gateway and the structure of their python definitions,
+# populated when python definitions are converted to java. Java schemas received from the JVM are never interned here,
+# as python definitions cannot express their UUIDs, options, or the nullability of array elements
+_java_schemas: Dict[Tuple[int, Tuple], JavaObject] = {}
+_java_field_types: Dict[Tuple[int, Tuple], JavaObject] = {}
+
+_SCHEMA_CLASS = 'org.apache.beam.sdk.schemas.Schema'
+
+
+def _get_schema_index(java_schema, key: str = None) -> _SchemaIndex:
+    if key is None:
+        key = java_schema.toString()
+    # noinspection PyProtectedMember
+    cache_key = (id(java_schema._gateway_client), key)
+    index = _schema_indices.get(cache_key)
+    if index is None:
+        index = _SchemaIndex.of_java(java_schema, key)
+    return index
+
+
+def _read_java_field_types(gateway_client, java_types: List[JavaObject]) \
+        -> Tuple[List[str], List[bool], List[Optional[FieldType]], List[Optional[_SchemaIndex]],
+                 List[Optional[_SchemaIndex]]]:
+    """ Translates java field types to python, reading every type (and then every nested type) together
+
+    :return: The type names, nullability, python field types (or None for types without a python equivalent, e.g.
+    MAP), the indices of the schemas of ROW types, and the indices of the schemas of the rows nested within collection
+    types (i.e. of ROW elements of ARRAY/ITERABLE types and ROW values of MAP types), in the order of the given types
+    """
+    if len(java_types) == 0:
+        return [], [], [], [], []
+    parts = pipelining.call_pipelined(gateway_client, [
+        (java_type, method_name, ()) for java_type in java_types
+        for method_name in ('getTypeName', 'getNullable', 'getRowSchema', 'getCollectionElementType',
+                            'getMapValueType')
+    ])
+    java_type_names, nullables, row_schemas, element_types, map_value_types = \
+        parts[0::5], parts[1::5], parts[2::5], parts[3::5], parts[4::5]
+    type_names = pipelining.call_pipelined(gateway_client, [(java_type_name, 'name', ())
+                                                            for java_type_name in java_type_names])
+    row_positions = [idx for idx, row_schema in enumerate(row_schemas) if row_schema is not None]
+    row_indices: List[Optional[_SchemaIndex]] = [None] * len(java_types)
+    for idx, row_index in zip(row_positions, _read_java_schemas(gateway_client,
+                                                                [row_schemas[idx] for idx in row_positions])):
+        row_indices[idx] = row_index
+    # The element types of ARRAY/ITERABLE types and the value types of MAP types are read together
+    collection_positions = [idx for idx, element_type in enumerate(element_types) if element_type is not None]
+    map_positions = [idx for idx, value_type in enumerate(map_value_types) if value_type is not None]
+    _, _, nested_field_types, nested_row_indices, _ = _read_java_field_types(
+        gateway_client,
+        [element_types[idx] for idx in collection_positions] + [map_value_types[idx] for idx in map_positions]
+    )
+    field_types: List[Optional[FieldType]] = [None] * len(java_types)
+    element_row_indices: List[Optional[_SchemaIndex]] = [None] * len(java_types)
+    for idx, nested_field_type, nested_row_index in zip(collection_positions + map_positions, nested_field_types,
+                                                         nested_row_indices):
+        element_row_indices[idx] = nested_row_index
+        if nested_field_type is not None and type_names[idx] == TypeName.ARRAY.value:
+            field_types[idx] = FieldType.of_arr(nested_field_type)
+    for idx, type_name in enumerate(type_names):
+        if row_indices[idx] is not None:
+            field_types[idx] = FieldType.of_row(Schema.of_index(row_indices[idx]))
+        elif type_name in TypeName.__members__ and TypeName[type_name].is_primitive():
+            field_types[idx] = FieldType.of(TypeName[type_name])
+    return type_names, [bool(nullable) for nullable in nullables], field_types, row_indices, element_row_indices
+
+
+def _read_java_schemas(gateway_client, java_schemas: List[JavaObject], keys: Optional[List[str]] = None) \
+        -> List[_SchemaIndex]:
+    """ Translates java schemas to python, reading the fields of every schema together so that the number of round
+    trips depends only on the depth of nesting rather than on the number of fields. Translations are cached by the
+    string representation of the java schema
+
+    :param gateway_client: The gateway client the java schemas belong to
+    :param java_schemas: The java schemas to translate
+    :param keys: The string representations of the java schemas, if already known
+    :return: The indices of the schemas, in the order of the given schemas
+    """
+    if len(java_schemas) == 0:
+        return []
+    if keys is None:
+        keys = pipelining.call_pipelined(gateway_client, [(java_schema, 'toString', ())
+                                                          for java_schema in java_schemas])
+    client_id = id(gateway_client)
+    ret: List[Optional[_SchemaIndex]] = [_schema_indices.get((client_id, key)) for key in keys]
+    pending = [idx for idx, index in enumerate(ret) if index is None]
+    if len(pending) == 0:
+        return ret
+    field_counts = pipelining.call_pipelined(gateway_client, [(java_schemas[idx], 'getFieldCount', ())
+                                                              for idx in pending])
+    java_fields = pipelining.call_pipelined(gateway_client, [
+        (java_schemas[idx], 'getField', (field_idx,)) for idx, field_count in zip(pending, field_counts)
+        for field_idx in range(field_count)
+    ])
+    parts = pipelining.call_pipelined(gateway_client, [
+        (java_field, method_name, ()) for java_field in java_fields for method_name in ('getName', 'getType')
+    ])
+    names, java_types = parts[0::2], parts[1::2]
+    type_names, nullables, field_types, row_indices, element_row_indices = \
+        _read_java_field_types(gateway_client, java_types)
+    offset = 0
+    for idx, field_count in zip(pending, field_counts):
+        field_range = range(offset, offset + field_count)
+        offset += field_count
+        fields = None
+        if all(field_types[field_idx] is not None for field_idx in field_range):
+            fields = [(Field.of_nullable if nullables[field_idx] else Field.of)(names[field_idx],
+                                                                                field_types[field_idx])
+                      for field_idx in field_range]
+        index = _SchemaIndex([names[field_idx] for field_idx in field_range],
+                             {field_idx - field_range.start for field_idx in field_range
+                              if type_names[field_idx] == TypeName.ROW.value},
+                             java_schemas[idx], keys[idx], fields,
+                             {field_idx - field_range.start: row_indices[field_idx] for field_idx in field_range
+                              if row_indices[field_idx] is not None},
+                             {field_idx - field_range.start: element_row_indices[field_idx]
+                              for field_idx in field_range if element_row_indices[field_idx] is not None})
+        _schema_indices[(client_id, keys[idx])] = index
+        ret[idx] = index
+    return ret
+
+
+def _structural_key_of(fields: Optional[List[Field]]) -> Optional[Tuple]:
+    """ :return: A hashable representation of the structure of the given python field definitions, or None if
+    incomplete (i.e. a ROW or ARRAY type without its schema or element type) """
+    if fields is None:
+        return None
+    ret = []
+    for field in fields:
+        # noinspection PyProtectedMember
+        type_key = field.get_type()._structural_key()
+        if type_key is None:
+            return None
+        ret.append((field.get_name(), field.is_nullable(), type_key))
+    return tuple(ret)
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# The java.time classes of the values of Beam's SQL DATE, TIME, and DATETIME logical types, and the python types
+# their ISO-8601 representations are parsed to
+_JAVA_TIME_CLASSES: Dict[str, Type] = {
+    'java.time.LocalDate': date,
+    'java.time.LocalTime': datetime_time,
+    'java.time.LocalDateTime': datetime,
+}
+
+
+def _from_java_time(class_name: str, iso_value: str) -> Any:
+    # Java represents fractions of seconds to the nanosecond, python only to the microsecond
+    whole, _, fraction = iso_value.partition('.')
+    if fraction:
+        iso_value = whole + '.' + fraction[:6].ljust(6, '0')
+    return _JAVA_TIME_CLASSES[class_name].fromisoformat(iso_value)
+
+
+def _detach_value(gateway: JavaGateway, value: Any) -> Any:
+    """ Converts a row value into a form that can be transferred out of the bridge process. DATETIME values are
+    converted to timezone-aware (UTC) python datetimes, and the values of Beam's SQL DATE, TIME, and DATETIME logical
+    types to python dates, times, and (naive) datetimes respectively, all of which are converted back by
+    :func:`_to_java_value`
+
+    :param gateway: The gateway of the row the value belongs to
+    """
+    if isinstance(value, JavaObject):
+        # noinspection PyProtectedMember
+        gateway_client = gateway._gateway_client
+        if isinstance(value, JavaList):
+            return [_detach_value(gateway, element) for element in pipelining.from_java_list(gateway_client, value)]
+        if isinstance(value, JavaMap):
+            return {_detach_value(gateway, k): _detach_value(gateway, v)
+                    for k, v in pipelining.from_java_map(gateway_client, value).items()}
+        if is_instance_of(gateway, value, "org.apache.beam.sdk.values.Row"):
+            return Row._wrap_java(gateway, value)
+        if is_instance_of(gateway, value, "org.joda.time.ReadableInstant"):
+            return _EPOCH + timedelta(milliseconds=value.getMillis())
+        class_name = value.getClass().getName()
+        if class_name in _JAVA_TIME_CLASSES:
+            return _from_java_time(class_name, value.toString())
+        raise ValueError(f"Value of java type {class_name} cannot be transferred out of the bridge process, so UDFs "
+                         f"receiving it can neither be hosted by a worker pool nor have their results cached")
+    if isinstance(value, memoryview):
+        return value.tobytes()
+    return value
+
+
+def _to_java_value(gateway_client, value: Any) -> Any:
+    """ Converts a python row value to the value sent to the JVM, including rows nested within collections (e.g. the
+    ARRAY<ROW> values of rows detached from the JVM), which py4j's collection converters cannot convert """
+    if isinstance(value, WrappedJavaObject):
+        return value.to_java()
+    if isinstance(value, list):
+        return pipelining.to_java_list(gateway_client, [_to_java_value(gateway_client, element) for element in value])
+    if isinstance(value, dict):
+        return pipelining.to_java_map(gateway_client, {
+            _to_java_value(gateway_client, key): _to_java_value(gateway_client, element)
+            for key, element in value.items()
+        })
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            return JavaClass('org.joda.time.Instant', gateway_client)((value - _EPOCH) // timedelta(milliseconds=1))
+        return pipelining.call_static(gateway_client, 'java.time.LocalDateTime', 'parse', value.isoformat())
+    if isinstance(value, date):
+        return pipelining.call_static(gateway_client, 'java.time.LocalDate', 'parse', value.isoformat())
+    if isinstance(value, datetime_time):
+        return pipelining.call_static(gateway_client, 'java.time.LocalTime', 'parse', value.isoformat())
+    return shared_memory.to_java_value(value)
+
+
 class Row(WrappedJavaObject):
+    r"""
+    A Beam row. Rows are either wrapped java rows (:meth:`of_java`) or python-side rows (:meth:`of`).
+
+    Rows are copy-on-write: :meth:`set_value` only records the write in python, and the backing java row is
+    (re)built exactly once when the row is next converted via :meth:`to_java`, e.g. when handed to an
+    :class:`OutputCollector`
+    """
+    _schema: Optional[Schema] = None
+    _schema_index: Optional[_SchemaIndex] = None
+    _values: Optional[List[Any]] = None
+    _dirty: bool = False
+    _zero_copy: bool = False
 
     @staticmethod
-    def of_java(jvm_row):
+    def of_java(jvm_row, materialize: bool = False, zero_copy: bool = False):
+        """ Wraps a java row
+
+        :param jvm_row: The java Beam row to wrap
+        :param materialize: Whether to fetch all values of the row up front. Materialized rows serve all subsequent
+        reads from python without JVM traffic. Otherwise, values are fetched from the JVM on each read
+        :param zero_copy: Whether STRING/BYTES values passed through the shared memory channel are read as
+        :class:`shared_memory.SharedText` and memoryview values over the shared memory rather than copied
+        :return: The wrapped row
+        """
+        ret = Row._wrap_java(get_gateway(), jvm_row, zero_copy)
+        if materialize:
+            ret.materialize()
+        return ret
+
+    @staticmethod
+    def _wrap_java(gateway: JavaGateway, jvm_row, zero_copy: bool = False) -> Row:
+        # Rows nested within (or assigned to) another row belong to that row's gateway rather than to whichever
+        # gateway the current thread happens to be bound to, e.g. none at all on the asynchronous UDF event loop
         ret = Row()
-        ret.init_java(_gateway, jvm_row)
+        ret.init_java(gateway, jvm_row)
+        ret._zero_copy = zero_copy
         return ret
 
+    @staticmethod
+    def of_java_rows(jvm_rows: List[Any], materialize: bool = False, zero_copy: bool = False) -> List[Row]:
+        """ Wraps java rows of a single schema (e.g. the elements of a bundle chunk), looking up the schema once for
+        every row rather than once per row, and materializing every row together
+
+        :param jvm_rows: The java Beam rows to wrap, all of the same schema
+        :param materialize: Whether to fetch all values of the rows up front, in a single round trip
+        :param zero_copy: See :meth:`of_java`
+        :return: The wrapped rows
+        """
+        rows = [Row.of_java(jvm_row, zero_copy=zero_copy) for jvm_row in jvm_rows]
+        if len(rows) == 0:
+            return rows
+        index = rows[0]._get_schema_index()
+        for row in rows[1:]:
+            row._schema_index = index
+        if materialize:
+            Row._materialize_all(rows)
+        return rows
+
+    @staticmethod
+    def _materialize_all(rows: List[Row]):
+        # Fetches the values of rows of a single, already resolved schema in a single round trip
+        if len(rows) == 0:
+            return
+        # noinspection PyProtectedMember
+        gateway_client = rows[0]._gateway._gateway_client
+        field_count = len(rows[0]._schema_index.field_indices)
+        java_values = pipelining.call_pipelined(gateway_client, [
+            (row._java_obj, 'getValue', (idx,)) for row in rows for idx in range(field_count)
+        ])
+        for row_idx, row in enumerate(rows):
+            row._values = [row._wrap_value(idx, value) for idx, value in
+                           enumerate(java_values[row_idx * field_count:(row_idx + 1) * field_count])]
+
     @staticmethod
     def of(schema: Schema, values: List = None):
+        """ Creates a new row. No java row is built until the row is converted via :meth:`to_java`
+
+        :param schema: The schema of the row
+        :param values: The values of the row in schema field order, or None for a row of all null values
+        :return: The new row
+        """
         if values is None:
-            values = [None] * len(schema.get_fields())
+            values = [None] * schema.get_field_count()
         ret = Row()
-        # noinspection PyProtectedMember
-        jvm_row = _gateway.jvm.org.apache.beam.sdk.values.Row.withSchema(
-            schema.to_java()
-        ).addValues(
-            ListConverter().convert(values, _gateway._gateway_client)
-        ).build()
-        ret.init_java(_gateway, jvm_row)
+        ret._schema = schema
+        ret._values = list(values)
+        ret._dirty = True
         return ret
 
+    def _get_schema_index(self) -> _SchemaIndex:
+        if self._schema_index is None:
+            if self._schema is not None:
+                self._schema_index = self._schema.get_index()
+            else:
+                self._schema_index = self._index_of_java_schema(self._java_obj.getSchema())
+        return self._schema_index
+
+    @staticmethod
+    def _index_of_java_schema(java_schema, key: str = None) -> _SchemaIndex:
+        index = _get_schema_index(java_schema, key)
+        if index.java_schema is not java_schema:
+            # Only the first proxy of each schema is retained (by the cache), the rest are per-row references
+            references.track(java_schema)
+        return index
+
+    def _index_of(self, field_name: str) -> int:
+        field_idx = self._get_schema_index().field_indices.get(field_name)
+        if field_idx is None:
+            raise ValueError(f"Cannot find field {field_name} in schema")
+        return field_idx
+
+    def _wrap_nested_row(self, jvm_row, index: Optional[_SchemaIndex]) -> Optional[Row]:
+        if jvm_row is None:
+            return None
+        row = Row._wrap_java(self._gateway, jvm_row, self._zero_copy)
+        # Nested rows are of the schema of their field, so need no schema lookup of their own
+        row._schema_index = index
+        return row
+
+    def _wrap_value(self, field_idx: int, value: Any) -> Any:
+        if isinstance(value, JavaObject):
+            references.track(value)
+            index = self._get_schema_index()
+            if field_idx in index.row_field_indices:
+                return self._wrap_nested_row(value, index.row_field_schemas.get(field_idx))
+            element_index = index.element_row_schemas.get(field_idx)
+            if element_index is not None:
+                # Rows nested within collections are read into python collections of rows, as they would be received
+                # by UDFs hosted by a worker pool
+                # noinspection PyProtectedMember
+                gateway_client = self._gateway._gateway_client
+                if isinstance(value, JavaList):
+                    return [self._wrap_nested_row(references.track(element), element_index)
+                            for element in pipelining.from_java_list(gateway_client, value)]
+                if isinstance(value, JavaMap):
+                    return {key: self._wrap_nested_row(references.track(element), element_index)
+                            for key, element in pipelining.from_java_map(gateway_client, value).items()}
+        elif shared_memory.is_handle(value):
+            return shared_memory.resolve(value, self._zero_copy)
+        return value
+
+    def materialize(self) -> Row:
+        """ Fetches all values of this row into python so that subsequent reads incur no JVM traffic
+
+        :return: This row
+        """
+        if self._values is None:
+            # noinspection PyProtectedMember
+            gateway_client = self._gateway._gateway_client
+            if self._schema_index is None and self._schema is None:
+                java_schema, field_count = pipelining.call_pipelined(gateway_client, [
+                    (self._java_obj, 'getSchema', ()), (self._java_obj, 'getFieldCount', ())
+                ])
+                # The schema is looked up alongside the values rather than in round trips of its own
+                key, *java_values = pipelining.call_pipelined(gateway_client, [(java_schema, 'toString', ())] + [
+                    (self._java_obj, 'getValue', (idx,)) for idx in range(field_count)
+                ])
+                self._schema_index = self._index_of_java_schema(java_schema, key)
+            else:
+                java_values = pipelining.call_pipelined(gateway_client, [
+                    (self._java_obj, 'getValue', (idx,)) for idx in range(len(self._get_schema_index().field_indices))
+                ])
+            self._values = [self._wrap_value(idx, value) for idx, value in enumerate(java_values)]
+        return self
+
     def get_field_index(self, field_name: str) -> Optional[int]:
-        return self._java_obj.getSchema().indexOf(field_name)
+        return self._get_schema_index().field_indices.get(field_name)
 
     def get_schema(self) -> Schema:
-        return Schema.of_java(self._java_obj.getSchema())
+        if self._schema is None:
+            self._schema = Schema.of_index(self._get_schema_index())
+        return self._schema
 
     def get_value(self, field_name: str) -> Optional[Any]:
-        ret = self._java_obj.getValue(self._java_obj.getSchema().indexOf(field_name))
-        if isinstance(ret, JavaObject):
-            if is_instance_of(self._gateway, ret, "org.apache.beam.sdk.values.Row"):
-                ret = Row.of_java(ret)
-        return ret
+        field_idx = self._index_of(field_name)
+        if self._values is not None:
+            return self._values[field_idx]
+        return self._wrap_value(field_idx, self._java_obj.getValue(field_idx))
 
     def set_value(self, field_name: str, value: Any):
-        values = self._java_obj.getValues()
-        field_idx = self._java_obj.getSchema().indexOf(field_name)
-        if isinstance(value, JavaObject) and is_instance_of(self._gateway, value, "org.apache.beam.sdk.values.Row"):
-            value = Row.of_java(value)
+        field_idx = self._index_of(field_name)
+        values = self.materialize()._values
+        gateway = self._gateway if self._gateway is not None else get_gateway()
+        if isinstance(value, JavaObject) and is_instance_of(gateway, value, "org.apache.beam.sdk.values.Row"):
+            value = Row._wrap_java(gateway, value)
         values[field_idx] = value
-        target_row = Row.of(self.get_schema(), values)
-        # Target Row is a new Row instance/Rows are immutable in Java, so we need to replace the wrapped object
-        # with the new instance instead
-        self._java_obj = target_row._java_obj
+        # Rows are immutable in Java, so the write is only recorded here and a replacement java row is built on the
+        # next to_java() call
+        self._dirty = True
+
+    def copy(self) -> Row:
+        """ :return: A shallow copy of this row, to which subsequent writes to this row are not visible """
+        ret = Row()
+        ret.__dict__.update(self.__dict__)
+        if self._values is not None:
+            ret._values = list(self._values)
+        return ret
+
+    def __getstate__(self):
+        self.materialize()
+        return {
+            '_schema': self._schema,
+            '_schema_index': self._get_schema_index(),
+            '_values': [_detach_value(self._gateway if self._gateway is not None else get_gateway(), value)
+                        for value in self._values]
+        }
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # The java row (if any) is not transferred, so a new one is built on the next to_java() call
+        self._dirty = True
 
     def to_java(self):
+        if self._dirty:
+            gateway = self._gateway if self._gateway is not None else get_gateway()
+            # noinspection PyProtectedMember
+            gateway_client = gateway._gateway_client
+            java_values = [_to_java_value(gateway_client, value) for value in self._values]
+            # The builder and value list are only needed for this conversion, so may be released with the bundle
+            builder = references.track(pipelining.call_static(gateway_client, 'org.apache.beam.sdk.values.Row',
+                                                              'withSchema', self.get_schema().to_java()))
+            java_list = references.track(pipelining.to_java_list(gateway_client, java_values))
+            self.init_java(gateway, references.track(builder.addValues(java_list)).build())
+            # Values written to the shared memory channel only remain valid for the current bridge call, so rows
+            # referring to them are rebuilt on each conversion
+            self._dirty = any(shared_memory.is_handle(value) for value in java_values)
         return self._java_obj
 
 
 class Schema(WrappedJavaObject):
+    r"""
+    A Beam schema. Schemas created from python fields via :meth:`of` are only converted to a java schema on the
+    first call to :meth:`to_java`, with java schemas shared by every python schema of the same structure
+    """
+    _fields: Optional[List[Field]] = None
+    _index: Optional[_SchemaIndex] = None
+    _key: Optional[Tuple] = None
+
     @staticmethod
     def of(fields: List[Field]):
-        java_fields = map(lambda f: f.to_java(), fields)
         ret = Schema()
-        # noinspection PyProtectedMember
-        ret.init_java(_gateway, _gateway.jvm.org.apache.beam.sdk.schemas.Schema.of(
-            ListConverter().convert(java_fields, _gateway._gateway_client)
-        ))
+        ret._fields = list(fields)
+        return ret
 
     @staticmethod
     def of_java(java_schema) -> Schema:
         ret = Schema()
-        ret.init_java(_gateway, java_schema)
+        ret.init_java(get_gateway(), java_schema)
         return ret
 
+    @staticmethod
+    def of_index(index: _SchemaIndex) -> Schema:
+        if index.java_schema is not None:
+            ret = Schema.of_java(index.java_schema)
+        else:
+            ret = Schema()
+        ret._fields = index.fields
+        ret._index = index
+        return ret
+
+    def get_fields(self) -> Optional[List[Field]]:
+        """ :return: The python field definitions of this schema, or None if this schema wraps a java schema that
+        has not been translated to python or has fields without a python equivalent """
+        return self._fields
+
+    def get_field_count(self) -> int:
+        if self._fields is not None:
+            return len(self._fields)
+        if self._java_obj is None:
+            return len(self.get_index().field_indices)
+        return self._java_obj.getFieldCount()
+
+    def get_index(self) -> _SchemaIndex:
+        if self._index is None:
+            if self._fields is not None:
+                self._index = _SchemaIndex([f.get_name() for f in self._fields],
+                                           {idx for idx, f in enumerate(self._fields)
+                                            if f.get_type().get_type_name() == TypeName.ROW},
+                                           fields=self._fields,
+                                           row_field_schemas={idx: f.get_type().get_field_schema().get_index()
+                                                              for idx, f in enumerate(self._fields)
+                                                              if f.get_type().get_field_schema() is not None},
+                                           element_row_schemas={
+                                               idx: f.get_type().get_value_type().get_field_schema().get_index()
+                                               for idx, f in enumerate(self._fields)
+                                               if f.get_type().get_value_type() is not None
+                                               and f.get_type().get_value_type().get_field_schema() is not None
+                                           })
+            else:
+                self._index = _get_schema_index(self._java_obj)
+        return self._index
+
+    def _structural_key(self) -> Optional[Tuple]:
+        if self._key is None:
+            self._key = _structural_key_of(self._fields)
+        return self._key
+
+    def __getstate__(self):
+        return {'_fields': self._fields, '_index': self.get_index() if self._fields is None else None}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self._index is not None and self._index.java_schema is not None:
+            self.init_java(get_gateway(), self._index.java_schema)
+
     def to_java(self):
-        pass
+        if self._java_obj is None:
+            if self._fields is None:
+                raise ValueError("Schema was transferred from a process without access to its java definition")
+            gateway = get_gateway()
+            # noinspection PyProtectedMember
+            gateway_client = gateway._gateway_client
+            key = self._structural_key()
+            java_schema = _java_schemas.get((id(gateway_client), key)) if key is not None else None
+            if java_schema is None:
+                java_types = [f.get_type().to_java() for f in self._fields]
+                java_field_cls = JavaClass(_SCHEMA_CLASS + '$Field', gateway_client)
+                java_fields = pipelining.call_pipelined(gateway_client, [
+                    (java_field_cls, 'nullable' if f.is_nullable() else 'of', (f.get_name(), java_type))
+                    for f, java_type in zip(self._fields, java_types)
+                ])
+                java_schema = JavaClass(_SCHEMA_CLASS, gateway_client)(
+                    pipelining.to_java_list(gateway_client, java_fields)
+                )
+                if key is not None:
+                    _java_schemas[(id(gateway_client), key)] = java_schema
+            self.init_java(gateway, java_schema)
+        return self._java_obj
 
 
 class Field:
@@ -208,17 +883,25 @@ class Field:
         ret._nullable = True
         return ret
 
+    def get_name(self) -> str:
+        return self._name
+
+    def get_type(self) -> FieldType:
+        return self._type
+
+    def is_nullable(self) -> bool:
+        return self._nullable
+
     def to_java(self):
-        if not self._nullable:
-            return _gateway.jvm.org.apache.beam.sdk.schemas.Schema.Field.of(self._name, self._type.to_java())
-        else:
-            return _gateway.jvm.org.apache.beam.sdk.schemas.Schema.Field.nullable(self._name, self._type.to_java())
+        # noinspection PyProtectedMember
+        return pipelining.call_static(get_gateway()._gateway_client, _SCHEMA_CLASS + '$Field',
+                                      'nullable' if self._nullable else 'of', self._name, self._type.to_java())
 
 
 class FieldType:
     _internal_type: TypeName
-    _field_schema: Schema
-    _value_type: FieldType
+    _field_schema: Optional[Schema] = None
+    _value_type: Optional[FieldType] = None
 
     @staticmethod
     def of(type_name: TypeName) -> FieldType:
@@ -240,38 +923,88 @@ class FieldType:
         ret._value_type = element_type
         return ret
 
+    def get_type_name(self) -> TypeName:
+        return self._internal_type
+
+    def get_field_schema(self) -> Optional[Schema]:
+        return self._field_schema
+
+    def get_value_type(self) -> Optional[FieldType]:
+        return self._value_type
+
+    def _structural_key(self) -> Optional[Tuple]:
+        if self._internal_type.name == 'ROW':
+            # noinspection PyProtectedMember
+            schema_key = self._field_schema._structural_key() if self._field_schema is not None else None
+            return (self._internal_type.value, schema_key) if schema_key is not None else None
+        elif self._internal_type.name == 'ARRAY':
+            element_key = self._value_type._structural_key() if self._value_type is not None else None
+            return (self._internal_type.value, element_key) if element_key is not None else None
+        return self._internal_type.value,
+
     def to_java(self):
-        if self._internal_type.value is not None:
-            return _gateway.jvm.org.apache.beam.sdk.schemas.Schema.FieldType.of(
-                self._internal_type.value
-            )
+        # noinspection PyProtectedMember
+        gateway_client = get_gateway()._gateway_client
+        key = self._structural_key()
+        java_type = _java_field_types.get((id(gateway_client), key)) if key is not None else None
+        if java_type is not None:
+            return java_type
+        if self._internal_type.is_primitive():
+            java_type = pipelining.call_static(gateway_client, _SCHEMA_CLASS + '$FieldType', 'of',
+                                               self._internal_type.to_java())
         elif self._internal_type.name == 'ROW':
             if self._field_schema is None:
                 raise ValueError("Row FieldTypes should be initialized with FieldType#of_row(), not FieldType#of()")
             else:
-                return _gateway.jvm.org.apache.beam.sdk.schemas.Schema.FieldType.row(self._field_schema.to_java())
+                java_type = pipelining.call_static(gateway_client, _SCHEMA_CLASS + '$FieldType', 'row',
+                                                   self._field_schema.to_java())
         elif self._internal_type.name == 'ARRAY':
             if self._value_type is None:
                 raise ValueError("Array FieldTypes should be initialized with FieldType#of_arr(), not FieldType#of()")
             else:
-                return _gateway.jvm.org.apache.beam.sdk.schemas.Schema.FieldType.array(
-                    self._value_type.to_java(), True)
+                java_type = pipelining.call_static(gateway_client, _SCHEMA_CLASS + '$FieldType', 'array',
+                                                   self._value_type.to_java(), True)
+        if key is not None:
+            _java_field_types[(id(gateway_client), key)] = java_type
+        return java_type
 
 
 class TypeName(Enum):
-    STRING = _gateway.jvm.org.apache.beam.sdk.schemas.Schema.TypeName.STRING,
-    BYTE = _gateway.jvm.org.apache.beam.sdk.schemas.Schema.TypeName.BYTE,
-    BYTES = _gateway.jvm.org.apache.beam.sdk.schemas.Schema.TypeName.BYTES,
-    INT16 = _gateway.jvm.org.apache.beam.sdk.schemas.Schema.TypeName.INT16,
-    INT32 = _gateway.jvm.org.apache.beam.sdk.schemas.Schema.TypeName.INT32,
-    INT64 = _gateway.jvm.org.apache.beam.sdk.schemas.Schema.TypeName.INT64,
-    FLOAT = _gateway.jvm.org.apache.beam.sdk.schemas.Schema.TypeName.FLOAT,
-    DOUBLE = _gateway.jvm.org.apache.beam.sdk.schemas.Schema.TypeName.DOUBLE,
-    DECIMAL = _gateway.jvm.org.apache.beam.sdk.schemas.Schema.TypeName.DECIMAL,
-    BOOLEAN = _gateway.jvm.org.apache.beam.sdk.schemas.Schema.TypeName.BOOLEAN,
-    DATETIME = _gateway.jvm.org.apache.beam.sdk.schemas.Schema.TypeName.DATETIME,
-    ROW = None,
-    ARRAY = None
+    r"""
+    Beam schema type names. Values are the names of the equivalent java Schema.TypeName constants, which are only
+    resolved against the JVM when converted via :meth:`to_java`
+    """
+    STRING = 'STRING'
+    BYTE = 'BYTE'
+    BYTES = 'BYTES'
+    INT16 = 'INT16'
+    INT32 = 'INT32'
+    INT64 = 'INT64'
+    FLOAT = 'FLOAT'
+    DOUBLE = 'DOUBLE'
+    DECIMAL = 'DECIMAL'
+    BOOLEAN = 'BOOLEAN'
+    DATETIME = 'DATETIME'
+    ROW = 'ROW'
+    ARRAY = 'ARRAY'
+
+    def is_primitive(self) -> bool:
+        return self not in (TypeName.ROW, TypeName.ARRAY)
+
+    def to_java(self):
+        gateway = get_gateway()
+        java_type_name = _java_type_names.get((id(gateway), self.value))
+        if java_type_name is None:
+            # Resolve the enum class directly rather than via the JVM view, which costs a round trip per package
+            # noinspection PyProtectedMember
+            java_type_name = getattr(JavaClass("org.apache.beam.sdk.schemas.Schema$TypeName",
+                                               gateway._gateway_client), self.value)
+            _java_type_names[(id(gateway), self.value)] = java_type_name
+        return java_type_name
+
+
+# Java Schema.TypeName constants by gateway and name, resolved on first use
+_java_type_names: Dict[Tuple[int, str], JavaObject] = {}
 
 
 class SchemaField(object):
@@ -307,12 +1040,12 @@ class PartitionedCollection(Generic[PCOLL_TYPE], WrappedJavaObject):
         java_transform_func = self._transform_obj.callUDF(str(func.toolkit_component_uid), json.dumps(config))
         # Now directly apply on the internal pcoll, and wrap with a new PartitionedRowCollection
         result_pcoll: PartitionedCollection[UDF_OUT_TYPE] = PartitionedCollection[UDF_OUT_TYPE](self._transform_obj)
-        result_pcoll.init_java(self._jvm, self._java_obj.apply(desc, java_transform_func))
+        result_pcoll.init_java(self._gateway, self._java_obj.apply(desc, java_transform_func))
         return result_pcoll
 
     def get_schema(self) -> Schema:
         ret = Schema()
-        ret.init_java(self._jvm, self._java_obj.getSchema())
+        ret.init_java(self._gateway, self._java_obj.getSchema())
         return ret
 
     def set_encoder(self, encoder):
@@ -322,6 +1055,13 @@ class PartitionedCollection(Generic[PCOLL_TYPE], WrappedJavaObject):
         return self._java_obj
 
 
+# Whether the java PCollectionRowTuple supports creation from several tags at once, by gateway client, determined on
+# first use with each gateway
+_row_tuple_of_supported: Dict[int, bool] = {}
+# The most tag/collection pairs accepted by a single PCollectionRowTuple.of overload
+_ROW_TUPLE_OF_MAX_PAIRS = 5
+
+
 class PartitionedRowCollectionTuple(WrappedJavaObject):
 
     def __init__(self, creating_transform):
@@ -331,20 +1071,48 @@ class PartitionedRowCollectionTuple(WrappedJavaObject):
     def init_java(self, gateway, java_obj):
         super().init_java(gateway, java_obj)
         if self._java_obj is not None:
-            as_map: JavaMap[str, object] = self._java_obj.getAll()
-            for key in as_map.keys():
+            # Every tag and collection is read in bulk rather than with a round trip per tag
+            # noinspection PyProtectedMember
+            as_map = pipelining.from_java_map(gateway._gateway_client, self._java_obj.getAll())
+            for key, java_pcoll in as_map.items():
                 self._internal[key] = PartitionedCollection[Row](self._transform_obj)
-                self._internal[key].init_java(self._jvm, as_map.get(key))
+                self._internal[key].init_java(gateway, java_pcoll)
 
     def to_java(self):
-        java_tuple = self._gateway.jvm.org.apache.beam.sdk.values.PCollectionRowTuple.empty(
-            self._java_obj.getPipeline())
-        for key in self._internal:
-            java_tuple = self._gateway.get_method(java_tuple, "and")(key, self._internal[key].to_java())
+        # Tuples built in python (e.g. by OneToOneTransform.expand) were never passed through init_java
+        gateway = self._gateway if self._gateway is not None else get_gateway()
+        # noinspection PyProtectedMember
+        gateway_client = gateway._gateway_client
+        row_tuple_cls = JavaClass("org.apache.beam.sdk.values.PCollectionRowTuple", gateway_client)
+        items = list(self._internal.items())
+        java_tuple = None
+        if len(items) > 0 and _row_tuple_of_supported.get(id(gateway_client)) is not False:
+            # Creates the tuple from up to the first 5 tags in a single call rather than chaining a call per tag
+            of_args = [arg for key, pcoll in items[:_ROW_TUPLE_OF_MAX_PAIRS] for arg in (key, pcoll.to_java())]
+            try:
+                java_tuple = pipelining.call_pipelined(gateway_client, [(row_tuple_cls, "of", of_args)])[0]
+                _row_tuple_of_supported[id(gateway_client)] = True
+                items = items[_ROW_TUPLE_OF_MAX_PAIRS:]
+            except (Py4JJavaError, Py4JNetworkError):
+                raise
+            except Py4JError:
+                # Older Beam versions lack the multi-tag overloads, fall back to chaining
+                _row_tuple_of_supported[id(gateway_client)] = False
+        if java_tuple is None:
+            if len(items) > 0:
+                # The pipeline is that of the member collections
+                pipeline = pipelining.call_pipelined(gateway_client, [(items[0][1].to_java(), "getPipeline", ())])[0]
+            elif self._java_obj is not None:
+                pipeline = self._java_obj.getPipeline()
+            else:
+                raise ValueError("An empty collection tuple built in python has no pipeline to be created within")
+            java_tuple = pipelining.call_pipelined(gateway_client, [(row_tuple_cls, "empty", (pipeline,))])[0]
+        for key, pcoll in items:
+            java_tuple = pipelining.call_pipelined(gateway_client, [(java_tuple, "and", (key, pcoll.to_java()))])[0]
         return java_tuple
 
-    def get_keys(self):
-        return self._internal.keys()
+    def get_keys(self) -> List[str]:
+        return list(self._internal.keys())
 
     def get(self, key: str):
         return self._internal[key]
@@ -354,31 +1122,260 @@ class PartitionedRowCollectionTuple(WrappedJavaObject):
 
 
 # Component and Transform Types
+# Cache of java TupleTags by gateway and tag name. TupleTags are immutable and compared by id, so a single instance per
+# tag can be shared by every output collector of a bridge
+_tuple_tags: Dict[Tuple[int, str], JavaObject] = {}
+
+
+def _get_tuple_tag(gateway: JavaGateway, tag: str) -> JavaObject:
+    jvm_tag = _tuple_tags.get((id(gateway), tag))
+    if jvm_tag is None:
+        # noinspection PyProtectedMember
+        jvm_tag = JavaClass("org.apache.beam.sdk.values.TupleTag", gateway._gateway_client)(tag)
+        _tuple_tags[(id(gateway), tag)] = jvm_tag
+    return jvm_tag
+
+
+def _reject_arrow_view(obj: Any):
+    if isinstance(obj, arrow.ArrowRowView):
+        raise ValueError("Rows received over the Arrow data plane are read-only views that cannot be output, "
+                         "build output rows via Row.of instead")
+
+
+def _to_output_value(gateway_client, obj: Any) -> Any:
+    """ Converts a value output by a UDF to the value sent to the JVM, raising a ValueError if it cannot be sent """
+    _reject_arrow_view(obj)
+    value = _to_java_value(gateway_client, obj)
+    if not pipelining.is_convertible(gateway_client, value):
+        raise ValueError(f"Cannot output a value of type {type(obj).__name__}: outputs must be rows, java objects, "
+                         f"or primitives (None, bool, int, float, Decimal, str, bytes) or lists/dicts thereof")
+    return value
+
+
 class OutputCollector(WrappedJavaObject):
 
     def output(self, obj: Any):
-        if isinstance(obj, WrappedJavaObject):
-            self._java_obj.output(obj.to_java())
-        else:
-            self._java_obj.output(obj)  # TODO type-check this/ensure that it is autoconvertible
+        # noinspection PyProtectedMember
+        self._java_obj.output(_to_output_value(self._gateway._gateway_client, obj))
 
     def output_tagged(self, tag: str, obj: Any):
-        jvm_tag = self._gateway.jvm.org.apache.beam.sdk.values.TupleTag(tag)
-        if isinstance(obj, WrappedJavaObject):
-            self._java_obj.output(jvm_tag, obj.to_java())
-        else:
-            self._java_obj.output(jvm_tag, obj)  # TODO type-check this/ensure that it is autoconvertible
+        jvm_tag = _get_tuple_tag(self._gateway, tag)
+        # noinspection PyProtectedMember
+        self._java_obj.output(jvm_tag, _to_output_value(self._gateway._gateway_client, obj))
+
+    def flush(self):
+        pass
 
     def to_java(self):
         return self._java_obj
 
 
+class RecordingOutputCollector(OutputCollector):
+    r"""
+    An output collector that records outputs in python rather than sending them to the JVM, for outputs that are
+    produced away from the bridge's JVM connection and delivered later via :meth:`replay`
+    """
+
+    def __init__(self):
+        self.outputs: List[Tuple[Optional[str], Any]] = []
+
+    def output(self, obj: Any):
+        self.outputs.append((None, self._record(obj)))
+
+    def output_tagged(self, tag: str, obj: Any):
+        self.outputs.append((tag, self._record(obj)))
+
+    @staticmethod
+    def _record(obj: Any) -> Any:
+        # Fail where the view is output rather than when the recorded outputs are replayed
+        _reject_arrow_view(obj)
+        return obj.copy() if isinstance(obj, Row) else obj
+
+    def replay(self, out: OutputCollector):
+        for tag, obj in self.outputs:
+            if tag is None:
+                out.output(obj)
+            else:
+                out.output_tagged(tag, obj)
+
+    def to_java(self):
+        return None
+
+
+class TaggedOutput(object):
+    """ An output yielded by a generator :meth:`UserDefinedPartitionMappingFunction.process` to a tagged output """
+    __slots__ = ('tag', 'value')
+
+    def __init__(self, tag: str, value: Any):
+        self.tag = tag
+        self.value = value
+
+
+def _emit(out: OutputCollector, obj: Any) -> int:
+    """ Outputs a value yielded by a generator process() call
+
+    :return: The estimated size of the value
+    """
+    if isinstance(obj, TaggedOutput):
+        out.output_tagged(obj.tag, obj.value)
+        return _estimate_size(obj.value)
+    out.output(obj)
+    return _estimate_size(obj)
+
+
+def _call_process(function: UserDefinedPartitionMappingFunction, out: OutputCollector, input_value: Any) -> None:
+    r"""
+    Invokes process() for a single input. If process() is a generator, its outputs are pulled in chunks of
+    output_buffer_bytes (estimated) bytes, each of which is flushed before the next is pulled. For the bridge's
+    buffered output collector, flushing ships the chunk to the JVM, so at most a chunk of the outputs of a single
+    input is held in python however many the input produces
+    """
+    result = function.process(out, input_value)
+    if not inspect.isgenerator(result):
+        return
+    chunk_bytes = 0
+    for obj in result:
+        chunk_bytes += _emit(out, obj)
+        if chunk_bytes >= function.output_buffer_bytes:
+            out.flush()
+            chunk_bytes = 0
+
+
+# Whether the java process contexts of a gateway client support bulk output, by gateway client, determined on the
+# first bulk flush through each gateway
+_bulk_output_supported: Dict[int, bool] = {}
+
+
+def _estimate_size(obj: Any) -> int:
+    if isinstance(obj, (str, bytes, memoryview)):
+        return len(obj)
+    if isinstance(obj, Row) and obj._values is not None:
+        return sum(len(value) if isinstance(value, (str, bytes, memoryview)) else 8 for value in obj._values)
+    return 64
+
+
+class BufferedOutputCollector(OutputCollector):
+    r"""
+    An output collector that buffers outputs per tag in python and sends each tag's buffer to the JVM in bulk, either
+    when the buffer reaches its element or (estimated) byte threshold, or when :meth:`flush` is called. The bridge
+    flushes at the end of every process/bundle finish call, as java process contexts are only valid for the duration
+    of the call they were supplied with.
+
+    Ordering guarantees: outputs to the same tag are delivered to the JVM in the order they were emitted. The relative
+    order of outputs to different tags (including the untagged main output) is *not* preserved. All outputs are
+    delivered before the bridge call that emitted them returns.
+
+    Buffers of more than one output are sent in a single call of the java process context's
+    ``void outputAll(java.util.List<Object> values)`` (main output) or
+    ``void outputAllTagged(String tag, java.util.List<Object> values)`` (tagged outputs), which the java bridge's
+    ``PythonProcessingPartitionBasedDoFn.ProcessContext`` must implement by outputting each value in order (Beam's own
+    ProcessContext has no such methods). Against java bridges lacking them, outputs are sent one call per output
+    instead (though still within a single round trip), with support probed once per gateway.
+    """
+
+    def __init__(self, max_elements: int = 1024, max_bytes: int = 4 * 1024 * 1024):
+        self._max_elements = max_elements
+        self._max_bytes = max_bytes
+        self._buffers: Dict[Optional[str], List[Any]] = {}
+        self._buffered_bytes: Dict[Optional[str], int] = {}
+
+    def output(self, obj: Any):
+        self._buffer(None, obj)
+
+    def output_tagged(self, tag: str, obj: Any):
+        self._buffer(tag, obj)
+
+    def _buffer(self, tag: Optional[str], obj: Any):
+        buffer = self._buffers.setdefault(tag, [])
+        # Convert immediately so that later modifications of a (copy-on-write) row are not reflected in the output
+        # noinspection PyProtectedMember
+        buffer.append(_to_output_value(self._gateway._gateway_client, obj))
+        self._buffered_bytes[tag] = self._buffered_bytes.get(tag, 0) + _estimate_size(obj)
+        if len(buffer) >= self._max_elements or self._buffered_bytes[tag] >= self._max_bytes:
+            self._flush_tag(tag)
+
+    def _flush_tag(self, tag: Optional[str]):
+        buffer = self._buffers.pop(tag, None)
+        self._buffered_bytes.pop(tag, None)
+        if not buffer:
+            return
+        # noinspection PyProtectedMember
+        gateway_client = self._gateway._gateway_client
+        if len(buffer) > 1 and _bulk_output_supported.get(id(gateway_client)) is not False:
+            java_list = references.track(pipelining.to_java_list(gateway_client, buffer))
+            try:
+                pipelining.call_pipelined(gateway_client, [
+                    (self._java_obj, 'outputAll', (java_list,)) if tag is None
+                    else (self._java_obj, 'outputAllTagged', (tag, java_list))
+                ])
+                _bulk_output_supported[id(gateway_client)] = True
+                return
+            except (Py4JJavaError, Py4JNetworkError):
+                raise
+            except Py4JError:
+                # Older java bridge implementations do not support bulk output, fall back to per-element output
+                _bulk_output_supported[id(gateway_client)] = False
+        # Outputs never call back into python, so per-element outputs can still be sent in a single write
+        if tag is None:
+            pipelining.call_pipelined(gateway_client, [(self._java_obj, 'output', (obj,)) for obj in buffer])
+        else:
+            jvm_tag = _get_tuple_tag(self._gateway, tag)
+            pipelining.call_pipelined(gateway_client, [(self._java_obj, 'output', (jvm_tag, obj)) for obj in buffer])
+
+    def flush(self):
+        for tag in list(self._buffers.keys()):
+            self._flush_tag(tag)
+        # The JVM resolves output values passed through the shared memory channel on receipt
+        shared_memory.reset_writes()
+
+
 UDF_IN_TYPE = TypeVar("UDF_IN_TYPE")
 UDF_OUT_TYPE = TypeVar("UDF_OUT_TYPE")
 
 
 class UserDefinedPartitionMappingFunction(Generic[UDF_IN_TYPE, UDF_OUT_TYPE], ABC):
     toolkit_component_uid: UUID = None
+    # UDFs can opt into receiving bundle chunks as columnar Arrow record batches by setting this to DataPlane.ARROW.
+    # Chunks are passed to process_arrow_batch as they arrive, so bypass the result cache and adaptive batching, and
+    # vectorized UDFs cannot use it
+    data_plane: DataPlane = DataPlane.PY4J
+    # UDFs that read most fields of their input rows can set this to fetch all row values up front in a single pass
+    materialize_rows: bool = False
+    # UDFs that can work with str-like shared_memory.SharedText STRING values and memoryview BYTES values can set this
+    # to read large values passed through the shared memory channel without copying them out of shared memory
+    zero_copy_values: bool = False
+    # UDFs that hold no state between bundles beyond what init_from_driver sets up can set this to have torn down
+    # instances retained and reused by later registrations with the same configuration instead of reinitializing
+    poolable: bool = False
+    # UDFs that never retain input rows, their (non-primitive) values, or output collectors beyond the bundle they
+    # were received in can set this to have the java references handed to them released in bulk at bundle finish,
+    # rather than individually by py4j as each python proxy is garbage collected
+    bundle_scoped_references: bool = False
+    # Thresholds at which outputs buffered within a single bridge call are sent to the JVM in bulk
+    output_buffer_elements: int = 1024
+    output_buffer_bytes: int = 4 * 1024 * 1024
+    # UDFs whose outputs depend only on their configuration and input can set this to have outputs cached by input
+    # content and replayed for previously seen inputs without calling process (if the bridge has a result cache). Each
+    # input is then processed individually via process, and input rows are materialized to compute their cache keys.
+    # cache_version should be changed whenever a change to the implementation changes its outputs
+    deterministic: bool = False
+    cache_version: str = ''
+    _result_cache_scope: Optional[str] = None
+    # UDFs that benefit from processing many elements per process_batch call (e.g. batched model inference) can set
+    # this to have elements buffered across the process calls of a bundle and dispatched in micro-batches predicted to
+    # take about batch_target_latency_s to process, based on the observed latency of previous batches by (estimated)
+    # payload size. Outputs of buffered elements are emitted during a later call of the same bundle, and any elements
+    # still buffered are processed before on_bundle_finish. Payload sizes are only known for materialized rows (see
+    # materialize_rows), otherwise batches are sized by element count alone
+    adaptive_batching: bool = False
+    batch_target_latency_s: float = 0.05
+    batch_max_elements: int = 4096
+    # UDFs whose bundle lifecycle methods can be called concurrently from several threads (each handling a different
+    # bundle) can set this to have the calls of a single instance run in parallel. Calls of other instances are always
+    # serialized per instance. Instances that carry elements or java references across the calls of a bundle (i.e.
+    # with adaptive_batching or bundle_scoped_references, and asynchronous or vectorized UDFs) instead handle a single
+    # bundle at a time, from its start until it finishes
+    thread_safe: bool = False
 
     @abstractmethod
     def init_from_driver(self, json_config: Optional[Dict]) -> None:
@@ -389,9 +1386,45 @@ class UserDefinedPartitionMappingFunction(Generic[UDF_IN_TYPE, UDF_OUT_TYPE], AB
         pass
 
     @abstractmethod
-    def process(self, out: OutputCollector, input_value: Any) -> None:
+    def process(self, out: OutputCollector, input_value: Any) -> Optional[Iterator[Any]]:
+        """Processes a single bundle element, emitting outputs via out.
+
+        Implementations producing many outputs per element may instead be generators yielding their outputs
+        (wrapped in :class:`TaggedOutput` for tagged outputs). Yielded outputs are sent to the JVM in chunks of
+        :attr:`output_buffer_bytes` as they are produced rather than once the element is processed, so only about a
+        chunk of outputs is held in python at a time. Outputs of deterministic UDFs cached by the bridge's result
+        cache are nonetheless recorded whole, as are those of asynchronous UDFs
+
+        :param out: The output collector
+        :param input_value: The (already python-converted) element
+        """
         pass
 
+    def process_batch(self, out: OutputCollector, values: List[Any]) -> None:
+        """Processes a chunk of bundle elements supplied in a single bridge call.
+
+        Implementations may override this to operate on the whole chunk at once, by default each element
+        is simply passed to :meth:`process` in order.
+
+        :param out: The output collector shared by every element in the chunk
+        :param values: The (already python-converted) elements to process
+        """
+        for value in values:
+            _call_process(self, out, value)
+
+    def process_arrow_batch(self, out: OutputCollector, batch: arrow.RowBatch) -> None:
+        """Processes a chunk of bundle elements received over the Arrow data plane.
+
+        Implementations may override this to use the zero-copy columns of the batch directly, by default each
+        row is passed to :meth:`process` as a read-only :class:`arrow.ArrowRowView`. Views cannot be modified or
+        output (doing so raises a ValueError), so UDFs opting into the Arrow data plane that pass their inputs
+        through must build their output rows via :meth:`Row.of`
+
+        :param out: The output collector shared by every element in the chunk
+        :param batch: The columnar view of the chunk
+        """
+        self.process_batch(out, list(batch.rows()))
+
     @abstractmethod
     def on_bundle_finish(self, out: OutputCollector) -> None:
         pass
@@ -400,15 +1433,403 @@ class UserDefinedPartitionMappingFunction(Generic[UDF_IN_TYPE, UDF_OUT_TYPE], AB
     def on_teardown(self) -> None:
         pass
 
+    def _get_udf_class(self) -> type:
+        """ :return: The class implementing this UDF, which differs from its type for stand-ins of instances hosted
+        elsewhere (e.g. by a worker process) """
+        return type(self)
+
+
+# Event loop shared by all asynchronous UDFs of this process, run on a dedicated thread
+_async_event_loop: Optional[asyncio.AbstractEventLoop] = None
+_async_event_loop_lock = threading.Lock()
+
+
+def _get_async_event_loop() -> asyncio.AbstractEventLoop:
+    global _async_event_loop
+    with _async_event_loop_lock:
+        if _async_event_loop is None:
+            _async_event_loop = asyncio.new_event_loop()
+            threading.Thread(target=_async_event_loop.run_forever, name="ohnlp-udf-event-loop", daemon=True).start()
+        return _async_event_loop
+
+
+async def _record_async_outputs(outputs, out: RecordingOutputCollector) -> None:
+    # Outputs of asynchronous generators are recorded as yielded, then delivered with those of every other call
+    async for obj in outputs:
+        _emit(out, obj)
+
+
+class _AsyncProcessRunner(object):
+    """ Tracks the in-flight process() coroutines of a single asynchronous UDF instance """
+
+    def __init__(self, max_in_flight: int):
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._pending: Deque[Tuple[Future, RecordingOutputCollector]] = deque()
+
+    def submit(self, process, input_value: Any):
+        # Blocks the calling bridge thread while the in-flight limit is reached, applying backpressure to the JVM
+        self._slots.acquire()
+        recorded = RecordingOutputCollector()
+        call = process(recorded, input_value)
+        if inspect.isasyncgen(call):
+            call = _record_async_outputs(call, recorded)
+        future = asyncio.run_coroutine_threadsafe(call, _get_async_event_loop())
+        future.add_done_callback(lambda _: self._slots.release())
+        self._pending.append((future, recorded))
+
+    def drain(self, out: OutputCollector, wait: bool):
+        # Outputs are delivered in submission order, so completed tasks queued behind a running task are held back
+        while len(self._pending) > 0 and (wait or self._pending[0][0].done()):
+            future, recorded = self._pending.popleft()
+            future.result()
+            recorded.replay(out)
+
+
+class AsyncUserDefinedPartitionMappingFunction(UserDefinedPartitionMappingFunction[UDF_IN_TYPE, UDF_OUT_TYPE], ABC):
+    r"""
+    A UDF whose :meth:`process` is a coroutine, for UDFs that are I/O-bound (e.g. calls to model servers or
+    databases). Process calls are run on an event loop dedicated to the bridge, with up to :attr:`max_in_flight`
+    elements of an instance in progress at a time.
+
+    Outputs of a process call are delivered to the JVM during a later bridge call of the same bundle once the call
+    completes, in the order the elements were received. All pending calls are awaited before
+    :meth:`on_bundle_finish` is invoked, so no element outlives its bundle. :meth:`process` may also be an
+    asynchronous generator yielding its outputs (wrapped in :class:`TaggedOutput` for tagged outputs).
+    """
+    # The maximum number of elements of this instance being processed concurrently
+    max_in_flight: int = 64
+    _async_runner: Optional[_AsyncProcessRunner] = None
+
+    @abstractmethod
+    async def process(self, out: OutputCollector, input_value: Any) -> None:
+        pass
+
+    def _get_async_runner(self) -> _AsyncProcessRunner:
+        if self._async_runner is None:
+            self._async_runner = _AsyncProcessRunner(self.max_in_flight)
+        return self._async_runner
+
+    def process_batch(self, out: OutputCollector, values: List[Any]) -> None:
+        runner = self._get_async_runner()
+        for value in values:
+            runner.submit(self.process, value)
+        runner.drain(out, wait=False)
+
+    def await_pending(self, out: OutputCollector) -> None:
+        """ Waits for every in-flight process call of this instance and delivers their outputs """
+        self._get_async_runner().drain(out, wait=True)
+
+
+def _require_frame_library(frame_type: str):
+    # Imported on first use, as importing pandas would otherwise add substantially to bridge startup time
+    try:
+        if frame_type == 'pandas':
+            import pandas
+            return pandas
+        import numpy
+        return numpy
+    except ImportError:  # numpy and pandas are optional dependencies
+        raise ImportError(f"Vectorized UDFs with {frame_type} frames require {frame_type} to be installed, "
+                          f"install via pip install ohnlptk-xlang-python[vectorized]")
+
+
+def _rows_to_frame(rows: List[Row], frame_type: str) -> Any:
+    # noinspection PyProtectedMember
+    field_indices = rows[0]._get_schema_index().field_indices
+    # noinspection PyProtectedMember
+    columns = {name: [row.materialize()._values[idx] for row in rows] for name, idx in field_indices.items()}
+    if frame_type == 'pandas':
+        pandas = _require_frame_library('pandas')
+        # Columns with nulls are kept as python objects, as pandas would otherwise represent nulls within integer
+        # columns as NaN, changing their type
+        return pandas.DataFrame({name: pandas.Series(values, dtype=object) if None in values else values
+                                 for name, values in columns.items()}, columns=list(field_indices))
+    numpy = _require_frame_library('numpy')
+    return {name: numpy.asarray(values, dtype=object if None in values else None) for name, values in columns.items()}
+
+
+def _frame_to_rows(frame: Any, schema: Schema) -> List[Row]:
+    field_names = list(schema.get_index().field_indices)
+    columns = [frame[name].tolist() if name in frame else None for name in field_names]
+    num_rows = max((len(column) for column in columns if column is not None), default=0)
+    return [Row.of(schema, [column[idx] if column is not None else None for column in columns])
+            for idx in range(num_rows)]
+
+
+class VectorizedPartitionMappingFunction(UserDefinedPartitionMappingFunction[Row, Row], ABC):
+    r"""
+    A UDF operating on columnar batches of rows rather than row at a time, for UDFs that are much faster over a whole
+    batch (e.g. scoring, feature extraction, or embedding lookups). Rows are buffered across the process calls of a
+    bundle into batches of up to :attr:`frame_batch_rows` rows or :attr:`frame_batch_bytes` (estimated) bytes, each
+    of which is passed to :meth:`process_frame` as a pandas DataFrame (or, with :attr:`frame_type` numpy, a dict of
+    numpy arrays by field name). Any remaining rows are processed before :meth:`on_bundle_finish` is invoked.
+
+    Requires numpy, and pandas for DataFrame frames
+    """
+    # The frame type passed to process_frame, pandas or numpy
+    frame_type: str = 'pandas'
+    frame_batch_rows: int = 1024
+    frame_batch_bytes: int = 16 * 1024 * 1024
+    # Every value of buffered rows is read to build the frame, so rows are fetched whole
+    materialize_rows: bool = True
+    _frame_buffer: Optional[List[Row]] = None
+    _frame_buffer_bytes: int = 0
+
+    @abstractmethod
+    def process_frame(self, frame: Any) -> Any:
+        """Processes a batch of rows
+
+        :param frame: The batch, with one column per field of the input schema
+        :return: The main output, as a frame of the same type with a column per field of :meth:`get_output_schema`
+        (missing columns are null), or None for no output
+        """
+        pass
+
+    def get_output_schema(self, input_schema: Schema) -> Schema:
+        """ :return: The schema of the rows of the frames returned by :meth:`process_frame`, by default the same as
+        the input schema """
+        return input_schema
+
+    def process(self, out: OutputCollector, input_value: Row) -> None:
+        self.process_batch(out, [input_value])
+
+    def process_batch(self, out: OutputCollector, values: List[Row]) -> None:
+        for value in values:
+            if self._frame_buffer is None:
+                self._frame_buffer = []
+            self._frame_buffer.append(value)
+            self._frame_buffer_bytes += _estimate_size(value)
+            if len(self._frame_buffer) >= self.frame_batch_rows or self._frame_buffer_bytes >= self.frame_batch_bytes:
+                self.flush_frame(out)
+
+    def flush_frame(self, out: OutputCollector) -> None:
+        """ Processes the currently buffered rows (if any) as a batch """
+        rows = self._frame_buffer
+        self._frame_buffer = None
+        self._frame_buffer_bytes = 0
+        if not rows:
+            return
+        result = self.process_frame(_rows_to_frame(rows, self.frame_type))
+        if result is not None:
+            for row in _frame_to_rows(result, self.get_output_schema(rows[0].get_schema())):
+                out.output(row)
+
+
+def _buffers_elements(function: UserDefinedPartitionMappingFunction) -> bool:
+    """ :return: Whether the UDF is asynchronous or vectorized, and so buffers elements across the calls of a bundle
+    in its own way (outputs are then not emitted by the call processing each element) """
+    # noinspection PyProtectedMember
+    return issubclass(function._get_udf_class(), (AsyncUserDefinedPartitionMappingFunction,
+                                                   VectorizedPartitionMappingFunction))
+
+
+def _carries_bundle_state(function: UserDefinedPartitionMappingFunction) -> bool:
+    """ :return: Whether the UDF carries elements or java references across the calls of a bundle, which must then
+    not interleave with the calls of its other bundles """
+    return function.adaptive_batching or function.bundle_scoped_references or _buffers_elements(function)
+
+
+def _reject_unsupported_arrow_udf(function: UserDefinedPartitionMappingFunction) -> None:
+    # Vectorized UDFs build their frames from the values of buffered Rows, which the read-only views of the Arrow
+    # data plane cannot supply
+    # noinspection PyProtectedMember
+    if issubclass(function._get_udf_class(), VectorizedPartitionMappingFunction):
+        raise ValueError(f"UDF {function.toolkit_component_uid} is vectorized and cannot use the ARROW data plane, "
+                         f"use the PY4J data plane (its frames are built from the rows of each bundle) instead")
+
+
+def _result_cache_content(value: Any) -> Any:
+    """ :return: A picklable representation of the content of an input value, from which its cache key is derived """
+    if isinstance(value, Row):
+        # noinspection PyProtectedMember
+        field_names = list(value._get_schema_index().field_indices)
+        return field_names, [_result_cache_content(v) for v in value.materialize()._values]
+    if isinstance(value, list):
+        return [_result_cache_content(element) for element in value]
+    if isinstance(value, dict):
+        return {key: _result_cache_content(element) for key, element in value.items()}
+    return _detach_value(get_gateway(), value)
+
+
+def _process_batch(function: UserDefinedPartitionMappingFunction, out: OutputCollector, values: List[Any]) -> None:
+    if not function.deterministic or not result_cache.is_enabled() or function._result_cache_scope is None \
+            or _buffers_elements(function):
+        function.process_batch(out, values)
+        return
+    udf_uid = str(function.toolkit_component_uid)
+    for value in values:
+        try:
+            key = result_cache.key_of(function._result_cache_scope, _result_cache_content(value))
+        except ValueError:
+            # Inputs holding values that cannot leave the bridge process (e.g. arbitrary java objects) have no content
+            # to key results by, so are always processed
+            result_cache.mark_uncacheable(udf_uid)
+            _call_process(function, out, value)
+            continue
+        outputs = result_cache.lookup(udf_uid, key)
+        if outputs is None:
+            recorded = RecordingOutputCollector()
+            _call_process(function, recorded, value)
+            result_cache.store(udf_uid, key, recorded.outputs)
+            outputs = recorded.outputs
+        for tag, obj in outputs:
+            if tag is None:
+                out.output(obj)
+            else:
+                out.output_tagged(tag, obj)
+
+
+def _finish_bundle(function: UserDefinedPartitionMappingFunction, out: OutputCollector) -> None:
+    if isinstance(function, AsyncUserDefinedPartitionMappingFunction):
+        function.await_pending(out)
+    if isinstance(function, VectorizedPartitionMappingFunction):
+        function.flush_frame(out)
+    function.on_bundle_finish(out)
+
+
+class _BatchLatencyModel(object):
+    r"""
+    An exponentially weighted least squares fit of the latency of processing a batch, as a fixed per-batch overhead
+    plus a cost per (estimated) payload byte, so that recent batches dominate as the workload shifts
+    """
+
+    def __init__(self, smoothing: float):
+        """
+        :param smoothing: The weight of each new observation relative to all previous observations
+        """
+        self._decay = 1.0 - smoothing
+        self._weight = 0.0
+        self._sum_bytes = 0.0
+        self._sum_latency = 0.0
+        self._sum_bytes_sq = 0.0
+        self._sum_bytes_latency = 0.0
+
+    def observe(self, payload_bytes: int, latency_s: float):
+        self._weight = self._decay * self._weight + 1.0
+        self._sum_bytes = self._decay * self._sum_bytes + payload_bytes
+        self._sum_latency = self._decay * self._sum_latency + latency_s
+        self._sum_bytes_sq = self._decay * self._sum_bytes_sq + payload_bytes * payload_bytes
+        self._sum_bytes_latency = self._decay * self._sum_bytes_latency + payload_bytes * latency_s
+
+    @property
+    def fitted(self) -> bool:
+        return self._weight > 0
+
+    def coefficients(self) -> Tuple[float, float]:
+        """ :return: The fitted per-batch overhead (s) and cost per payload byte (s) """
+        denominator = self._weight * self._sum_bytes_sq - self._sum_bytes * self._sum_bytes
+        if denominator > 1e-9 * self._weight * self._sum_bytes_sq:
+            per_byte = (self._weight * self._sum_bytes_latency - self._sum_bytes * self._sum_latency) / denominator
+            if per_byte > 0:
+                return max((self._sum_latency - per_byte * self._sum_bytes) / self._weight, 0.0), per_byte
+        # Batches so far were (nearly) all of the same size, so the overhead cannot be separated from the payload cost
+        return 0.0, self._sum_latency / max(self._sum_bytes, 1.0)
+
+
+class _MicroBatchScheduler(object):
+    r"""
+    Buffers the elements of a UDF instance with adaptive_batching across the process calls of a bundle, dispatching
+    them to the UDF in micro-batches whose payload is predicted to take about the target latency to process. Short
+    elements are therefore processed in large batches and long elements in small ones.
+
+    Until the first batch is observed, the elements of each call are dispatched as a batch at the end of the call
+    """
+
+    def __init__(self, instance_uid: str, target_latency_s: float, max_elements: int, smoothing: float = 0.2):
+        """
+        :param instance_uid: The UDF instance UID, used to label metrics
+        :param target_latency_s: The processing time to aim for per batch
+        :param max_elements: The maximum number of elements per batch
+        :param smoothing: The weight of each batch's observed latency in the latency model
+        """
+        self.instance_uid = instance_uid
+        self._target_latency_s = target_latency_s
+        self._max_elements = max_elements
+        self._model = _BatchLatencyModel(smoothing)
+        self._buffer: List[Any] = []
+        self._buffered_bytes = 0
+        self.target_bytes: Optional[float] = None
+        self.last_batch_elements = 0
+        self.last_batch_latency_s = 0.0
+        self.batches_by_reason: Dict[str, int] = {}
+        with _batch_schedulers_lock:
+            _batch_schedulers.add(self)
+
+    def submit(self, function: UserDefinedPartitionMappingFunction, out: OutputCollector, values: List[Any]):
+        for value in values:
+            self._buffer.append(value)
+            self._buffered_bytes += _estimate_size(value)
+            if len(self._buffer) >= self._max_elements:
+                self._dispatch(function, out, 'max_elements')
+            elif self.target_bytes is not None and self._buffered_bytes >= self.target_bytes:
+                self._dispatch(function, out, 'target_latency')
+        if self.target_bytes is None and len(self._buffer) > 0:
+            self._dispatch(function, out, 'warmup')
+
+    def flush(self, function: UserDefinedPartitionMappingFunction, out: OutputCollector):
+        """ Dispatches any buffered elements, e.g. as the bundle finishes """
+        if len(self._buffer) > 0:
+            self._dispatch(function, out, 'bundle_finish')
+
+    def _dispatch(self, function: UserDefinedPartitionMappingFunction, out: OutputCollector, reason: str):
+        batch = self._buffer
+        batch_bytes = self._buffered_bytes
+        self._buffer = []
+        self._buffered_bytes = 0
+        start = time.perf_counter()
+        _process_batch(function, out, batch)
+        latency_s = time.perf_counter() - start
+        self._model.observe(batch_bytes, latency_s)
+        overhead_s, per_byte_s = self._model.coefficients()
+        self.target_bytes = max(self._target_latency_s - overhead_s, 0.0) / per_byte_s if per_byte_s > 0 \
+            else float('inf')
+        self.last_batch_elements = len(batch)
+        self.last_batch_latency_s = latency_s
+        self.batches_by_reason[reason] = self.batches_by_reason.get(reason, 0) + 1
+
+    def __len__(self):
+        return len(self._buffer)
+
+
+# Every micro-batch scheduler that has not yet been garbage collected, for metrics
+_batch_schedulers: weakref.WeakSet = weakref.WeakSet()
+_batch_schedulers_lock = threading.Lock()
+
+
+def _collect_batch_schedulers() -> List[metrics.Sample]:
+    with _batch_schedulers_lock:
+        schedulers = list(_batch_schedulers)
+    ret: List[metrics.Sample] = []
+    for scheduler in schedulers:
+        labels = {'instance': scheduler.instance_uid}
+        # noinspection PyProtectedMember
+        overhead_s, per_byte_s = scheduler._model.coefficients() if scheduler._model.fitted else (0.0, 0.0)
+        ret.extend([
+            ('micro_batch_target_bytes', labels,
+             scheduler.target_bytes if scheduler.target_bytes is not None else 0.0),
+            ('micro_batch_overhead_seconds', labels, overhead_s),
+            ('micro_batch_seconds_per_byte', labels, per_byte_s),
+            ('micro_batch_buffered_elements', labels, len(scheduler)),
+            ('micro_batch_last_elements', labels, scheduler.last_batch_elements),
+            ('micro_batch_last_latency_seconds', labels, scheduler.last_batch_latency_s)
+        ])
+        ret.extend(('micro_batches_total', {'instance': scheduler.instance_uid, 'reason': reason}, count)
+                   for reason, count in list(scheduler.batches_by_reason.items()))
+    return ret
+
+
+metrics.bridge_metrics.register_collector(_collect_batch_schedulers)
+
 
 COMPONENT_INPUT_T = TypeVar("COMPONENT_INPUT_T")
 COMPONENT_OUTPUT_T = TypeVar("COMPONENT_OUTPUT_T")
 
 
 class Component(Generic[COMPONENT_INPUT_T, COMPONENT_OUTPUT_T], WrappedJavaObject):
-    _name: str
-    _desc: str
-    _config_fields: Dict[str, ConfigurationProperty]
+    # Class-level metadata set by the ComponentDescription decorator
+    _component_name: Optional[str] = None
+    _component_desc: Optional[str] = None
+    _config_fields: Dict[str, ConfigurationProperty] = {}
 
     @abstractmethod
     def init(self):
@@ -427,7 +1848,7 @@ class Component(Generic[COMPONENT_INPUT_T, COMPONENT_OUTPUT_T], WrappedJavaObjec
 
     @property
     def name(self):
-        return self._name
+        return self._component_name
 
 
 class Transform(Component[PartitionedRowCollectionTuple, PartitionedRowCollectionTuple], ABC):
@@ -517,6 +1938,257 @@ class OneToManyTransform(Transform, ABC):
         pass
 
 
+# Shared Resources
+class _SharedResource(object):
+    def __init__(self, value: Any, size_bytes: int):
+        self.value = value
+        self.size_bytes = size_bytes
+        self.ref_count = 0
+
+
+class SharedResourceCache(object):
+    r"""
+    A process-wide cache of heavyweight resources (e.g. models or dictionaries) shared between component and UDF
+    instances, so that several instances of the same component hold a single copy of a resource and instances after
+    the first initialize without reloading it.
+
+    Resources are keyed by a resource ID plus a hash of the configuration they were loaded with, and are reference
+    counted by the instances that acquired them. The bridge releases every resource held by an instance when that
+    instance is torn down. Resources that are no longer referenced remain cached for reuse until evicted in least
+    recently used order once the total (declared) size of cached resources exceeds the memory budget.
+
+    Example usage within a UDF or component:
+
+    .. code-block:: python
+
+        def init_from_driver(self, json_config):
+            self.model = shared_resources.acquire(self, "my-model", json_config, lambda: load_model(json_config),
+                                                  size_bytes=2 * 1024 ** 3)
+    """
+
+    def __init__(self, memory_budget_bytes: Optional[int] = None):
+        """
+        :param memory_budget_bytes: The total size of cached resources above which unreferenced resources are
+        evicted, or None for no limit
+        """
+        self._memory_budget_bytes = memory_budget_bytes
+        self._resources: OrderedDict[Tuple[str, str], _SharedResource] = OrderedDict()
+        self._held: Dict[int, Tuple[Any, List[Tuple[str, str]]]] = {}
+        # Resources being loaded, with an event set once the load completes (or fails) and the loading thread
+        self._loading: Dict[Tuple[str, str], Tuple[threading.Event, int]] = {}
+        self._cached_bytes = 0
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def config_hash(config: Any) -> str:
+        return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def set_memory_budget(self, memory_budget_bytes: Optional[int]):
+        with self._lock:
+            self._memory_budget_bytes = memory_budget_bytes
+            self._evict()
+
+    def acquire(self, owner: Any, resource_id: str, config: Any, loader: Callable[[], Any], size_bytes: int = 0) -> Any:
+        """ Retrieves a shared resource, loading it if it is not already cached
+
+        :param owner: The component or UDF instance acquiring the resource
+        :param resource_id: An identifier for the type of resource
+        :param config: The (JSON-serializable) configuration the resource is loaded with
+        :param loader: Loads the resource if it is not cached. Concurrent acquisitions of the same resource and
+        configuration wait for a single load, while loads of other resources proceed in parallel
+        :param size_bytes: The approximate memory footprint of the resource, used for budget-based eviction
+        :return: The shared resource
+        """
+        key = (resource_id, self.config_hash(config))
+        while True:
+            with self._lock:
+                resource = self._resources.get(key)
+                if resource is not None:
+                    self._resources.move_to_end(key)
+                    return self._hold(owner, key, resource)
+                loading = self._loading.get(key)
+                if loading is None:
+                    loaded = threading.Event()
+                    self._loading[key] = (loaded, threading.get_ident())
+                    break
+            loaded, loading_thread = loading
+            if loading_thread == threading.get_ident():
+                raise ValueError(f"Shared resource {resource_id} was acquired by its own loader")
+            # Once loaded, the resource is looked up again, as the load may have failed (in which case it is retried
+            # here) or the resource may since have been evicted
+            loaded.wait()
+        # Loads run outside the lock, so that a slow load delays only the acquisitions of the same resource
+        try:
+            resource = _SharedResource(loader(), size_bytes)
+        except BaseException:
+            with self._lock:
+                del self._loading[key]
+            loaded.set()
+            raise
+        with self._lock:
+            del self._loading[key]
+            self._resources[key] = resource
+            self._cached_bytes += size_bytes
+            ret = self._hold(owner, key, resource)
+        loaded.set()
+        return ret
+
+    def _hold(self, owner: Any, key: Tuple[str, str], resource: _SharedResource) -> Any:
+        # Must be called with the lock held
+        resource.ref_count += 1
+        self._held.setdefault(id(owner), (owner, []))[1].append(key)
+        self._evict()
+        return resource.value
+
+    def release_all(self, owner: Any):
+        """ Releases every resource acquired by the given owner """
+        with self._lock:
+            _, keys = self._held.pop(id(owner), (None, []))
+            for key in keys:
+                resource = self._resources.get(key)
+                if resource is not None:
+                    resource.ref_count -= 1
+            self._evict()
+
+    def _evict(self):
+        if self._memory_budget_bytes is None:
+            return
+        for key in list(self._resources.keys()):
+            if self._cached_bytes <= self._memory_budget_bytes:
+                break
+            resource = self._resources[key]
+            if resource.ref_count <= 0:
+                del self._resources[key]
+                self._cached_bytes -= resource.size_bytes
+
+    def __len__(self):
+        return len(self._resources)
+
+    @property
+    def cached_bytes(self) -> int:
+        return self._cached_bytes
+
+
+shared_resources = SharedResourceCache()
+
+
+class UDFInstancePool(object):
+    r"""
+    Retains torn down instances of UDFs declaring themselves :attr:`UserDefinedPartitionMappingFunction.poolable`
+    so that later registrations of the same UDF with the same configuration receive an already initialized
+    instance instead of constructing and initializing a new one.
+
+    Instances are keyed by the registry namespace (i.e. bridge) they were created within, UDF UID, and canonical
+    (key-sorted) JSON configuration. Pooled instances that are not reused within the idle timeout are evicted by a
+    background thread (running only while instances are pooled), at which point their :meth:`on_teardown` is finally
+    called.
+    """
+
+    def __init__(self, idle_timeout_s: float = 300):
+        self.idle_timeout_s = idle_timeout_s
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._idle: Dict[Tuple[str, str, str], List[Tuple[float, UserDefinedPartitionMappingFunction]]] = {}
+        self._instance_keys: Dict[int, Tuple[str, str, str]] = {}
+        self._evictor: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def config_key(conf_json_str: Optional[str]) -> str:
+        if conf_json_str is None:
+            return 'null'
+        return json.dumps(json.loads(conf_json_str), sort_keys=True)
+
+    def checkout(self, udf_uid: str, conf_json_str: Optional[str],
+                 namespace: str = '') -> Optional[UserDefinedPartitionMappingFunction]:
+        """ Retrieves a pooled instance for the given UDF and configuration, if any
+
+        :param namespace: The registry namespace the instance is for, see :attr:`ModuleRegistry.namespace_uid`
+        :return: The warm instance, or None if the caller should initialize a new instance
+        """
+        key = (namespace, str(udf_uid).lower(), self.config_key(conf_json_str))
+        self.evict_idle()
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self.hits += 1
+                _, instance = idle.pop()
+                self._instance_keys[id(instance)] = key
+                return instance
+            self.misses += 1
+            return None
+
+    def track(self, instance: UserDefinedPartitionMappingFunction, udf_uid: str, conf_json_str: Optional[str],
+              namespace: str = ''):
+        """ Records the pool key of a newly initialized instance for when it is later returned to the pool """
+        with self._lock:
+            self._instance_keys[id(instance)] = (namespace, str(udf_uid).lower(), self.config_key(conf_json_str))
+
+    def checkin(self, instance: UserDefinedPartitionMappingFunction) -> bool:
+        """ Returns a torn down instance to the pool
+
+        :return: Whether the instance was pooled. If not, the caller is responsible for tearing it down
+        """
+        with self._lock:
+            key = self._instance_keys.pop(id(instance), None)
+            if key is None:
+                return False
+            self._idle.setdefault(key, []).append((time.monotonic(), instance))
+            if self._evictor is None:
+                self._evictor = threading.Thread(target=self._run_evictor, name="ohnlp-udf-pool-evictor", daemon=True)
+                self._evictor.start()
+        self.evict_idle()
+        return True
+
+    def _run_evictor(self):
+        # Evicts instances as they expire, so that idle instances are freed even once registrations stop
+        while True:
+            with self._lock:
+                if len(self._idle) == 0:
+                    self._evictor = None
+                    return
+                next_expiry = min(last_used for idle in self._idle.values() for last_used, _ in idle)
+            time.sleep(max(next_expiry + self.idle_timeout_s - time.monotonic(), 0.001))
+            self.evict_idle()
+
+    def evict_idle(self):
+        expired: List[UserDefinedPartitionMappingFunction] = []
+        cutoff = time.monotonic() - self.idle_timeout_s
+        with self._lock:
+            for key in list(self._idle.keys()):
+                idle = self._idle[key]
+                expired.extend(instance for last_used, instance in idle if last_used < cutoff)
+                idle[:] = [entry for entry in idle if entry[0] >= cutoff]
+                if len(idle) == 0:
+                    del self._idle[key]
+            self.evictions += len(expired)
+        for instance in expired:
+            try:
+                instance.on_teardown()
+            except Exception as e:
+                # Evictions run within the calls of other instances or in the background, neither of which should fail
+                print(f"Teardown of evicted pooled instance of UDF {instance.toolkit_component_uid} failed: {e}")
+            shared_resources.release_all(instance)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'idle': sum(len(idle) for idle in self._idle.values())
+            }
+
+
+udf_instance_pool = UDFInstancePool()
+
+metrics.bridge_metrics.register_collector(lambda: [
+    ('shared_resources_cached', {}, len(shared_resources)),
+    ('shared_resources_cached_bytes', {}, shared_resources.cached_bytes)
+] + [('udf_instance_pool_' + stat, {}, value) for stat, value in udf_instance_pool.stats().items()])
+
+
 # Top level Backbone Module Declaration
 class ModuleDeclaration(object):
     def __init__(self, registered_components: List[Type[Transform]],
@@ -525,10 +2197,21 @@ class ModuleDeclaration(object):
         self._registered_functions = registered_functions
 
     def __call__(self, module):
+        # Declarations are registered both within the module's own registry namespace and process-wide, the latter
+        # being used by processes hosting a single module (e.g. UDF worker processes)
+        registry = ModuleRegistry()
         for component in self._registered_components:
-            _registered_components[component().name] = component
+            # Registration only reads class-level metadata, components are not constructed until a pipeline uses them
+            if component._component_name is None:
+                raise ValueError(f"Component {component.__name__} must be decorated with @ComponentDescription to be "
+                                 f"registered")
+            registry.registered_components[component._component_name] = component
         for function in self._registered_functions:
-            _registered_udfs[str(function.toolkit_component_uid)] = function
+            registry.registered_udfs[str(function.toolkit_component_uid)] = function
+        _registered_components.update(registry.registered_components)
+        _registered_udfs.update(registry.registered_udfs)
+        module._registry = registry
+        return module
 
 
 class ToolkitModule(ABC):
@@ -536,9 +2219,25 @@ class ToolkitModule(ABC):
     Serves as an entry-point for python<->java communication.
     Modules should extend this class and decorate with the ModuleDeclaration decorator
     within their implementation, then point to said class within backbone_module.json
+
+    A single module may be called concurrently from several threads (e.g. by the Beam worker threads of the JVM each
+    processing a different bundle via py4j callbacks). The concurrency model is that:
+
+    - Every bridge call binds its thread to the module's gateway, and each call creates its own output collector and
+      reference arena binding, so no per-call state is shared between threads
+    - The registry of active instances is read without locking (see :class:`ModuleRegistry`)
+    - Bundle lifecycle calls of different UDF instances run in parallel, while those of a single instance are
+      serialized unless the UDF declares itself thread_safe and does not carry state across the calls of a bundle
+    - Instances that carry state across the calls of a bundle handle one bundle at a time, with the bundles of other
+      threads waiting from their start until the current bundle finishes or the instance is torn down
+    - Process-wide caches (e.g. of schema translations and tuple tags) are safe to populate concurrently, at worst
+      translating the same value more than once
     """
     _calling_component: Any
     _gateway: JavaGateway
+    _worker_pool: Any = None
+    # Replaced by the module's own registry by @ModuleDeclaration, and by a per-bridge namespace at python_init
+    _registry: ModuleRegistry = _default_registry
 
     def python_init(self, gateway: JavaGateway):
         """Implementations should typically not produce their own gateway/this is injected by the module launcher
@@ -546,25 +2245,117 @@ class ToolkitModule(ABC):
         :param gateway: The JavaGateway/py4j bridge that provides access to the underlying JVM
         """
         self._gateway = gateway
+        self._registry = self._registry.new_namespace()
         global _gateway
         _gateway = gateway  # Set global for ease of access in row/schema static creation
 
     def java_init(self, java_component):
         self._calling_component = java_component
 
-    @staticmethod
-    def check_and_get_active_component(component_uid: str) -> Transform:
-        if component_uid.lower() not in _active_components:
+    def use_worker_pool(self, worker_pool):
+        """ Hosts UDF instances registered from here on within the processes of the given worker pool rather than
+        within the bridge process. Typically injected by the module launcher
+
+        :param worker_pool: The :class:`ohnlp.toolkit.backbone.workers.UDFWorkerPool` to use
+        """
+        self._worker_pool = worker_pool
+
+    def check_and_get_active_component(self, component_uid: str) -> Transform:
+        # A single lookup, as the component may be torn down by another thread between a check and a get
+        transform = self._registry.active_components.get(component_uid.lower())
+        if transform is None:
             raise NameError(f"Component {component_uid} called when it is not active/was already unregistered")
-        return _active_components.get(component_uid.lower())
+        return transform
 
-    @staticmethod
-    def check_and_get_active_function(udf_uid: str) -> UserDefinedPartitionMappingFunction:
-        if udf_uid.lower() not in _active_udfs:
+    def check_and_get_active_function(self, udf_uid: str) -> UserDefinedPartitionMappingFunction:
+        function = self._registry.active_udfs.get(udf_uid.lower())
+        if function is None:
             raise NameError(f"Function {udf_uid} called when it is not active/was already unregistered")
-        return _active_udfs.get(udf_uid.lower())
+        return function
+
+    def _get_instance_lock(self, udf_uid: str) -> Optional[threading.Lock]:
+        """ :return: The lock serializing the bundle lifecycle calls of a UDF instance, or None if the instance may be
+        called concurrently """
+        function = self.check_and_get_active_function(udf_uid)
+        if function.thread_safe and not _carries_bundle_state(function):
+            return None
+        lock = self._registry.instance_locks.get(udf_uid.lower())
+        if lock is None:
+            lock = self._registry.instance_locks.setdefault(udf_uid.lower(), threading.Lock())
+        return lock
+
+    def _get_bundle_lock(self, udf_uid: str) -> Optional[threading.Lock]:
+        """ :return: The lock held by the thread handling the current bundle of a UDF instance, or None if the
+        instance's bundles may interleave """
+        function = self.check_and_get_active_function(udf_uid)
+        if not _carries_bundle_state(function):
+            return None
+        lock = self._registry.bundle_locks.get(udf_uid.lower())
+        if lock is None:
+            lock = self._registry.bundle_locks.setdefault(udf_uid.lower(), threading.Lock())
+        return lock
+
+    def _release_bundle_lock(self, udf_uid: str, owner: Optional[int] = None):
+        """ Releases a UDF instance held for a bundle
+
+        :param udf_uid: The UDF instance UID
+        :param owner: The identity of the thread the instance must be held by to be released, or None to release it
+        regardless of the thread holding it
+        """
+        if owner is not None and self._registry.bundle_owners.get(udf_uid.lower()) != owner:
+            return
+        if self._registry.bundle_owners.pop(udf_uid.lower(), None) is not None:
+            self._registry.bundle_locks[udf_uid.lower()].release()
+
+    def _get_reference_arena(self, udf_uid: str) -> Optional[references.ReferenceArena]:
+        function = self.check_and_get_active_function(udf_uid)
+        if not function.bundle_scoped_references:
+            return None
+        arena = self._registry.reference_arenas.get(udf_uid.lower())
+        if arena is None:
+            # noinspection PyProtectedMember
+            arena = self._registry.reference_arenas.setdefault(
+                udf_uid.lower(), references.ReferenceArena(self._gateway._gateway_client, udf_uid.lower()))
+        return arena
+
+    def _wrap_elements(self, udf_uid: str, function: UserDefinedPartitionMappingFunction,
+                       elements: List[Any]) -> List[Any]:
+        """ Wraps the java row elements supplied to a UDF instance. A UDF instance only ever receives the elements of
+        its single input collection, whose rows share one schema, so the elements are only checked to be rows and their
+        schema resolved on the instance's first call, rather than with a type check and schema lookup per row """
+        if len(elements) == 0 or not isinstance(elements[0], JavaObject):
+            return elements
+        index = self._registry.input_schema_indices.get(udf_uid.lower())
+        if index is None:
+            if not is_instance_of(self._gateway, elements[0], "org.apache.beam.sdk.values.Row"):
+                raise ValueError(f"Inconvertible object of type {elements[0].getClass().getName()} supplied to UDF "
+                                 f"call")
+            # noinspection PyProtectedMember
+            index = Row.of_java(elements[0])._get_schema_index()
+            self._registry.input_schema_indices[udf_uid.lower()] = index
+        rows = [Row._wrap_java(self._gateway, element, function.zero_copy_values) for element in elements]
+        for row in rows:
+            row._schema_index = index
+        if function.materialize_rows:
+            Row._materialize_all(rows)
+        return rows
+
+    def _dispatch_elements(self, udf_uid: str, function: UserDefinedPartitionMappingFunction,
+                           out: OutputCollector, values: List[Any]):
+        if not function.adaptive_batching or _buffers_elements(function):
+            # Asynchronous and vectorized UDFs already buffer elements in their own way
+            _process_batch(function, out, values)
+            return
+        scheduler = self._registry.batch_schedulers.get(udf_uid.lower())
+        if scheduler is None:
+            scheduler = self._registry.batch_schedulers.setdefault(
+                udf_uid.lower(), _MicroBatchScheduler(udf_uid.lower(), function.batch_target_latency_s,
+                                                      function.batch_max_elements))
+        scheduler.submit(function, out, values)
 
     # Transform-related methods
+    @metrics.instrumented
+    @_bridge_call
     def register_transform_instance(self, name: str) -> str:
         """ Instantiates a new python transform instance, injects configuration values,
         and returns its UID for later reference.
@@ -575,37 +2366,51 @@ class ToolkitModule(ABC):
         # We cannot directly pass the instance due to issues with memory referencing that is not part of the declared
         # interface becoming inaccessible outside the entry point rendering java interface implementation infeasible
         # TODO see if this can be fixed
-        if name not in _registered_components:
+        if name not in self._registry.registered_components:
             raise NameError(f"Component {name} not found or is not registered via @ModuleDeclaration!")
-        instance = _registered_components[name]()
+        instance = self._registry.registered_components[name]()
         instance.init_java(self._gateway, self._calling_component)
 
         instance_uid = str(uuid.uuid4())
-        _active_components[instance_uid.lower()] = instance
+        self._registry.active_components[instance_uid.lower()] = instance
         return instance_uid
 
+    @metrics.instrumented
+    @_bridge_call
     def call_transform_init(self, component_uid: str, conf_json_str: str):
         transform = self.check_and_get_active_component(component_uid)
         if conf_json_str is not None:
             transform.inject_config(json.loads(conf_json_str))
         transform.init()
 
+    @metrics.instrumented
+    @_bridge_call
     def call_transform_expand(self, component_uid: str, java_pcolltuple):
         transform = self.check_and_get_active_component(component_uid)
-        python_tuple = PartitionedRowCollectionTuple(self._calling_component)
-        python_tuple.init_java(self._gateway, java_pcolltuple)
-        return transform.expand(python_tuple).to_java()
-
+        with metrics.timed_phase('expand_read_inputs'):
+            python_tuple = PartitionedRowCollectionTuple(self._calling_component)
+            python_tuple.init_java(self._gateway, java_pcolltuple)
+        with metrics.timed_phase('expand_transform'):
+            python_output = transform.expand(python_tuple)
+        with metrics.timed_phase('expand_build_outputs'):
+            return python_output.to_java()
+
+    @metrics.instrumented
+    @_bridge_call
     def call_transform_get_inputs(self, component_uid: str):
         transform = self.check_and_get_active_component(component_uid)
         # noinspection PyProtectedMember
-        return ListConverter().convert(transform.get_input_tags(), self._gateway._gateway_client)
+        return pipelining.to_java_list(self._gateway._gateway_client, transform.get_input_tags())
 
+    @metrics.instrumented
+    @_bridge_call
     def call_transform_get_outputs(self, component_uid: str):
         transform = self.check_and_get_active_component(component_uid)
         # noinspection PyProtectedMember
-        return ListConverter().convert(transform.get_output_tags(), self._gateway._gateway_client)
+        return pipelining.to_java_list(self._gateway._gateway_client, transform.get_output_tags())
 
+    @metrics.instrumented
+    @_bridge_call
     def call_transform_get_required_columns(self, component_uid: str, tag: str):
         transform = self.check_and_get_active_component(component_uid)
         required_columns = transform.get_required_columns(tag)
@@ -614,65 +2419,201 @@ class ToolkitModule(ABC):
         else:
             return required_columns.to_java()
 
+    @metrics.instrumented
+    @_bridge_call
     def call_transform_get_output_schema(self, component_uid: str, java_input_schemas):
         transform = self.check_and_get_active_component(component_uid)
-        python_input_schemas: Dict[str, Schema] = {}
-        for key in java_input_schemas:
-            python_input_schemas[key] = Schema()
-            python_input_schemas[key].init_java(self._gateway, java_input_schemas[key])
-        python_output_schemas: Dict[str, Schema] = transform.calculate_output_schema(python_input_schemas)
-        java_output_schemas = self._gateway.jvm.java.util.HashMap()
-        for key in python_output_schemas:
-            java_output_schemas.put(key, python_output_schemas[key].to_java())
-        return java_output_schemas
-
+        # noinspection PyProtectedMember
+        gateway_client = self._gateway._gateway_client
+        with metrics.timed_phase('output_schema_read_inputs'):
+            python_input_schemas: Dict[str, Schema] = {}
+            for key, java_schema in pipelining.from_java_map(gateway_client, java_input_schemas).items():
+                python_input_schemas[key] = Schema()
+                python_input_schemas[key].init_java(self._gateway, java_schema)
+        with metrics.timed_phase('output_schema_calculate'):
+            python_output_schemas: Dict[str, Schema] = transform.calculate_output_schema(python_input_schemas)
+        with metrics.timed_phase('output_schema_build_outputs'):
+            return pipelining.to_java_map(gateway_client, {key: python_output_schemas[key].to_java()
+                                                           for key in python_output_schemas})
+
+    @metrics.instrumented
+    @_bridge_call
     def call_transform_teardown(self, component_uid: str):
         transform = self.check_and_get_active_component(component_uid)
         transform.teardown()
-        _active_components.pop(component_uid)
+        shared_resources.release_all(transform)
+        self._registry.active_components.pop(component_uid.lower(), None)
 
     # User-Defined Functions
+    def create_output_collector(self, function: UserDefinedPartitionMappingFunction,
+                                processcontext) -> OutputCollector:
+        """ Wraps a java process context in a buffered output collector configured per the UDF's output buffer
+        thresholds. The caller is responsible for flushing the collector before returning to the JVM """
+        out = BufferedOutputCollector(function.output_buffer_elements, function.output_buffer_bytes)
+        out.init_java(self._gateway, references.track(processcontext))
+        return out
+
+    @metrics.instrumented
+    @_bridge_call
     def register_udf(self, udf_uid: str) -> str:
-        if udf_uid not in _registered_udfs:
+        if udf_uid not in self._registry.registered_udfs:
             raise NameError(f"UDF {udf_uid} not found or is not registered via @ModuleDeclaration!")
-        instance = _registered_udfs[udf_uid]()
         # TODO do we need to init from java?
         instance_uid = str(uuid.uuid4())
-        _active_udfs[instance_uid.lower()] = instance
+        if self._worker_pool is not None:
+            instance = self._worker_pool.create_udf(udf_uid, instance_uid)
+        else:
+            instance = self._registry.registered_udfs[udf_uid]()
+        self._registry.active_udfs[instance_uid.lower()] = instance
         return instance_uid
 
+    @metrics.instrumented
+    @_bridge_call
+    @_instance_serialized
     def call_udf_on_init(self, udf_uid: str, conf_json_str: str):
         function = self.check_and_get_active_function(udf_uid)
-        if conf_json_str is not None:
-            function.init_from_driver(json.loads(conf_json_str))
-        else:
-            function.init_from_driver(None)
-
+        if function.poolable:
+            class_uid = str(function.toolkit_component_uid)
+            warm_instance = udf_instance_pool.checkout(class_uid, conf_json_str, self._registry.namespace_uid)
+            if warm_instance is not None:
+                # The freshly registered instance was never initialized, so is simply replaced. Instances hosted by a
+                # worker must still be dropped by the worker
+                self._registry.active_udfs[udf_uid.lower()] = warm_instance
+                if self._worker_pool is not None:
+                    self._worker_pool.discard_udf(function)
+                return
+            udf_instance_pool.track(function, class_uid, conf_json_str, self._registry.namespace_uid)
+        config = json.loads(conf_json_str) if conf_json_str is not None else None
+        function.init_from_driver(config)
+        if function.deterministic:
+            function._result_cache_scope = result_cache.scope_of(str(function.toolkit_component_uid),
+                                                                 function.cache_version,
+                                                                 SharedResourceCache.config_hash(config))
+
+    @metrics.instrumented
+    @profiling.profiled
+    @_bridge_call
+    @_bundle_exclusive
+    @_instance_serialized
     def call_udf_on_bundle_start(self, udf_uid: str):
         function = self.check_and_get_active_function(udf_uid)
         function.on_bundle_start()
 
+    @metrics.instrumented
+    @profiling.profiled
+    @_bridge_call
+    @_instance_serialized
+    @_bundle_references
     def call_udf_process(self, udf_uid: str, element, processcontext):
         function = self.check_and_get_active_function(udf_uid)
-        output_context = OutputCollector()
-        output_context.init_java(self._gateway, processcontext)
-        element_to_process = element
-        if isinstance(element, JavaObject):
-            if is_instance_of(self._gateway, element, "org.apache.beam.sdk.values.Row"):
-                element_to_process = Row.of_java(element)
-            else:
-                raise ValueError(f"Inconvertible object of type {element.getClass().getName()} supplied to UDF call")
-        function.process(output_context, element_to_process)  # TODO ensure convertible
-
+        output_context = self.create_output_collector(function, processcontext)
+        elements_to_process = self._wrap_elements(udf_uid, function, [references.track(element)])
+        self._dispatch_elements(udf_uid, function, output_context, elements_to_process)
+        output_context.flush()
+
+    @metrics.instrumented
+    @profiling.profiled
+    @_bridge_call
+    @_instance_serialized
+    @_bundle_references
+    def call_udf_process_batch(self, udf_uid: str, elements, processcontext):
+        """ Processes a chunk of bundle elements within a single bridge call, sharing one output collector
+        across the chunk rather than paying the per-element call overhead of :meth:`call_udf_process`
+
+        :param udf_uid: The UDF instance UID as returned by :meth:`register_udf`
+        :param elements: A java list of the elements to process
+        :param processcontext: The java process context to output to
+        """
+        function = self.check_and_get_active_function(udf_uid)
+        output_context = self.create_output_collector(function, processcontext)
+        # The chunk is read in bulk rather than through py4j's list iterator, which costs a round trip per element
+        # noinspection PyProtectedMember
+        elements_to_process = self._wrap_elements(udf_uid, function, [
+            references.track(element)
+            for element in pipelining.from_java_list(self._gateway._gateway_client, references.track(elements))
+        ])
+        self._dispatch_elements(udf_uid, function, output_context, elements_to_process)
+        output_context.flush()
+
+    @metrics.instrumented
+    @_bridge_call
+    def call_udf_get_data_plane(self, udf_uid: str) -> str:
+        """ :return: The data plane the JVM should use to transport bundle elements for this UDF instance """
+        function = self.check_and_get_active_function(udf_uid)
+        if function.data_plane == DataPlane.ARROW:
+            _reject_unsupported_arrow_udf(function)
+            if function.deterministic or function.adaptive_batching:
+                print(f"UDF {function.toolkit_component_uid} uses the ARROW data plane, whose chunks are passed to "
+                      f"process_arrow_batch as they arrive: its results are not cached and its batches are not "
+                      f"resized adaptively")
+        return function.data_plane.value
+
+    @metrics.instrumented
+    @_bridge_call
+    def call_arrow_schema_of(self, java_schema) -> bytes:
+        """ Converts a Beam schema to the Arrow IPC schema python expects for that schema on the Arrow data plane,
+        so that both sides agree on the type mapping
+
+        :param java_schema: The java Beam Schema of the elements to be transported
+        :return: The Arrow IPC serialized schema
+        """
+        return arrow.serialize_schema(arrow.to_arrow_schema(java_schema))
+
+    @metrics.instrumented
+    @profiling.profiled
+    @_bridge_call
+    @_instance_serialized
+    @_bundle_references
+    def call_udf_process_arrow(self, udf_uid: str, arrow_payload: bytes, processcontext):
+        """ Processes a chunk of bundle elements transported as an Arrow IPC stream
+
+        :param udf_uid: The UDF instance UID as returned by :meth:`register_udf`
+        :param arrow_payload: The Arrow IPC stream containing the chunk's record batches
+        :param processcontext: The java process context to output to
+        """
+        function = self.check_and_get_active_function(udf_uid)
+        _reject_unsupported_arrow_udf(function)
+        output_context = self.create_output_collector(function, processcontext)
+        for batch in arrow.read_row_batches(arrow_payload):
+            function.process_arrow_batch(output_context, batch)
+        output_context.flush()
+
+    @metrics.instrumented
+    @profiling.profiled
+    @_bridge_call
+    @_bundle_exclusive
+    @_instance_serialized
+    @_bundle_references
     def call_udf_on_bundle_finish(self, udf_uid: str, processcontext):
         function = self.check_and_get_active_function(udf_uid)
-        out = OutputCollector()
-        out.init_java(self._gateway, processcontext)
-        function.on_bundle_finish(out)
-
+        out = self.create_output_collector(function, processcontext)
+        scheduler = self._registry.batch_schedulers.get(udf_uid.lower())
+        if scheduler is not None:
+            scheduler.flush(function, out)
+        _finish_bundle(function, out)
+        out.flush()
+
+    @metrics.instrumented
+    @profiling.profiled
+    @_bridge_call
+    @_instance_serialized
     def call_udf_on_teardown(self, udf_uid: str):
         function = self.check_and_get_active_function(udf_uid)
+        self._registry.active_udfs.pop(udf_uid.lower())
+        arena = self._registry.reference_arenas.pop(udf_uid.lower(), None)
+        if arena is not None:
+            # Releases the references of a bundle that never finished, e.g. due to a failure
+            arena.release()
+        self._registry.batch_schedulers.pop(udf_uid.lower(), None)
+        self._registry.instance_locks.pop(udf_uid.lower(), None)
+        # Lets the threads waiting to start a bundle proceed, to find the instance no longer active
+        self._release_bundle_lock(udf_uid)
+        self._registry.bundle_locks.pop(udf_uid.lower(), None)
+        self._registry.input_schema_indices.pop(udf_uid.lower(), None)
+        if function.poolable and udf_instance_pool.checkin(function):
+            return
         function.on_teardown()
+        shared_resources.release_all(function)
 
     class Java:
         implements = ["org.ohnlp.backbone.api.components.xlang.python.PythonEntryPoint"]
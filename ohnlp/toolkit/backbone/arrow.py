@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import pyarrow
+except ImportError:  # pyarrow is an optional dependency
+    pyarrow = None
+
+
+def _require_pyarrow():
+    if pyarrow is None:
+        raise ImportError("The Arrow data plane requires pyarrow to be installed, "
+                          "install via pip install ohnlptk-xlang-python[arrow]")
+    return pyarrow
+
+
+# Beam Schema <-> Arrow Schema conversion
+def _primitive_arrow_types() -> Dict[str, Any]:
+    pa = _require_pyarrow()
+    return {
+        'BYTE': pa.int8(),
+        'INT16': pa.int16(),
+        'INT32': pa.int32(),
+        'INT64': pa.int64(),
+        'FLOAT': pa.float32(),
+        'DOUBLE': pa.float64(),
+        'BOOLEAN': pa.bool_(),
+        'STRING': pa.string(),
+        'BYTES': pa.binary(),
+        'DATETIME': pa.timestamp('ms', tz='UTC'),
+        # Beam decimals carry a per-value scale, so they are transported as their string representation
+        'DECIMAL': pa.string(),
+    }
+
+
+def to_arrow_type(java_field_type):
+    """Converts a java Beam Schema.FieldType to its equivalent pyarrow DataType
+
+    :param java_field_type: The java FieldType to convert
+    :return: The equivalent pyarrow DataType
+    """
+    pa = _require_pyarrow()
+    type_name = java_field_type.getTypeName().name()
+    if type_name == 'LOGICAL_TYPE':
+        return to_arrow_type(java_field_type.getLogicalType().getBaseType())
+    if type_name == 'ROW':
+        return pa.struct(_to_arrow_fields(java_field_type.getRowSchema()))
+    if type_name in ('ARRAY', 'ITERABLE'):
+        return pa.list_(to_arrow_type(java_field_type.getCollectionElementType()))
+    if type_name == 'MAP':
+        return pa.map_(to_arrow_type(java_field_type.getMapKeyType()),
+                       to_arrow_type(java_field_type.getMapValueType()))
+    primitives = _primitive_arrow_types()
+    if type_name not in primitives:
+        raise ValueError(f"Beam type {type_name} has no arrow equivalent")
+    return primitives[type_name]
+
+
+def _to_arrow_fields(java_schema) -> List:
+    pa = _require_pyarrow()
+    ret = []
+    for java_field in java_schema.getFields():
+        field_type = java_field.getType()
+        ret.append(pa.field(java_field.getName(), to_arrow_type(field_type), nullable=field_type.getNullable()))
+    return ret
+
+
+def to_arrow_schema(java_schema):
+    """Converts a java Beam Schema (as wrapped by Schema.of_java) to a pyarrow Schema
+
+    :param java_schema: The java Beam Schema to convert
+    :return: The equivalent pyarrow Schema
+    """
+    return _require_pyarrow().schema(_to_arrow_fields(java_schema))
+
+
+def serialize_schema(arrow_schema) -> bytes:
+    """Serializes a pyarrow Schema to the Arrow IPC format for consumption by the JVM"""
+    return arrow_schema.serialize().to_pybytes()
+
+
+# Columnar Views
+class ArrowRowView(object):
+    """A read-only view of a single row within a :class:`RowBatch`, exposing the same read accessors as
+    :class:`ohnlp.toolkit.backbone.api.Row` without any JVM traffic. Views have no java equivalent: they can neither
+    be modified nor output, and raise a ValueError when either is attempted"""
+
+    def __init__(self, batch: RowBatch, row_idx: int):
+        self._batch = batch
+        self._row_idx = row_idx
+
+    def get_field_index(self, field_name: str) -> Optional[int]:
+        return self._batch.get_field_index(field_name)
+
+    def get_schema(self):
+        return self._batch.get_schema()
+
+    def get_value(self, field_name: str) -> Optional[Any]:
+        return self._batch.column(field_name)[self._row_idx].as_py()
+
+    def set_value(self, field_name: str, value: Any):
+        raise ValueError(f"Cannot set {field_name}: rows received over the Arrow data plane are read-only views, "
+                         f"build output rows via Row.of instead")
+
+    def copy(self):
+        raise ValueError("Rows received over the Arrow data plane are read-only views and cannot be copied, "
+                         "build output rows via Row.of instead")
+
+
+class RowBatch(object):
+    """A columnar view of a bundle chunk of Beam Rows received over the Arrow data plane.
+    Column access is zero-copy against the buffer received from the JVM"""
+
+    def __init__(self, record_batch):
+        self._record_batch = record_batch
+        self._field_indices: Dict[str, int] = {name: idx for idx, name in enumerate(record_batch.schema.names)}
+
+    @property
+    def num_rows(self) -> int:
+        return self._record_batch.num_rows
+
+    def __len__(self):
+        return self._record_batch.num_rows
+
+    def get_field_index(self, field_name: str) -> Optional[int]:
+        return self._field_indices.get(field_name)
+
+    def get_schema(self):
+        return self._record_batch.schema
+
+    def column(self, field_name: str):
+        """:return: The pyarrow Array backing the named column"""
+        return self._record_batch.column(self._field_indices[field_name])
+
+    def to_numpy(self, field_name: str):
+        """:return: The named column as a numpy array, zero-copy where the column type and nulls allow it"""
+        return self.column(field_name).to_numpy(zero_copy_only=False)
+
+    def rows(self) -> Iterator[ArrowRowView]:
+        for row_idx in range(self._record_batch.num_rows):
+            yield ArrowRowView(self, row_idx)
+
+    def to_pylist(self) -> List[Dict[str, Any]]:
+        return self._record_batch.to_pylist()
+
+    def to_arrow(self):
+        return self._record_batch
+
+
+def read_row_batches(payload: bytes) -> List[RowBatch]:
+    """Reads an Arrow IPC stream sent by the JVM into row batches without copying the underlying buffers
+
+    :param payload: The Arrow IPC stream payload
+    :return: The record batches contained within the stream
+    """
+    pa = _require_pyarrow()
+    reader = pa.ipc.open_stream(pa.py_buffer(payload))
+    return [RowBatch(record_batch) for record_batch in reader]
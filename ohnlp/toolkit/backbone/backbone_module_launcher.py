@@ -1,13 +1,27 @@
+import time
+
+# Measures the import of the bridge itself (py4j and the backbone API), the start of import-to-ready time
+_import_start = time.perf_counter()
+
+import argparse
 import importlib
 import json
+import os
 import secrets
-import string
 import socket
+import string
+import sys
+import traceback
 from types import ModuleType
+from typing import Any, Dict, List, Tuple
 
 from py4j.clientserver import ClientServer, JavaParameters, PythonParameters
 
-from ohnlp.toolkit.backbone.api import BackboneComponentDefinition
+from ohnlp.toolkit.backbone import metrics, profiling, result_cache, shared_memory
+from ohnlp.toolkit.backbone.api import ToolkitModule
+from ohnlp.toolkit.backbone.workers import UDFWorkerPool
+
+_import_end = time.perf_counter()
 
 
 def find_free_port():
@@ -16,18 +30,79 @@ def find_free_port():
     return sock.getsockname()[1]
 
 
-def launch_bridge(entrypoint: str, class_name: str, init_type: str, bridge_id: str):
-    first_init: bool = init_type == 'component'
+class StartupTimer(object):
+    """ Records the duration of each bridge startup phase, for inclusion in the bridge metadata file """
+
+    def __init__(self, start: float = None):
+        self._start = start if start is not None else time.perf_counter()
+        self._last = self._start
+        self.timings: Dict[str, float] = {}
+
+    def phase(self, name: str):
+        now = time.perf_counter()
+        self.timings[name + '_s'] = now - self._last
+        self._last = now
+
+    def finish(self) -> Dict[str, float]:
+        self.timings['total_s'] = time.perf_counter() - self._start
+        return self.timings
+
+
+# Options of the bridges of this process that apply process-wide, by option, along with the ID of the bridge that first
+# set them. Only a bridge host serves several bridges from one process, whose later bridges must agree with them
+_process_options: Dict[str, Tuple[str, Any]] = {}
+
+
+def _claim_process_options(bridge_id: str, directory: str, metrics_format: str = None, profile_udf: str = None,
+                           shm_threshold_bytes: int = None, shm_dir: str = None, result_cache_path: str = None,
+                           result_cache_max_bytes: int = None):
+    """ Records the process-wide options of a bridge, rejecting options that conflict with those of an earlier bridge
+    of this process. Metrics and profiles cannot be told apart by bridge, so at most one bridge may enable each, while
+    the shared memory channel and result cache may be shared by bridges configuring them identically """
+    exclusive = {'metrics': metrics_format is not None, 'profiling': profile_udf is not None}
+    shared = {
+        'shared_memory': (shm_threshold_bytes, shm_dir) if shm_threshold_bytes is not None else None,
+        'result_cache': (os.path.abspath(os.path.join(directory, result_cache_path)), result_cache_max_bytes)
+        if result_cache_path is not None else None
+    }
+    for name, enabled in exclusive.items():
+        if enabled and name in _process_options:
+            raise ValueError(f"Bridge {bridge_id} cannot enable {name}, as it is already enabled by bridge "
+                             f"{_process_options[name][0]} within this process")
+    for name, value in shared.items():
+        if name in _process_options and _process_options[name][1] != value:
+            raise ValueError(f"Bridge {bridge_id} requests {name} options {value}, which conflict with the options "
+                             f"{_process_options[name][1]} of bridge {_process_options[name][0]} within this process")
+    for name, enabled in exclusive.items():
+        if enabled:
+            _process_options[name] = (bridge_id, True)
+    for name, value in shared.items():
+        _process_options.setdefault(name, (bridge_id, value))
+
+
+def _release_process_options(bridge_id: str):
+    """ Releases the process-wide options claimed by a bridge that failed to start, so that they do not conflict with
+    those of later bridges of this process """
+    for name in [name for name, (claimant, _) in _process_options.items() if claimant == bridge_id]:
+        del _process_options[name]
+
 
+# Startup phases
+def load_entry_point(entrypoint: str, class_name: str, init_type: str, preload: List[str] = None,
+                     timer: StartupTimer = None):
+    """Imports the backbone module (and any additional modules to preload) and obtains its entry point
+
+    :return: The python entry point to serve to the JVM
+    """
+    for module_name in preload or []:
+        importlib.import_module(module_name)
     # Import the backbone module to be used
     module: ModuleType = importlib.import_module(entrypoint)
+    if timer is not None:
+        timer.phase('import')
     cls = getattr(module, class_name)
     entry_class = cls()
 
-    # Generate an authentication token for this session
-    auth_token = ''.join(secrets.choice(string.ascii_uppercase + string.digits)
-                         for i in range(16))
-
     # Get appropriate entry point
     if init_type == 'direct':
         entry_point = entry_class
@@ -35,31 +110,356 @@ def launch_bridge(entrypoint: str, class_name: str, init_type: str, bridge_id: s
         entry_point = entry_class.get_component_def()
     else:
         entry_point = entry_class.get_do_fn()
+    if timer is not None:
+        timer.phase('instantiate')
+    return entry_point
+
+
+def start_gateway(entry_point, entrypoint: str, bridge_id: str, num_workers: int = 0,
+                  metrics_format: str = None, metrics_interval_s: float = 10,
+                  profile_udf: str = None, profile_every_n_bundles: int = 100, profile_dir: str = None,
+                  shm_threshold_bytes: int = None, shm_dir: str = None,
+                  result_cache_path: str = None, result_cache_max_bytes: int = 1024 * 1024 * 1024,
+                  directory: str = '.', timer: StartupTimer = None) -> Tuple[ClientServer, str]:
+    """Starts the bridge's gateway serving the given entry point. See :func:`launch_bridge` for parameters
+
+    :param directory: The directory metrics and profiles are written to
+
+    :return: The gateway and the authentication token the JVM must use to connect to it
+    """
+    _claim_process_options(bridge_id, directory, metrics_format, profile_udf, shm_threshold_bytes, shm_dir,
+                           result_cache_path, result_cache_max_bytes)
+
+    try:
+        # Start worker processes before any gateway threads exist
+        if num_workers > 0 and isinstance(entry_point, ToolkitModule):
+            entry_point.use_worker_pool(UDFWorkerPool(entrypoint, num_workers))
+            if timer is not None:
+                timer.phase('worker_pool')
+
+        # Generate an authentication token for this session
+        auth_token = ''.join(secrets.choice(string.ascii_uppercase + string.digits)
+                             for i in range(16))
 
-    # Find available ports
-    java_port = find_free_port()
-    python_port = find_free_port()
+        # Find available ports
+        java_port = find_free_port()
+        python_port = find_free_port()
 
-    # Bootup python endpoint
-    gateway = ClientServer(
-        java_parameters=JavaParameters(port=java_port, auth_token=auth_token, auto_convert=True, auto_field=True),
-        python_parameters=PythonParameters(port=python_port, auth_token=auth_token),
-        python_server_entry_point=entry_point,
-    )
+        # Bootup python endpoint
+        gateway = ClientServer(
+            java_parameters=JavaParameters(port=java_port, auth_token=auth_token, auto_convert=True, auto_field=True),
+            python_parameters=PythonParameters(port=python_port, auth_token=auth_token),
+            python_server_entry_point=entry_point,
+        )
 
-    entry_point.python_init(gateway)
+        entry_point.python_init(gateway)
+        if timer is not None:
+            timer.phase('gateway')
 
+        if metrics_format is not None:
+            extension = '.prom' if metrics_format == 'prometheus' else '.json'
+            metrics.enable(gateway, os.path.join(directory, 'python_bridge_metrics_' + bridge_id + extension),
+                           metrics_format, metrics_interval_s)
+
+        if profile_udf is not None:
+            profiling.enable(gateway, profile_udf, profile_every_n_bundles,
+                             os.path.join(directory, profile_dir if profile_dir is not None
+                                          else 'python_bridge_profiles_' + bridge_id))
+
+        if shm_threshold_bytes is not None:
+            shared_memory.enable(shm_threshold_bytes, shm_dir)
+
+        if result_cache_path is not None:
+            result_cache.enable(os.path.join(directory, result_cache_path), result_cache_max_bytes)
+        if timer is not None:
+            timer.phase('instrumentation')
+    except BaseException:
+        _release_process_options(bridge_id)
+        raise
+    return gateway, auth_token
+
+
+def write_bridge_meta(bridge_id: str, gateway: ClientServer, auth_token: str, startup: Dict[str, Any],
+                      directory: str = '.'):
+    """Writes the bridge metadata file read by the JVM, followed by the monitor file signalling that it is complete """
     java_port: int = gateway.java_parameters.port
     python_port: int = gateway.python_parameters.port
 
     # Write vars out to JSON
-    with open('python_bridge_meta_' + bridge_id + '.json', 'w') as f:
+    with open(os.path.join(directory, 'python_bridge_meta_' + bridge_id + '.json'), 'w') as f:
         json.dump({
             'token': auth_token,
             'java_port': java_port,
-            'python_port': python_port
+            'python_port': python_port,
+            'startup': startup,
+            # Advertises whether outputs may contain shared memory channel handles the JVM must resolve
+            'shared_memory': shared_memory.describe()
         }, f)
 
     # Create monitor file used by java process to indicate gateway init complete
-    with open('python_bridge_meta_' + bridge_id + '.done', 'w') as f:
+    with open(os.path.join(directory, 'python_bridge_meta_' + bridge_id + '.done'), 'w') as f:
         f.writelines('done')
+
+
+def launch_bridge(entrypoint: str, class_name: str, init_type: str, bridge_id: str, num_workers: int = 0,
+                  metrics_format: str = None, metrics_interval_s: float = 10,
+                  profile_udf: str = None, profile_every_n_bundles: int = 100, profile_dir: str = None,
+                  shm_threshold_bytes: int = None, shm_dir: str = None,
+                  result_cache_path: str = None, result_cache_max_bytes: int = 1024 * 1024 * 1024,
+                  zygote_socket: str = None):
+    """Launches a python bridge for the given backbone module
+
+    :param entrypoint: The python module containing the backbone module declaration
+    :param class_name: The backbone module class within the entrypoint module
+    :param init_type: How the entry point is obtained from the module class (direct, component, or dofn)
+    :param bridge_id: The bridge ID used to name the bridge metadata files
+    :param num_workers: If greater than 0, UDF instances are hosted within this many worker processes with the bridge
+    process dispatching calls to them, rather than all UDFs sharing the bridge process's interpreter
+    :param metrics_format: If set (to prometheus or json), bridge calls are instrumented and metrics are periodically
+    written to python_bridge_metrics_<bridge_id>.prom/.json alongside the bridge metadata file
+    :param metrics_interval_s: The interval between metrics exports
+    :param profile_udf: If set, every Nth bundle of each instance of the UDF with this UID is profiled
+    :param profile_every_n_bundles: The interval between profiled bundles
+    :param profile_dir: The directory to write bundle profiles to, defaults to python_bridge_profiles_<bridge_id>
+    :param shm_threshold_bytes: If set, STRING and BYTES output values of at least this size are passed to the JVM
+    through the shared memory channel (see :mod:`ohnlp.toolkit.backbone.shared_memory`) rather than through py4j
+    :param shm_dir: The directory shared memory segments are created within, defaults to /dev/shm
+    :param result_cache_path: If set, the outputs of UDFs declared deterministic are cached by input within this
+    SQLite database file (see :mod:`ohnlp.toolkit.backbone.result_cache`), which may be shared across bridges
+    :param result_cache_max_bytes: The size bound of the result cache, beyond which the least recently used results
+    are evicted
+    :param zygote_socket: If set and a zygote (see :func:`run_zygote`) for this backbone module or a bridge host (see
+    :func:`run_host`) is listening on this unix socket, the bridge is started by it instead of within this process
+    """
+    options = {
+        'num_workers': num_workers,
+        'metrics_format': metrics_format,
+        'metrics_interval_s': metrics_interval_s,
+        'profile_udf': profile_udf,
+        'profile_every_n_bundles': profile_every_n_bundles,
+        'profile_dir': profile_dir,
+        'shm_threshold_bytes': shm_threshold_bytes,
+        'shm_dir': shm_dir,
+        'result_cache_path': result_cache_path,
+        'result_cache_max_bytes': result_cache_max_bytes
+    }
+    if zygote_socket is not None:
+        try:
+            launch_bridge_from_zygote(zygote_socket, bridge_id, entrypoint, class_name, init_type, **options)
+            return
+        except OSError as e:
+            print(f"Bridge server at {zygote_socket} is not available ({e}), starting bridge {bridge_id} cold")
+        except ValueError as e:
+            # The server replied with an error, e.g. a zygote serving another module, or conflicting host options
+            print(f"{e}, starting bridge {bridge_id} cold")
+
+    timer = StartupTimer()
+    entry_point = load_entry_point(entrypoint, class_name, init_type, timer=timer)
+    gateway, auth_token = start_gateway(entry_point, entrypoint, bridge_id, timer=timer, **options)
+    timings = timer.finish()
+    timings['bridge_import_s'] = _import_end - _import_start
+    timings['import_to_ready_s'] = time.perf_counter() - _import_start
+    write_bridge_meta(bridge_id, gateway, auth_token, {'mode': 'cold', 'timings': timings})
+
+
+# Zygote mode
+def run_zygote(entrypoint: str, class_name: str, init_type: str, socket_path: str, preload: List[str] = None):
+    """Runs a zygote: a long-lived process that imports the backbone module (and any other heavy dependencies) and
+    instantiates its entry point once, then forks a ready bridge process per request received on a unix socket, so
+    that bridges skip the import and instantiation phases of startup.
+
+    Bridge processes only open their gateway and write their bridge metadata files, then reply to the request
+    themselves, with an error if they failed to start so that the requester can start its bridge cold instead.
+    Requests are single JSON lines as sent by :func:`launch_bridge_from_zygote`. The zygote itself must not start any
+    threads (including gateways) as they would not survive the fork.
+
+    :param entrypoint: The python module containing the backbone module declaration
+    :param class_name: The backbone module class within the entrypoint module
+    :param init_type: How the entry point is obtained from the module class (direct, component, or dofn)
+    :param socket_path: The unix socket to listen on
+    :param preload: Additional modules (e.g. the module's NLP dependencies) to import ahead of forking, if these are
+    not already imported by the entrypoint module itself
+    """
+    timer = StartupTimer()
+    entry_point = load_entry_point(entrypoint, class_name, init_type, preload, timer)
+    zygote_timings = timer.finish()
+
+    listener = _listen(socket_path)
+    # Periodically wake up to reap exited bridge processes
+    listener.settimeout(1)
+    print(f"Zygote for {entrypoint}.{class_name} ready on {socket_path} after {zygote_timings['total_s']:.3f}s")
+    while True:
+        _reap_bridges()
+        try:
+            conn, _ = listener.accept()
+        except socket.timeout:
+            continue
+        received = time.perf_counter()
+        with conn:
+            try:
+                request = _receive_request(conn)
+                if request['module'] != [entrypoint, class_name, init_type]:
+                    raise ValueError(f"Zygote serves {entrypoint}.{class_name} ({init_type}), "
+                                     f"got a request for {'.'.join(request['module'][:2])} ({request['module'][2]})")
+            except (OSError, ValueError, KeyError) as e:
+                _reply(conn, {'error': str(e)})
+                continue
+            if os.fork() == 0:
+                listener.close()
+                _run_forked_bridge(conn, entry_point, entrypoint, request, zygote_timings, received)
+            # The bridge process replies over its own copy of the connection once started (or failed)
+
+
+def _listen(socket_path: str) -> socket.socket:
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen()
+    return listener
+
+
+def _receive_request(conn: socket.socket) -> Dict[str, Any]:
+    conn.settimeout(10)
+    request = json.loads(conn.makefile('r').readline())
+    for key in ('module', 'bridge_id', 'options'):
+        if key not in request:
+            raise ValueError(f"Bridge request is missing {key}")
+    return request
+
+
+def _reap_bridges():
+    try:
+        while os.waitpid(-1, os.WNOHANG)[0] != 0:
+            pass
+    except ChildProcessError:
+        pass
+
+
+def _reply(conn: socket.socket, response: Dict[str, Any]):
+    try:
+        conn.sendall((json.dumps(response) + '\n').encode('utf-8'))
+    except OSError:
+        pass
+
+
+def _run_forked_bridge(conn: socket.socket, entry_point, entrypoint: str, request: Dict[str, Any],
+                       zygote_timings: Dict[str, float], received: float):
+    # Never returns to the zygote's accept loop: on success the process lives on for as long as its (non-daemon)
+    # gateway threads do
+    try:
+        if request.get('working_dir') is not None:
+            os.chdir(request['working_dir'])
+        timer = StartupTimer(received)
+        timer.phase('fork')
+        bridge_id = request['bridge_id']
+        gateway, auth_token = start_gateway(entry_point, entrypoint, bridge_id, timer=timer, **request['options'])
+        write_bridge_meta(bridge_id, gateway, auth_token, {
+            'mode': 'zygote',
+            'timings': timer.finish(),
+            'zygote_timings': zygote_timings
+        })
+    except BaseException as e:
+        traceback.print_exc()
+        _reply(conn, {'error': f"Bridge process {os.getpid()} failed to start: {e}"})
+        os._exit(1)
+    _reply(conn, {'pid': os.getpid()})
+    conn.close()
+    sys.exit(0)
+
+
+# Multi-tenant host mode
+def run_host(socket_path: str, preload: List[str] = None):
+    """Runs a bridge host: a long-lived process serving the bridges of any number of backbone modules within a single
+    interpreter. Each bridge has its own gateway (py4j ClientServer) and registry namespace of active component/UDF
+    instances, but libraries imported by, and resources loaded via the shared resource cache
+    (:data:`ohnlp.toolkit.backbone.api.shared_resources`) by, any bridge are loaded once and shared by all bridges.
+
+    Metrics, profiling, the shared memory channel, and the result cache are process-wide, so requests for bridges
+    whose options for these conflict with those of an earlier bridge of the host are rejected (see
+    :func:`_claim_process_options`), in which case the requesting JVM starts its bridge cold.
+
+    Bridges are requested as from a zygote, via launch_bridge(zygote_socket=...) or :func:`launch_bridge_from_zygote`.
+
+    :param socket_path: The unix socket to listen on
+    :param preload: Modules (e.g. heavy NLP dependencies) to import before accepting requests
+    """
+    for module_name in preload or []:
+        importlib.import_module(module_name)
+    listener = _listen(socket_path)
+    print(f"Bridge host ready on {socket_path}")
+    while True:
+        conn, _ = listener.accept()
+        received = time.perf_counter()
+        with conn:
+            try:
+                request = _receive_request(conn)
+                timer = StartupTimer(received)
+                entrypoint, class_name, init_type = request['module']
+                bridge_id = request['bridge_id']
+                directory = request.get('working_dir') or '.'
+                entry_point = load_entry_point(entrypoint, class_name, init_type, timer=timer)
+                gateway, auth_token = start_gateway(entry_point, entrypoint, bridge_id, directory=directory,
+                                                    timer=timer, **request['options'])
+                try:
+                    write_bridge_meta(bridge_id, gateway, auth_token, {'mode': 'host', 'timings': timer.finish()},
+                                      directory)
+                except Exception:
+                    gateway.shutdown()
+                    _release_process_options(bridge_id)
+                    raise
+            except Exception as e:
+                traceback.print_exc()
+                _reply(conn, {'error': str(e)})
+                continue
+            _reply(conn, {'pid': os.getpid()})
+
+
+def launch_bridge_from_zygote(socket_path: str, bridge_id: str, entrypoint: str, class_name: str, init_type: str,
+                              working_dir: str = None, **options) -> int:
+    """Requests a bridge from the zygote or bridge host listening on the given unix socket. The bridge's metadata files
+    are written to the working directory (by default, the current directory) once the bridge is ready, as for a cold
+    start.
+    See :func:`launch_bridge` for parameters
+
+    :return: The PID of the bridge process
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.settimeout(30)
+        conn.connect(socket_path)
+        conn.sendall((json.dumps({
+            'module': [entrypoint, class_name, init_type],
+            'bridge_id': bridge_id,
+            'working_dir': working_dir if working_dir is not None else os.getcwd(),
+            'options': options
+        }) + '\n').encode('utf-8'))
+        response_line = conn.makefile('r').readline()
+    if response_line == '':
+        raise ValueError(f"Bridge server at {socket_path} closed the connection without launching bridge {bridge_id}")
+    response = json.loads(response_line)
+    if 'error' in response:
+        raise ValueError(f"Bridge server at {socket_path} could not launch bridge {bridge_id}: {response['error']}")
+    return response['pid']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs a long-lived process that starts python bridges on request")
+    modes = parser.add_subparsers(dest='mode', required=True)
+    zygote = modes.add_parser('zygote', help="Forks a prewarmed bridge process per request for a single module")
+    zygote.add_argument('entrypoint', help="The python module containing the backbone module declaration")
+    zygote.add_argument('class_name', help="The backbone module class within the entrypoint module")
+    zygote.add_argument('init_type', help="How the entry point is obtained from the module class")
+    host = modes.add_parser('host', help="Serves the bridges of any number of modules within this process")
+    for mode in (zygote, host):
+        mode.add_argument('socket_path', help="The unix socket to listen on for bridge requests")
+        mode.add_argument('--preload', action='append', default=[],
+                          help="An additional module to import ahead of serving requests, may be repeated")
+    args = parser.parse_args()
+    if args.mode == 'zygote':
+        run_zygote(args.entrypoint, args.class_name, args.init_type, args.socket_path, args.preload)
+    else:
+        run_host(args.socket_path, args.preload)
+
+
+if __name__ == '__main__':
+    main()
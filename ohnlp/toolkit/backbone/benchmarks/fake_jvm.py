@@ -0,0 +1,709 @@
+"""
+A local stand-in for the JVM side of the py4j bridge. :class:`FakeGateway` speaks the py4j wire protocol to an
+in-process object heap holding fake Beam Row/Schema objects, java collections, and process contexts, so that the
+bridge's python code (including py4j's own proxies, reflection lookups, and finalizers) runs unmodified while every
+round trip to the "JVM" is counted and can be delayed by a configurable latency.
+"""
+
+from __future__ import annotations
+
+import base64
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from py4j import protocol as proto
+from py4j.java_gateway import GatewayClient, GatewayConnection, GatewayParameters, JavaGateway, JavaObject
+from py4j.protocol import escape_new_line, unescape_new_line
+
+
+# Fake java objects
+class FakeJavaObject(object):
+    # The java class and any superclasses/interfaces this object is an instance of
+    java_classes = ('java.lang.Object',)
+
+    def getClass(self):
+        return FakeClassObject(self.java_classes[0])
+
+    def toString(self) -> str:
+        return self.java_classes[0] + '@' + hex(id(self))
+
+    def hashCode(self) -> int:
+        return id(self) & 0x7FFFFFFF
+
+    def equals(self, other) -> bool:
+        return self is other
+
+
+class FakeClassObject(FakeJavaObject):
+    java_classes = ('java.lang.Class',)
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def getName(self) -> str:
+        return self._name
+
+
+class FakeIterator(FakeJavaObject):
+    java_classes = ('java.util.Iterator',)
+
+    def __init__(self, values):
+        self._values = list(values)
+        self._idx = 0
+
+    def hasNext(self) -> bool:
+        return self._idx < len(self._values)
+
+    def next(self):
+        if not self.hasNext():
+            raise LookupError("java.util.NoSuchElementException")
+        self._idx += 1
+        return self._values[self._idx - 1]
+
+
+class FakeArrayList(FakeJavaObject):
+    java_classes = ('java.util.ArrayList', 'java.util.List', 'java.util.Collection')
+
+    def __init__(self, values=None):
+        # java.util.ArrayList(int initialCapacity)
+        self.values: List[Any] = list(values) if values is not None and not isinstance(values, int) else []
+
+    def add(self, *args):
+        if len(args) == 2:
+            self.values.insert(args[0], args[1])
+            return None
+        self.values.append(args[0])
+        return True
+
+    def addAll(self, other: FakeArrayList) -> bool:
+        self.values.extend(other.values)
+        return True
+
+    def get(self, idx: int):
+        return self.values[idx]
+
+    def set(self, idx: int, value):
+        ret = self.values[idx]
+        self.values[idx] = value
+        return ret
+
+    def size(self) -> int:
+        return len(self.values)
+
+    def isEmpty(self) -> bool:
+        return len(self.values) == 0
+
+    def iterator(self) -> FakeIterator:
+        return FakeIterator(self.values)
+
+
+class FakeHashSet(FakeJavaObject):
+    java_classes = ('java.util.HashSet', 'java.util.Set', 'java.util.Collection')
+
+    def __init__(self, values=None):
+        self.values = list(values) if values is not None else []
+
+    def contains(self, value) -> bool:
+        return value in self.values
+
+    def size(self) -> int:
+        return len(self.values)
+
+    def iterator(self) -> FakeIterator:
+        return FakeIterator(self.values)
+
+
+class FakeHashMap(FakeJavaObject):
+    java_classes = ('java.util.HashMap', 'java.util.Map')
+
+    def __init__(self):
+        self.values: Dict[Any, Any] = {}
+
+    def put(self, key, value):
+        ret = self.values.get(key)
+        self.values[key] = value
+        return ret
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def containsKey(self, key) -> bool:
+        return key in self.values
+
+    def remove(self, key):
+        return self.values.pop(key, None)
+
+    def size(self) -> int:
+        return len(self.values)
+
+    def keySet(self) -> FakeHashSet:
+        return FakeHashSet(self.values.keys())
+
+
+# Fake date/time values
+class FakeInstant(FakeJavaObject):
+    r"""
+    Stands in for the Joda instants Beam represents DATETIME values as
+    """
+    java_classes = ('org.joda.time.Instant', 'org.joda.time.ReadableInstant')
+
+    def __init__(self, millis: int):
+        self.millis = millis
+
+    def getMillis(self) -> int:
+        return self.millis
+
+    def toString(self) -> str:
+        return str(self.millis)
+
+    def hashCode(self) -> int:
+        return self.millis & 0x7FFFFFFF
+
+    def equals(self, other) -> bool:
+        return isinstance(other, FakeInstant) and other.millis == self.millis
+
+
+class FakeJavaTime(FakeJavaObject):
+    r"""
+    Stands in for the java.time values of Beam's SQL DATE, TIME, and DATETIME logical types, held as their ISO-8601
+    representation
+    """
+
+    def __init__(self, class_name: str, iso_value: str):
+        self.java_classes = (class_name,)
+        self.iso_value = iso_value
+
+    def toString(self) -> str:
+        return self.iso_value
+
+    def equals(self, other) -> bool:
+        return isinstance(other, FakeJavaTime) and (other.java_classes, other.iso_value) == \
+            (self.java_classes, self.iso_value)
+
+
+# Fake Beam schema types
+class FakeTypeName(FakeJavaObject):
+    java_classes = ('org.apache.beam.sdk.schemas.Schema$TypeName', 'java.lang.Enum')
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def name(self) -> str:
+        return self._name
+
+    def toString(self) -> str:
+        return self._name
+
+
+TYPE_NAMES = ('BYTE', 'INT16', 'INT32', 'INT64', 'DECIMAL', 'FLOAT', 'DOUBLE', 'STRING', 'DATETIME', 'BOOLEAN',
+              'BYTES', 'ARRAY', 'ITERABLE', 'MAP', 'ROW', 'LOGICAL_TYPE')
+type_names: Dict[str, FakeTypeName] = {name: FakeTypeName(name) for name in TYPE_NAMES}
+
+
+class FakeFieldType(FakeJavaObject):
+    java_classes = ('org.apache.beam.sdk.schemas.Schema$FieldType',)
+
+    def __init__(self, type_name: FakeTypeName, row_schema: FakeSchema = None, element_type: FakeFieldType = None,
+                 nullable: bool = False, map_value_type: FakeFieldType = None):
+        self.type_name = type_name
+        self.row_schema = row_schema
+        self.element_type = element_type
+        self.nullable = nullable
+        self.map_value_type = map_value_type
+
+    def getTypeName(self) -> FakeTypeName:
+        return self.type_name
+
+    def getNullable(self) -> bool:
+        return self.nullable
+
+    def withNullable(self, nullable: bool) -> FakeFieldType:
+        return FakeFieldType(self.type_name, self.row_schema, self.element_type, nullable, self.map_value_type)
+
+    def getRowSchema(self) -> Optional[FakeSchema]:
+        return self.row_schema
+
+    def getCollectionElementType(self) -> Optional[FakeFieldType]:
+        return self.element_type
+
+    def getMapValueType(self) -> Optional[FakeFieldType]:
+        return self.map_value_type
+
+    def toString(self) -> str:
+        if self.row_schema is not None:
+            return 'ROW<' + self.row_schema.toString() + '>'
+        if self.element_type is not None:
+            return self.type_name.name() + '<' + self.element_type.toString() + '>'
+        if self.map_value_type is not None:
+            return self.type_name.name() + '<STRING, ' + self.map_value_type.toString() + '>'
+        return self.type_name.name()
+
+
+class FakeField(FakeJavaObject):
+    java_classes = ('org.apache.beam.sdk.schemas.Schema$Field',)
+
+    def __init__(self, name: str, field_type: FakeFieldType, nullable: bool = False):
+        # As in Beam, nullability is a property of the field type
+        self.name = name
+        self.field_type = field_type.withNullable(nullable)
+        self.nullable = nullable
+
+    def getName(self) -> str:
+        return self.name
+
+    def getType(self) -> FakeFieldType:
+        return self.field_type
+
+    def toString(self) -> str:
+        return f"{self.name}:{self.field_type.toString()}{' NOT NULL' if not self.nullable else ''}"
+
+
+class FakeSchema(FakeJavaObject):
+    java_classes = ('org.apache.beam.sdk.schemas.Schema',)
+
+    def __init__(self, fields: List[FakeField]):
+        self.fields = list(fields)
+
+    def getFields(self) -> FakeArrayList:
+        return FakeArrayList(self.fields)
+
+    def getField(self, idx_or_name):
+        if isinstance(idx_or_name, int):
+            return self.fields[idx_or_name]
+        return self.fields[self.indexOf(idx_or_name)]
+
+    def getFieldCount(self) -> int:
+        return len(self.fields)
+
+    def indexOf(self, name: str) -> int:
+        for idx, field in enumerate(self.fields):
+            if field.name == name:
+                return idx
+        raise ValueError(f"Cannot find field {name}")
+
+    def toString(self) -> str:
+        return 'Fields:\n' + '\n'.join(field.toString() for field in self.fields)
+
+
+# Fake Beam values
+class FakeRow(FakeJavaObject):
+    java_classes = ('org.apache.beam.sdk.values.Row',)
+
+    def __init__(self, schema: FakeSchema, values: List[Any]):
+        self.schema = schema
+        self.values = list(values)
+
+    def getSchema(self) -> FakeSchema:
+        return self.schema
+
+    def getValues(self) -> FakeArrayList:
+        return FakeArrayList(self.values)
+
+    def getValue(self, idx_or_name):
+        if isinstance(idx_or_name, int):
+            return self.values[idx_or_name]
+        return self.values[self.schema.indexOf(idx_or_name)]
+
+    def getFieldCount(self) -> int:
+        return len(self.values)
+
+    def toString(self) -> str:
+        return 'Row:' + str([v.toString() if isinstance(v, FakeJavaObject) else v for v in self.values])
+
+
+class FakeRowBuilder(FakeJavaObject):
+    java_classes = ('org.apache.beam.sdk.values.Row$Builder',)
+
+    def __init__(self, schema: FakeSchema):
+        self.schema = schema
+        self.values = []
+
+    def addValue(self, value) -> FakeRowBuilder:
+        self.values.append(value)
+        return self
+
+    def addValues(self, *values) -> FakeRowBuilder:
+        if len(values) == 1 and isinstance(values[0], FakeArrayList):
+            self.values.extend(values[0].values)
+        else:
+            self.values.extend(values)
+        return self
+
+    def build(self) -> FakeRow:
+        if len(self.values) != len(self.schema.fields):
+            raise ValueError(f"Row expected {len(self.schema.fields)} values, got {len(self.values)}")
+        return FakeRow(self.schema, self.values)
+
+
+class FakeTupleTag(FakeJavaObject):
+    java_classes = ('org.apache.beam.sdk.values.TupleTag',)
+
+    def __init__(self, tag_id: str):
+        self.tag_id = tag_id
+
+    def getId(self) -> str:
+        return self.tag_id
+
+
+# Fake Beam pipeline construction types
+class FakePipeline(FakeJavaObject):
+    java_classes = ('org.apache.beam.sdk.Pipeline',)
+
+
+class FakePCollection(FakeJavaObject):
+    java_classes = ('org.apache.beam.sdk.values.PCollection',)
+
+    def __init__(self, pipeline: FakePipeline, schema: FakeSchema = None):
+        self.pipeline = pipeline
+        self.schema = schema
+
+    def getPipeline(self) -> FakePipeline:
+        return self.pipeline
+
+    def getSchema(self) -> Optional[FakeSchema]:
+        return self.schema
+
+
+class FakePCollectionRowTuple(FakeJavaObject):
+    java_classes = ('org.apache.beam.sdk.values.PCollectionRowTuple',)
+
+    def __init__(self, pipeline: FakePipeline, pcolls: Dict[str, FakePCollection] = None):
+        self.pipeline = pipeline
+        self.pcolls = dict(pcolls) if pcolls is not None else {}
+
+    @staticmethod
+    def of(*tags_and_pcolls) -> FakePCollectionRowTuple:
+        # PCollectionRowTuple.of overloads accept between 1 and 5 tag/collection pairs
+        if len(tags_and_pcolls) % 2 != 0 or not 2 <= len(tags_and_pcolls) <= 10:
+            raise AttributeError("Method of does not exist")
+        pairs = dict(zip(tags_and_pcolls[0::2], tags_and_pcolls[1::2]))
+        return FakePCollectionRowTuple(tags_and_pcolls[1].getPipeline(), pairs)
+
+    def and_(self, tag: str, pcoll: FakePCollection) -> FakePCollectionRowTuple:
+        return FakePCollectionRowTuple(self.pipeline, {**self.pcolls, tag: pcoll})
+
+    def getAll(self) -> FakeHashMap:
+        ret = FakeHashMap()
+        for tag, pcoll in self.pcolls.items():
+            ret.put(tag, pcoll)
+        return ret
+
+    def getPipeline(self) -> FakePipeline:
+        return self.pipeline
+
+
+# and is a reserved word in python
+setattr(FakePCollectionRowTuple, 'and', FakePCollectionRowTuple.and_)
+
+
+class FakeProcessContext(FakeJavaObject):
+    r"""
+    Stands in for the java process context handed to UDF calls, counting (and optionally keeping) outputs by tag
+    """
+    java_classes = ('org.ohnlp.backbone.api.components.xlang.python.PythonProcessingPartitionBasedDoFn$ProcessContext',)
+
+    def __init__(self, bulk_output: bool = True, keep_outputs: bool = False):
+        """
+        :param bulk_output: Whether to support outputAll/outputAllTagged. If not, calls to them fail as they would
+        against an older java bridge
+        :param keep_outputs: Whether to keep outputs (by tag, with None for the main output) rather than just count them
+        """
+        self.bulk_output = bulk_output
+        self.keep_outputs = keep_outputs
+        self.output_counts: Dict[Optional[str], int] = {}
+        self.outputs: Dict[Optional[str], List[Any]] = {}
+
+    def _record(self, tag: Optional[str], values: List[Any]):
+        self.output_counts[tag] = self.output_counts.get(tag, 0) + len(values)
+        if self.keep_outputs:
+            self.outputs.setdefault(tag, []).extend(values)
+
+    def output(self, *args):
+        if len(args) == 2:
+            self._record(args[0].getId(), [args[1]])
+        else:
+            self._record(None, [args[0]])
+
+    def outputAll(self, values: FakeArrayList):
+        if not self.bulk_output:
+            raise AttributeError("Method outputAll does not exist")
+        self._record(None, values.values)
+
+    def outputAllTagged(self, tag: str, values: FakeArrayList):
+        if not self.bulk_output:
+            raise AttributeError("Method outputAllTagged does not exist")
+        self._record(tag, values.values)
+
+
+# Classes reachable via reflection, as fully qualified name -> (constructor, static members)
+def _is_instance_of(fqcn: str, obj: Any) -> bool:
+    return isinstance(obj, FakeJavaObject) and fqcn in obj.java_classes
+
+
+_SCHEMA = 'org.apache.beam.sdk.schemas.Schema'
+_CLASSES: Dict[str, Dict[str, Any]] = {
+    'java.util.ArrayList': {'constructor': FakeArrayList},
+    'java.util.HashMap': {'constructor': FakeHashMap},
+    'py4j.reflection.TypeUtil': {'statics': {'isInstanceOf': _is_instance_of}},
+    'org.apache.beam.sdk.values.TupleTag': {'constructor': FakeTupleTag},
+    'org.apache.beam.sdk.values.Row': {'statics': {'withSchema': FakeRowBuilder}},
+    'org.apache.beam.sdk.values.Row$Builder': {},
+    'org.joda.time.Instant': {'constructor': FakeInstant},
+    'java.time.LocalDate': {'statics': {'parse': lambda text: FakeJavaTime('java.time.LocalDate', text)}},
+    'java.time.LocalTime': {'statics': {'parse': lambda text: FakeJavaTime('java.time.LocalTime', text)}},
+    'java.time.LocalDateTime': {'statics': {'parse': lambda text: FakeJavaTime('java.time.LocalDateTime', text)}},
+    _SCHEMA: {
+        'constructor': lambda fields: FakeSchema(fields.values),
+        'statics': {'of': lambda *fields: FakeSchema(fields[0].values if len(fields) == 1 and
+                                                     isinstance(fields[0], FakeArrayList) else fields)}
+    },
+    _SCHEMA + '$Field': {'statics': {
+        'of': lambda name, field_type: FakeField(name, field_type, False),
+        'nullable': lambda name, field_type: FakeField(name, field_type, True)
+    }},
+    _SCHEMA + '$FieldType': {'statics': {
+        'of': FakeFieldType,
+        'row': lambda schema: FakeFieldType(type_names['ROW'], row_schema=schema),
+        'array': lambda element_type, nullable=False: FakeFieldType(type_names['ARRAY'],
+                                                                    element_type=element_type.withNullable(nullable))
+    }},
+    _SCHEMA + '$TypeName': {'fields': type_names},
+    'org.apache.beam.sdk.values.PCollectionRowTuple': {'statics': {
+        'of': FakePCollectionRowTuple.of,
+        'empty': FakePCollectionRowTuple
+    }},
+}
+
+# Releases the GIL without sleeping (sleeps of even zero seconds take tens of microseconds due to timer slack)
+_yield_gil: Callable[[], Any] = getattr(os, 'sched_yield', lambda: time.sleep(0))
+
+
+# Protocol handling
+class FakeJVM(object):
+    r"""
+    The object heap and command dispatcher standing in for the JVM. Every write of one or more py4j commands to a
+    connection counts as one round trip, and is delayed by the configured latency (by spinning, as sleeps are too
+    coarse for realistic loopback latencies). While other threads are running, the spin yields the GIL as a thread
+    blocked on a socket would, so that round trips of concurrent bridge calls overlap as they would against a real JVM
+    """
+
+    def __init__(self, latency_s: float = 0.0):
+        """
+        :param latency_s: The simulated latency of each round trip to the JVM
+        """
+        self.latency_s = latency_s
+        self._lock = threading.Lock()
+        self._objects: Dict[str, Any] = {}
+        self._next_id = 0
+        self.round_trips = 0
+        self.commands = 0
+        self.commands_by_name: Dict[str, int] = {}
+
+    def reset_counters(self):
+        with self._lock:
+            self.round_trips = 0
+            self.commands = 0
+            self.commands_by_name = {}
+
+    @property
+    def live_objects(self) -> int:
+        return len(self._objects)
+
+    def put(self, obj: Any) -> str:
+        with self._lock:
+            object_id = 'o' + str(self._next_id)
+            self._next_id += 1
+            self._objects[object_id] = obj
+        return object_id
+
+    def get(self, object_id: str) -> Any:
+        return self._objects[object_id]
+
+    # Encoding
+    def _encode(self, value: Any) -> str:
+        if value is None:
+            return proto.SUCCESS + proto.NULL_TYPE
+        if isinstance(value, bool):
+            return proto.SUCCESS + proto.BOOLEAN_TYPE + ('true' if value else 'false')
+        if isinstance(value, int):
+            int_type = proto.INTEGER_TYPE if proto.JAVA_MIN_INT <= value <= proto.JAVA_MAX_INT else proto.LONG_TYPE
+            return proto.SUCCESS + int_type + str(value)
+        if isinstance(value, float):
+            return proto.SUCCESS + proto.DOUBLE_TYPE + proto.encode_float(value)
+        if isinstance(value, str):
+            return proto.SUCCESS + proto.STRING_TYPE + escape_new_line(value)
+        if isinstance(value, (bytes, bytearray)):
+            return proto.SUCCESS + proto.BYTES_TYPE + base64.standard_b64encode(bytes(value)).decode('ascii')
+        if isinstance(value, FakeArrayList):
+            ref_type = proto.LIST_TYPE
+        elif isinstance(value, FakeHashMap):
+            ref_type = proto.MAP_TYPE
+        elif isinstance(value, FakeHashSet):
+            ref_type = proto.SET_TYPE
+        elif isinstance(value, FakeIterator):
+            ref_type = proto.ITERATOR_TYPE
+        else:
+            ref_type = proto.REFERENCE_TYPE
+        return proto.SUCCESS + ref_type + self.put(value)
+
+    def _decode(self, arg: str) -> Any:
+        arg_type, arg_value = arg[0], arg[1:]
+        if arg_type == proto.NULL_TYPE:
+            return None
+        if arg_type == proto.BOOLEAN_TYPE:
+            return arg_value.lower() == 'true'
+        if arg_type in (proto.INTEGER_TYPE, proto.LONG_TYPE):
+            return int(arg_value)
+        if arg_type == proto.DOUBLE_TYPE:
+            return float(arg_value)
+        if arg_type == proto.STRING_TYPE:
+            return unescape_new_line(arg_value)
+        if arg_type == proto.BYTES_TYPE:
+            return base64.standard_b64decode(arg_value)
+        if arg_type == proto.REFERENCE_TYPE:
+            return self._objects[arg_value]
+        raise ValueError(f"Unsupported argument type {arg_type} in fake JVM")
+
+    @staticmethod
+    def _error(message: str) -> str:
+        return proto.ERROR + proto.STRING_TYPE + escape_new_line(message)
+
+    # Commands
+    def _reflect(self, sub_command: str, args: List[str]) -> str:
+        if sub_command == 'u':
+            # Resolution of a package or class name relative to a JVM view
+            fqn = args[0]
+            if fqn in _CLASSES:
+                return proto.SUCCESS_CLASS + fqn
+            if any(name.startswith(fqn + '.') for name in _CLASSES):
+                return proto.SUCCESS_PACKAGE
+            return self._error(f"{fqn} does not exist in the fake JVM")
+        if sub_command == 'm':
+            # Resolution of a static member of a class
+            fqn, name = args
+            if fqn + '$' + name in _CLASSES:
+                return proto.SUCCESS_CLASS + name
+            definition = _CLASSES.get(fqn, {})
+            if name in definition.get('statics', {}):
+                return proto.SUCCESS + proto.METHOD_TYPE
+            if name in definition.get('fields', {}):
+                return self._encode(definition['fields'][name])
+            return proto.NO_MEMBER_COMMAND
+        return self._error(f"Unsupported reflection command {sub_command}")
+
+    def _call(self, target_id: str, method_name: str, args: List[Any]) -> str:
+        if target_id.startswith(proto.STATIC_PREFIX):
+            method: Callable = _CLASSES[target_id[len(proto.STATIC_PREFIX):]]['statics'][method_name]
+        else:
+            method = getattr(self._objects[target_id], method_name)
+        return self._encode(method(*args))
+
+    def _execute(self, command: List[str]) -> str:
+        command_name = command[0]
+        try:
+            if command_name == proto.CALL_COMMAND_NAME[0]:
+                with self._lock:
+                    self.commands_by_name[command[2]] = self.commands_by_name.get(command[2], 0) + 1
+                return self._call(command[1], command[2], [self._decode(arg) for arg in command[3:]])
+            if command_name == proto.CONSTRUCTOR_COMMAND_NAME[0]:
+                constructor = _CLASSES[command[1]]['constructor']
+                return self._encode(constructor(*[self._decode(arg) for arg in command[2:]]))
+            if command_name == proto.REFLECTION_COMMAND_NAME[0]:
+                return self._reflect(command[1], command[2:])
+            if command_name == proto.MEMORY_COMMAND_NAME[0] and command[1] == 'd':
+                with self._lock:
+                    self._objects.pop(command[2], None)
+                return proto.SUCCESS + proto.VOID_TYPE
+        except Exception as e:
+            return self._error(f"{type(e).__name__}: {e}")
+        return self._error(f"Unsupported command {command_name}")
+
+    def handle(self, data: bytes) -> List[str]:
+        """ Executes every command within a single write to a connection
+
+        :return: The answers, in command order
+        """
+        if self.latency_s > 0:
+            deadline = time.perf_counter() + self.latency_s
+            if threading.active_count() > 1:
+                while time.perf_counter() < deadline:
+                    _yield_gil()
+            else:
+                while time.perf_counter() < deadline:
+                    pass
+        answers = []
+        command: List[str] = []
+        for line in data.decode('utf-8').split('\n')[:-1]:
+            if line == proto.END:
+                answers.append(self._execute(command))
+                command = []
+            else:
+                command.append(line)
+        with self._lock:
+            self.round_trips += 1
+            self.commands += len(answers)
+        return answers
+
+
+class _FakeSocket(object):
+    def __init__(self, jvm: FakeJVM, stream: _FakeStream):
+        self._jvm = jvm
+        self._stream = stream
+
+    def sendall(self, data: bytes):
+        for answer in self._jvm.handle(data):
+            self._stream.answers.append((proto.RETURN_MESSAGE + answer + '\n').encode('utf-8'))
+
+
+class _FakeStream(object):
+    def __init__(self):
+        self.answers = deque()
+
+    def readline(self) -> bytes:
+        return self.answers.popleft() if self.answers else b''
+
+
+class _FakeConnection(GatewayConnection):
+    # noinspection PyMissingConstructor
+    def __init__(self, jvm: FakeJVM):
+        self.stream = _FakeStream()
+        self.socket = _FakeSocket(jvm, self.stream)
+        self.is_connected = True
+
+    def close(self, reset=False):
+        self.stream.answers.clear()
+
+
+class _FakeGatewayClient(GatewayClient):
+    def __init__(self, jvm: FakeJVM, gateway_parameters: GatewayParameters):
+        super().__init__(gateway_parameters=gateway_parameters)
+        self._jvm = jvm
+
+    def _create_connection(self):
+        return _FakeConnection(self._jvm)
+
+
+class FakeGateway(JavaGateway):
+    r"""
+    A py4j gateway connected to a :class:`FakeJVM` rather than a real JVM, configured as the module launcher
+    configures the bridge's gateway (auto-conversion of collections and auto-field access enabled)
+    """
+
+    def __init__(self, jvm: FakeJVM = None):
+        self.fake_jvm = jvm if jvm is not None else FakeJVM()
+        super().__init__(gateway_parameters=GatewayParameters(auto_convert=True, auto_field=True))
+
+    def _create_gateway_client(self):
+        return _FakeGatewayClient(self.fake_jvm, self.gateway_parameters)
+
+    def wrap(self, obj: Any) -> JavaObject:
+        """ Places a fake java object on the heap without a round trip, returning a py4j proxy to it as if it had been
+        passed in by the JVM """
+        # noinspection PyProtectedMember
+        return proto.get_return_value(self.fake_jvm._encode(obj), self._gateway_client)
+
+    def shutdown(self, raise_exception=False):
+        pass
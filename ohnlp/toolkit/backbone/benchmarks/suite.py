@@ -0,0 +1,528 @@
+"""
+Repeatable bridge benchmarks run against a :class:`FakeGateway`, covering row access, output, and per-element/bundle
+processing through the same :class:`ToolkitModule` entry points the JVM calls. Results (time and JVM round trips per
+operation) are written as JSON and can be compared against the results of a previous run, e.g. from another commit::
+
+    python -m ohnlp.toolkit.backbone.benchmarks.suite --output after.json --baseline before.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+from uuid import UUID
+
+from ohnlp.toolkit.backbone.api import BufferedOutputCollector, ComponentDescription, FunctionIdentifier, \
+    ManyToOneTransform, ModuleDeclaration, OutputCollector, PartitionedCollection, PartitionedRowCollectionTuple, Row, \
+    Schema, TaggedOutput, ToolkitModule, Transform, UserDefinedPartitionMappingFunction
+from ohnlp.toolkit.backbone.benchmarks.fake_jvm import FakeArrayList, FakeField, FakeFieldType, FakeGateway, \
+    FakeHashMap, FakeJavaObject, FakeJVM, FakePCollection, FakePCollectionRowTuple, FakePipeline, FakeProcessContext, \
+    FakeRow, FakeSchema, type_names
+
+
+@FunctionIdentifier(UUID('6f1b7c3e-2a4d-4e8b-9c1f-0d3e5a7b9c11'))
+class _UppercaseUDF(UserDefinedPartitionMappingFunction):
+    """ A minimal row-in/row-out UDF, so that benchmarks measure bridge overhead rather than UDF logic """
+
+    def init_from_driver(self, json_config: Optional[Dict]) -> None:
+        pass
+
+    def on_bundle_start(self) -> None:
+        pass
+
+    def process(self, out: OutputCollector, input_value: Row) -> None:
+        row = input_value.copy()
+        row.set_value('text', row.get_value('text').upper())
+        out.output(row)
+
+    def on_bundle_finish(self, out: OutputCollector) -> None:
+        pass
+
+    def on_teardown(self) -> None:
+        pass
+
+
+@FunctionIdentifier(UUID('5d0bc9a1-7f0e-4c55-9a49-2b8f7f1c3e60'))
+class _BundleScopedUppercaseUDF(_UppercaseUDF):
+    bundle_scoped_references = True
+
+
+@FunctionIdentifier(UUID('c81e2f47-0b9d-4a3e-9f6c-7d25e8a1b304'))
+class _AdaptiveBatchingUppercaseUDF(_UppercaseUDF):
+    adaptive_batching = True
+
+
+@FunctionIdentifier(UUID('e4a7d912-5c3b-4f80-a6e1-93b0c2d8f517'))
+class _ThreadSafeUppercaseUDF(_UppercaseUDF):
+    thread_safe = True
+
+
+@FunctionIdentifier(UUID('a3c0f5e2-8d41-4b6f-b0e7-52c9d1f4a870'))
+class _TokenizingUDF(_UppercaseUDF):
+    """ A UDF yielding many outputs per input (one per token, with every other token tagged) from a generator """
+
+    def process(self, out: OutputCollector, input_value: Row):
+        for idx, token in enumerate(input_value.get_value('text').split()):
+            yield TaggedOutput('odd', token) if idx % 2 == 1 else token
+
+
+# The tags of the (many-tagged) collection tuples used by pipeline construction benchmarks
+CONSTRUCTION_TAGS = [f"tag_{idx}" for idx in range(12)]
+
+
+@ComponentDescription(name="benchmark-passthrough", desc="Passes every input collection through unmodified",
+                      config_fields={})
+class _PassthroughTransform(Transform):
+    """ A transform of many tags that does nothing, so that benchmarks measure pipeline construction overhead """
+
+    def init(self):
+        pass
+
+    def get_required_columns(self, input_tag: str) -> Optional[Schema]:
+        return None
+
+    def get_input_tags(self) -> List[str]:
+        return CONSTRUCTION_TAGS
+
+    def get_output_tags(self) -> List[str]:
+        return CONSTRUCTION_TAGS
+
+    def calculate_output_schema(self, input_schemas: Dict[str, Schema]) -> Dict[str, Schema]:
+        return input_schemas
+
+    def expand(self, input_val: PartitionedRowCollectionTuple) -> PartitionedRowCollectionTuple:
+        return input_val
+
+    def teardown(self):
+        pass
+
+    def to_java(self):
+        return self._java_obj
+
+
+@ComponentDescription(name="benchmark-merge", desc="Passes the first input collection through as the only output",
+                      config_fields={})
+class _MergingTransform(ManyToOneTransform):
+    """ A many-to-one transform, whose output tuple is built in python rather than wrapping a java tuple """
+
+    def init(self):
+        pass
+
+    def get_required_columns(self, input_tag: str) -> Optional[Schema]:
+        return None
+
+    def get_input_tags(self) -> List[str]:
+        return CONSTRUCTION_TAGS
+
+    def get_output_tag(self) -> str:
+        return 'merged'
+
+    def calculate_output_schema(self, input_schemas: Dict[str, Schema]) -> Dict[str, Schema]:
+        return {'merged': input_schemas[CONSTRUCTION_TAGS[0]]}
+
+    def reduce(self, input_val: PartitionedRowCollectionTuple) -> PartitionedCollection[Row]:
+        return input_val.get(input_val.get_keys()[0])
+
+    def teardown(self):
+        pass
+
+    def to_java(self):
+        return self._java_obj
+
+
+class _BenchmarkModule(ToolkitModule):
+    pass
+
+
+ModuleDeclaration([_PassthroughTransform, _MergingTransform],
+                  [_UppercaseUDF, _BundleScopedUppercaseUDF, _AdaptiveBatchingUppercaseUDF, _ThreadSafeUppercaseUDF,
+                   _TokenizingUDF])(_BenchmarkModule)
+
+
+class BenchmarkEnvironment(object):
+    """ A bridge entry point connected to a fake JVM, along with java rows of a representative schema """
+
+    def __init__(self, latency_s: float, num_rows: int = 256):
+        self.jvm = FakeJVM(latency_s)
+        self.gateway = FakeGateway(self.jvm)
+        self.module = _BenchmarkModule()
+        self.module.python_init(self.gateway)
+        self.schema = FakeSchema([
+            FakeField('id', FakeFieldType(type_names['INT64'])),
+            FakeField('text', FakeFieldType(type_names['STRING'])),
+            FakeField('section', FakeFieldType(type_names['STRING']), True),
+            FakeField('score', FakeFieldType(type_names['DOUBLE']), True),
+            FakeField('flag', FakeFieldType(type_names['BOOLEAN']), True),
+            FakeField('offset', FakeFieldType(type_names['INT32']), True),
+            FakeField('note_type', FakeFieldType(type_names['STRING']), True),
+            FakeField('patient_id', FakeFieldType(type_names['STRING']), True),
+        ])
+        self.rows = [FakeRow(self.schema, [idx, f"the patient denies chest pain {idx}", 'HPI', 0.5, idx % 2 == 0,
+                                           idx * 10, 'progress', f"p{idx % 17}"])
+                     for idx in range(num_rows)]
+        self.java_rows = [self.gateway.wrap(row) for row in self.rows]
+        self.module.java_init(self.gateway.wrap(FakeJavaObject()))
+
+    def new_context(self):
+        return self.gateway.wrap(FakeProcessContext())
+
+    def new_transform(self, transform_cls: Type[Transform] = _PassthroughTransform) -> str:
+        instance_uid = self.module.register_transform_instance(transform_cls._component_name)
+        self.module.call_transform_init(instance_uid, None)
+        return instance_uid
+
+    def new_udf(self, udf_cls: Type[UserDefinedPartitionMappingFunction] = _UppercaseUDF) -> str:
+        instance_uid = self.module.register_udf(str(udf_cls.toolkit_component_uid))
+        self.module.call_udf_on_init(instance_uid, None)
+        return instance_uid
+
+
+# Benchmarks: each is set up against the environment and returns (operation, operations per call, cleanup)
+Benchmark = Tuple[Callable[[], Any], int, Optional[Callable[[], Any]]]
+
+
+def bench_row_get_value(env: BenchmarkEnvironment) -> Benchmark:
+    row = Row.of_java(env.java_rows[0])
+    return lambda: row.get_value('text'), 1, None
+
+
+def bench_row_get_value_materialized(env: BenchmarkEnvironment) -> Benchmark:
+    row = Row.of_java(env.java_rows[0], materialize=True)
+    return lambda: row.get_value('text'), 1, None
+
+
+def bench_row_materialize(env: BenchmarkEnvironment) -> Benchmark:
+    java_row = env.java_rows[0]
+    return lambda: Row.of_java(java_row, materialize=True), 1, None
+
+
+def bench_row_set_value(env: BenchmarkEnvironment) -> Benchmark:
+    row = Row.of_java(env.java_rows[0])
+
+    def op():
+        modified = row.copy()
+        modified.set_value('text', 'modified')
+        return modified.to_java()
+
+    return op, 1, None
+
+
+def bench_row_build(env: BenchmarkEnvironment) -> Benchmark:
+    # Every row is built against a new (but structurally identical) python schema, as are rows transferred back from
+    # worker processes
+    template = Row.of_java(env.java_rows[0], materialize=True)
+    fields = template.get_schema().get_fields()
+    values = template.materialize()._values
+    return lambda: Row.of(Schema.of(fields), values).to_java(), 1, None
+
+
+def bench_output(env: BenchmarkEnvironment) -> Benchmark:
+    row = Row.of_java(env.java_rows[0])
+    out = BufferedOutputCollector()
+    out.init_java(env.gateway, env.new_context())
+    return lambda: out.output(row), 1, out.flush
+
+
+def bench_process_element(env: BenchmarkEnvironment) -> Benchmark:
+    instance_uid = env.new_udf()
+    context = env.new_context()
+    java_row = env.java_rows[0]
+    env.module.call_udf_on_bundle_start(instance_uid)
+    return lambda: env.module.call_udf_process(instance_uid, java_row, context), 1, None
+
+
+def bench_bundle_per_element(env: BenchmarkEnvironment,
+                             udf_cls: Type[UserDefinedPartitionMappingFunction] = _UppercaseUDF) -> Benchmark:
+    instance_uid = env.new_udf(udf_cls)
+    context = env.new_context()
+
+    def op():
+        env.module.call_udf_on_bundle_start(instance_uid)
+        for java_row in env.java_rows:
+            env.module.call_udf_process(instance_uid, java_row, context)
+        env.module.call_udf_on_bundle_finish(instance_uid, context)
+
+    return op, len(env.java_rows), None
+
+
+def bench_bundle_adaptive_batching(env: BenchmarkEnvironment) -> Benchmark:
+    # Elements are supplied one per call as with bundle_per_element, but processed in micro-batches
+    return bench_bundle_per_element(env, _AdaptiveBatchingUppercaseUDF)
+
+
+# The number of threads (i.e. Beam DoFn threads of the JVM) calling the bridge concurrently in concurrent benchmarks
+CONCURRENT_THREADS = 4
+
+
+def _bench_bundle_concurrent(env: BenchmarkEnvironment, instance_uids: List[str]) -> Benchmark:
+    # Each thread processes its own bundle, element by element, against the instance at its index
+    contexts = [env.new_context() for _ in instance_uids]
+
+    def run_bundle(instance_uid: str, context):
+        env.module.call_udf_on_bundle_start(instance_uid)
+        for java_row in env.java_rows:
+            env.module.call_udf_process(instance_uid, java_row, context)
+        env.module.call_udf_on_bundle_finish(instance_uid, context)
+
+    def op():
+        with ThreadPoolExecutor(len(instance_uids)) as executor:
+            for future in [executor.submit(run_bundle, instance_uid, context)
+                           for instance_uid, context in zip(instance_uids, contexts)]:
+                future.result()
+
+    return op, len(instance_uids) * len(env.java_rows), None
+
+
+def bench_bundle_concurrent(env: BenchmarkEnvironment) -> Benchmark:
+    # A UDF instance per thread, as a Beam worker creates a DoFn instance per thread
+    return _bench_bundle_concurrent(env, [env.new_udf() for _ in range(CONCURRENT_THREADS)])
+
+
+def bench_bundle_concurrent_shared(env: BenchmarkEnvironment) -> Benchmark:
+    # A single thread-safe UDF instance called by every thread
+    return _bench_bundle_concurrent(env, [env.new_udf(_ThreadSafeUppercaseUDF)] * CONCURRENT_THREADS)
+
+
+def bench_bundle_batched(env: BenchmarkEnvironment) -> Benchmark:
+    instance_uid = env.new_udf()
+    context = env.new_context()
+    java_rows = env.gateway.wrap(FakeArrayList(env.rows))
+
+    def op():
+        env.module.call_udf_on_bundle_start(instance_uid)
+        env.module.call_udf_process_batch(instance_uid, java_rows, context)
+        env.module.call_udf_on_bundle_finish(instance_uid, context)
+
+    return op, len(env.rows), None
+
+
+def bench_process_generator(env: BenchmarkEnvironment) -> Benchmark:
+    instance_uid = env.new_udf(_TokenizingUDF)
+    context = env.new_context()
+    # A long document, producing thousands of outputs
+    java_row = env.gateway.wrap(FakeRow(env.schema, [0, ' '.join(f"token{idx}" for idx in range(4096)), 'HPI', 0.5,
+                                                     True, 0, 'progress', 'p0']))
+    env.module.call_udf_on_bundle_start(instance_uid)
+    return lambda: env.module.call_udf_process(instance_uid, java_row, context), 1, None
+
+
+def _bench_bundle_fresh_references(env: BenchmarkEnvironment,
+                                   udf_cls: Type[UserDefinedPartitionMappingFunction]) -> Benchmark:
+    # Unlike the other bundle benchmarks, every element and process context is passed in as a new proxy as the JVM
+    # would, so that the cost of releasing those proxies is included. py4j proxies are only freed by the cyclic garbage
+    # collector (which is otherwise disabled while timing), so collection is included within the timed region
+    instance_uid = env.new_udf(udf_cls)
+
+    def op():
+        env.module.call_udf_on_bundle_start(instance_uid)
+        for row in env.rows:
+            env.module.call_udf_process(instance_uid, env.gateway.wrap(row), env.new_context())
+        env.module.call_udf_on_bundle_finish(instance_uid, env.new_context())
+
+    return op, len(env.rows), gc.collect
+
+
+def bench_bundle_gc_references(env: BenchmarkEnvironment) -> Benchmark:
+    return _bench_bundle_fresh_references(env, _UppercaseUDF)
+
+
+def bench_bundle_arena_references(env: BenchmarkEnvironment) -> Benchmark:
+    return _bench_bundle_fresh_references(env, _BundleScopedUppercaseUDF)
+
+
+def bench_transform_expand(env: BenchmarkEnvironment,
+                           transform_cls: Type[Transform] = _PassthroughTransform) -> Benchmark:
+    instance_uid = env.new_transform(transform_cls)
+    pipeline = FakePipeline()
+    java_tuple = env.gateway.wrap(FakePCollectionRowTuple(pipeline, {
+        tag: FakePCollection(pipeline, env.schema) for tag in CONSTRUCTION_TAGS
+    }))
+    return lambda: env.module.call_transform_expand(instance_uid, java_tuple), 1, gc.collect
+
+
+def bench_transform_expand_built(env: BenchmarkEnvironment) -> Benchmark:
+    # The output tuple is built in python, so must be created within the JVM rather than passed back as is
+    return bench_transform_expand(env, _MergingTransform)
+
+
+def bench_transform_output_schema(env: BenchmarkEnvironment) -> Benchmark:
+    instance_uid = env.new_transform()
+    input_schemas = FakeHashMap()
+    for tag in CONSTRUCTION_TAGS:
+        input_schemas.put(tag, env.schema)
+    java_input_schemas = env.gateway.wrap(input_schemas)
+    return lambda: env.module.call_transform_get_output_schema(instance_uid, java_input_schemas), 1, gc.collect
+
+
+BENCHMARKS: Dict[str, Callable[[BenchmarkEnvironment], Benchmark]] = {
+    'row_get_value': bench_row_get_value,
+    'row_get_value_materialized': bench_row_get_value_materialized,
+    'row_materialize': bench_row_materialize,
+    'row_set_value': bench_row_set_value,
+    'row_build': bench_row_build,
+    'output': bench_output,
+    'process_element': bench_process_element,
+    'bundle_per_element': bench_bundle_per_element,
+    'bundle_adaptive_batching': bench_bundle_adaptive_batching,
+    'bundle_concurrent': bench_bundle_concurrent,
+    'bundle_concurrent_shared': bench_bundle_concurrent_shared,
+    'bundle_batched': bench_bundle_batched,
+    'process_generator': bench_process_generator,
+    'bundle_gc_references': bench_bundle_gc_references,
+    'bundle_arena_references': bench_bundle_arena_references,
+    'transform_expand': bench_transform_expand,
+    'transform_expand_built': bench_transform_expand_built,
+    'transform_output_schema': bench_transform_output_schema,
+}
+
+
+def run_benchmark(setup: Callable[[BenchmarkEnvironment], Benchmark], env: BenchmarkEnvironment, repeat: int,
+                  min_time_s: float) -> Dict[str, Any]:
+    """ Runs a benchmark, calling its operation enough times per repetition to take at least min_time_s
+
+    :return: The best and median time per (element) operation, and JVM round trips/commands per operation
+    """
+    op, ops_per_call, cleanup = setup(env)
+    # Warm up (and populate any caches), then calibrate the number of calls per repetition
+    op()
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            op()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time_s / 10 or calls >= 1 << 20:
+            break
+        calls *= 2
+    calls = max(int(calls * min_time_s / max(elapsed, 1e-9)), 1)
+
+    timings = []
+    round_trips = commands = 0
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            env.jvm.reset_counters()
+            start = time.perf_counter()
+            for _ in range(calls):
+                op()
+            if cleanup is not None:
+                cleanup()
+            timings.append((time.perf_counter() - start) / (calls * ops_per_call))
+            round_trips, commands = env.jvm.round_trips, env.jvm.commands
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return {
+        'ops_per_repeat': calls * ops_per_call,
+        'best_us_per_op': min(timings) * 1e6,
+        'median_us_per_op': statistics.median(timings) * 1e6,
+        'ops_per_s': 1 / statistics.median(timings),
+        'round_trips_per_op': round_trips / (calls * ops_per_call),
+        'commands_per_op': commands / (calls * ops_per_call),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(latency_s: float = 50e-6, repeat: int = 5, min_time_s: float = 1.0,
+              name_filter: Optional[str] = None) -> Dict[str, Any]:
+    """
+    :param latency_s: The simulated latency of each JVM round trip
+    :param repeat: The number of timed repetitions of each benchmark
+    :param min_time_s: The minimum duration of each repetition
+    :param name_filter: If set, only benchmarks whose names contain this string are run
+    :return: The JSON-serializable results of the run
+    """
+    # Benchmarks share a single environment, as the bridge's process-wide caches hold references into the (fake) JVM
+    env = BenchmarkEnvironment(latency_s)
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if name_filter is not None and name_filter not in name:
+            continue
+        results[name] = run_benchmark(setup, env, repeat, min_time_s)
+    return {
+        'timestamp': time.time(),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'latency_us': latency_s * 1e6,
+        'benchmarks': results
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """ Compares the median time and round trips per operation of each benchmark present in both runs
+
+    :param threshold: The relative increase in median time beyond which a benchmark is considered to have regressed.
+    Any increase in round trips is considered a regression
+    :return: One comparison per benchmark
+    """
+    ret = []
+    for name, current in results['benchmarks'].items():
+        previous = baseline['benchmarks'].get(name)
+        if previous is None:
+            continue
+        ratio = current['median_us_per_op'] / previous['median_us_per_op']
+        ret.append({
+            'name': name,
+            'baseline_us_per_op': previous['median_us_per_op'],
+            'current_us_per_op': current['median_us_per_op'],
+            'ratio': ratio,
+            'baseline_round_trips_per_op': previous['round_trips_per_op'],
+            'current_round_trips_per_op': current['round_trips_per_op'],
+            'regressed': ratio > 1 + threshold or
+            current['round_trips_per_op'] > previous['round_trips_per_op'] + 1e-9
+        })
+    return ret
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs the bridge benchmarks against a fake JVM")
+    parser.add_argument('--output', default='benchmark_results.json', help="The JSON file to write results to")
+    parser.add_argument('--baseline', help="A results JSON file of a previous run to compare against")
+    parser.add_argument('--latency-us', type=float, default=50, help="The simulated latency of a JVM round trip")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=1.0, help="The minimum duration of each repetition (s)")
+    parser.add_argument('--filter', help="Only runs benchmarks whose names contain this string")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="The relative slowdown versus the baseline considered a regression")
+    args = parser.parse_args()
+
+    results = run_suite(args.latency_us / 1e6, args.repeat, args.min_time, args.filter)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"{'benchmark':<28} {'us/op':>10} {'ops/s':>12} {'round trips/op':>15}")
+    for name, result in results['benchmarks'].items():
+        print(f"{name:<28} {result['median_us_per_op']:>10.2f} {result['ops_per_s']:>12.0f} "
+              f"{result['round_trips_per_op']:>15.2f}")
+
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        comparisons = compare(results, baseline, args.threshold)
+        print(f"\nversus baseline {baseline.get('commit')}:")
+        for comparison in comparisons:
+            print(f"{comparison['name']:<28} {comparison['baseline_us_per_op']:>10.2f} -> "
+                  f"{comparison['current_us_per_op']:>10.2f} us/op ({comparison['ratio']:.2f}x), "
+                  f"{comparison['baseline_round_trips_per_op']:.2f} -> "
+                  f"{comparison['current_round_trips_per_op']:.2f} round trips/op"
+                  f"{'  REGRESSED' if comparison['regressed'] else ''}")
+        if any(comparison['regressed'] for comparison in comparisons):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+"""
+Executes transforms and UDFs entirely in python, without a JVM or Backbone pipeline, for offline batch runs,
+benchmarking, and profiling module code independently of bridge overhead. Rows and schemas are the regular python
+:class:`Row`/:class:`Schema` types, which only require a JVM once converted via to_java()
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+from ohnlp.toolkit.backbone.api import Field, FieldType, RecordingOutputCollector, Row, Schema, Transform, \
+    TypeName, UserDefinedPartitionMappingFunction, _finish_bundle
+from ohnlp.toolkit.backbone import arrow
+
+
+# Schema inference and record conversion
+def _infer_field_type(value: Any) -> FieldType:
+    if isinstance(value, bool):
+        return FieldType.of(TypeName.BOOLEAN)
+    if isinstance(value, int):
+        return FieldType.of(TypeName.INT64)
+    if isinstance(value, float):
+        return FieldType.of(TypeName.DOUBLE)
+    if isinstance(value, bytes):
+        return FieldType.of(TypeName.BYTES)
+    if isinstance(value, dict):
+        return FieldType.of_row(infer_schema(value))
+    if isinstance(value, list):
+        if len(value) == 0:
+            return FieldType.of_arr(FieldType.of(TypeName.STRING))
+        return FieldType.of_arr(_infer_field_type(value[0]))
+    return FieldType.of(TypeName.STRING)
+
+
+def infer_schema(record: Dict[str, Any]) -> Schema:
+    """ Infers a schema (of nullable fields) from the python types of a record's values """
+    return Schema.of([Field.of_nullable(name, _infer_field_type(value)) for name, value in record.items()])
+
+
+def _to_value(field_type: FieldType, value: Any) -> Any:
+    if value is None:
+        return None
+    if field_type.get_type_name() == TypeName.ROW:
+        return record_to_row(field_type.get_field_schema(), value)
+    if field_type.get_type_name() == TypeName.ARRAY:
+        return [_to_value(field_type.get_value_type(), element) for element in value]
+    return value
+
+
+def record_to_row(schema: Schema, record: Dict[str, Any]) -> Row:
+    return Row.of(schema, [_to_value(f.get_type(), record.get(f.get_name())) for f in schema.get_fields()])
+
+
+def _from_value(value: Any) -> Any:
+    if isinstance(value, Row):
+        return row_to_record(value)
+    if isinstance(value, list):
+        return [_from_value(element) for element in value]
+    return value
+
+
+def row_to_record(row: Row) -> Dict[str, Any]:
+    # noinspection PyProtectedMember
+    field_indices = row._get_schema_index().field_indices
+    return {name: _from_value(row.get_value(name)) for name in field_indices}
+
+
+# Input readers
+def read_jsonl(path: str) -> List[Dict[str, Any]]:
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def read_parquet(path: str) -> List[Dict[str, Any]]:
+    # noinspection PyProtectedMember
+    arrow._require_pyarrow()
+    import pyarrow.parquet
+    return pyarrow.parquet.read_table(path).to_pylist()
+
+
+def read_records(path: str) -> List[Dict[str, Any]]:
+    if path.endswith('.parquet'):
+        return read_parquet(path)
+    return read_jsonl(path)
+
+
+# UDF execution
+def _run_partition(args: Tuple[Type[UserDefinedPartitionMappingFunction], Optional[Dict], List[List[Row]]]) \
+        -> List[Tuple[Optional[str], Any]]:
+    udf_cls, config, bundles = args
+    function = udf_cls()
+    function.init_from_driver(config)
+    outputs = []
+    for bundle in bundles:
+        out = RecordingOutputCollector()
+        function.on_bundle_start()
+        function.process_batch(out, bundle)
+        _finish_bundle(function, out)
+        outputs.extend((tag, _from_value(value)) for tag, value in out.outputs)
+    function.on_teardown()
+    return outputs
+
+
+class LocalUDFRunner(object):
+    r"""
+    Runs a UDF over in-memory records, following the same lifecycle as within a pipeline: each partition of the input
+    is handled by its own UDF instance (init_from_driver -> per bundle on_bundle_start/process/on_bundle_finish ->
+    on_teardown), with partitions executed in parallel across a multiprocessing pool.
+    """
+
+    def __init__(self, udf_cls: Type[UserDefinedPartitionMappingFunction], config: Optional[Dict] = None,
+                 bundle_size: int = 1000, num_workers: int = None):
+        """
+        :param udf_cls: The UDF class to run. Must be importable by worker processes
+        :param config: The configuration supplied to init_from_driver
+        :param bundle_size: The number of elements per bundle
+        :param num_workers: The number of worker processes, defaults to the number of CPUs. With a single worker,
+        everything is run within the calling process
+        """
+        self._udf_cls = udf_cls
+        self._config = config
+        self._bundle_size = bundle_size
+        self._num_workers = num_workers if num_workers is not None else os.cpu_count()
+
+    def run_rows(self, rows: List[Row]) -> List[Tuple[Optional[str], Any]]:
+        """ :return: (tag, output) pairs, with the untagged main output having a tag of None """
+        bundles = [rows[i:i + self._bundle_size] for i in range(0, len(rows), self._bundle_size)]
+        num_partitions = max(min(self._num_workers, len(bundles)), 1)
+        partitions = [(self._udf_cls, self._config, bundles[i::num_partitions]) for i in range(num_partitions)]
+        if num_partitions == 1:
+            results = [_run_partition(partitions[0])]
+        else:
+            with multiprocessing.Pool(num_partitions) as pool:
+                results = pool.map(_run_partition, partitions)
+        return [output for result in results for output in result]
+
+    def run(self, records: Iterable[Dict[str, Any]], schema: Schema = None) -> List[Tuple[Optional[str], Any]]:
+        """ Runs the UDF over records, converted to rows of the given schema (or one inferred from the first record)
+
+        :return: (tag, output) pairs, with the untagged main output having a tag of None
+        """
+        records = list(records)
+        if len(records) == 0:
+            return []
+        if schema is None:
+            schema = infer_schema(records[0])
+        return self.run_rows([record_to_row(schema, record) for record in records])
+
+
+# Transform execution
+def describe_transform(transform_cls: Type[Transform], config: Optional[Dict],
+                       input_schemas: Dict[str, Schema]) -> Dict[str, Any]:
+    r"""
+    Initializes a transform and evaluates its schema-level contract (input/output tags and output schemas) in python.
+    Expanding a transform constructs a Beam pipeline and so still requires a JVM.
+
+    :return: The transform's input tags, output tags, and output field names by tag
+    """
+    transform = transform_cls()
+    if config is not None:
+        transform.inject_config(config)
+    transform.init()
+    output_schemas = transform.calculate_output_schema(input_schemas)
+    ret = {
+        'input_tags': transform.get_input_tags(),
+        'output_tags': transform.get_output_tags(),
+        'output_schemas': {tag: [f.get_name() for f in output_schema.get_fields()]
+                           for tag, output_schema in output_schemas.items()}
+    }
+    transform.teardown()
+    return ret
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs a python UDF over JSONL or Parquet records without a JVM")
+    parser.add_argument('udf', help="The UDF class to run, as module:ClassName")
+    parser.add_argument('input', help="The input .jsonl or .parquet file")
+    parser.add_argument('output', help="The output .jsonl file, with one {tag, value} object per output")
+    parser.add_argument('--config', help="A JSON file containing the UDF configuration")
+    parser.add_argument('--bundle-size', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    module_name, class_name = args.udf.split(':')
+    udf_cls = getattr(importlib.import_module(module_name), class_name)
+    config = None
+    if args.config is not None:
+        with open(args.config, 'r') as f:
+            config = json.load(f)
+    runner = LocalUDFRunner(udf_cls, config, args.bundle_size, args.workers)
+    with open(args.output, 'w') as f:
+        for tag, value in runner.run(read_records(args.input)):
+            f.write(json.dumps({'tag': tag, 'value': value}, default=str) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Instrumentation is disabled unless explicitly enabled (typically by the module launcher), in which case the only
+# overhead of instrumented calls is a check of this flag
+_enabled: bool = False
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS: Tuple[float, ...] = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                                      0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+# (metric name, labels, value) triples supplied by other subsystems at export time
+Sample = Tuple[str, Dict[str, str], float]
+
+# The instance label of the metrics of torn down instances, which are folded together so that the number of labelled
+# series is bounded by the number of live instances rather than growing with every instance ever created
+RETIRED_INSTANCE = 'retired'
+# Entry points after which the instance they were called for no longer exists
+_TEARDOWN_ENTRY_POINTS = ('call_transform_teardown', 'call_udf_on_teardown')
+
+
+class Histogram(object):
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts: List[int] = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        for idx, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[idx] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+    def merge(self, other: Histogram):
+        self.counts = [count + other_count for count, other_count in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+
+
+class BridgeMetrics(object):
+    """ Bridge-wide call counts, latencies, and JVM round trip counts, labelled by entry point and instance UID,
+    along with the latencies of the phases of pipeline construction calls, labelled by phase and instance UID. The
+    metrics of an instance are labelled by its UID until it is torn down, and by :data:`RETIRED_INSTANCE` thereafter """
+
+    def __init__(self):
+        # Reentrant, as garbage collection while the lock is held can run py4j finalizers, whose commands to the JVM
+        # are counted as round trips. Round trips are therefore only iterated over via copies of round_trips
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self.call_latencies: Dict[Tuple[str, str], Histogram] = {}
+        self.phase_latencies: Dict[Tuple[str, str], Histogram] = {}
+        self.round_trips: Dict[Tuple[str, str], int] = {}
+        self._collectors: List[Callable[[], List[Sample]]] = []
+
+    @property
+    def current_instance(self) -> str:
+        return getattr(self._local, 'instance', '')
+
+    @current_instance.setter
+    def current_instance(self, instance_uid: str):
+        self._local.instance = instance_uid
+
+    def _observe(self, histograms: Dict[Tuple[str, str], Histogram], key: Tuple[str, str], duration_s: float):
+        with self._lock:
+            histogram = histograms.get(key)
+            if histogram is None:
+                histogram = Histogram()
+                histograms[key] = histogram
+            histogram.observe(duration_s)
+
+    def observe_call(self, entry_point: str, instance_uid: str, duration_s: float):
+        self._observe(self.call_latencies, (entry_point, instance_uid), duration_s)
+
+    def observe_phase(self, phase: str, instance_uid: str, duration_s: float):
+        self._observe(self.phase_latencies, (phase, instance_uid), duration_s)
+
+    def count_round_trip(self, java_method: str, count: int = 1):
+        key = (self.current_instance, java_method)
+        with self._lock:
+            self.round_trips[key] = self.round_trips.get(key, 0) + count
+
+    def retire_instance(self, instance_uid: str):
+        """ Folds the metrics of a torn down instance into those of :data:`RETIRED_INSTANCE`, keeping totals across
+        instances intact """
+        with self._lock:
+            for histograms in (self.call_latencies, self.phase_latencies):
+                for name, uid in [key for key in histograms if key[1] == instance_uid]:
+                    histogram = histograms.pop((name, uid))
+                    retired = histograms.get((name, RETIRED_INSTANCE))
+                    if retired is None:
+                        histograms[(name, RETIRED_INSTANCE)] = histogram
+                    else:
+                        retired.merge(histogram)
+            for uid, java_method in [key for key in self.round_trips.copy() if key[0] == instance_uid]:
+                count = self.round_trips.pop((uid, java_method))
+                key = (RETIRED_INSTANCE, java_method)
+                self.round_trips[key] = self.round_trips.get(key, 0) + count
+
+    def register_collector(self, collector: Callable[[], List[Sample]]):
+        """ Registers a callable supplying additional samples (e.g. cache statistics) on each export """
+        self._collectors.append(collector)
+
+    def collect(self) -> List[Sample]:
+        ret: List[Sample] = []
+        for collector in self._collectors:
+            ret.extend(collector())
+        return ret
+
+    # Exporters
+    @staticmethod
+    def _histograms_to_json(label: str, histograms: Dict[Tuple[str, str], Histogram]) -> List[Dict[str, Any]]:
+        return [{
+            label: name,
+            'instance': instance_uid,
+            'count': histogram.count,
+            'sum_s': histogram.sum,
+            'buckets': {str(bound): count for bound, count in zip(histogram.buckets, histogram.counts)}
+        } for (name, instance_uid), histogram in histograms.items()]
+
+    @staticmethod
+    def _histograms_to_prometheus(lines: List[str], metric: str, label: str,
+                                  histograms: Dict[Tuple[str, str], Histogram]):
+        lines.append(f'# TYPE {metric} histogram')
+        for (name, instance_uid), histogram in histograms.items():
+            labels = f'{label}="{name}",instance="{instance_uid}"'
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{{labels}}} {histogram.sum}')
+            lines.append(f'{metric}_count{{{labels}}} {histogram.count}')
+
+    def to_json(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = self._histograms_to_json('entry_point', self.call_latencies)
+            phases = self._histograms_to_json('phase', self.phase_latencies)
+            round_trips = [{'instance': instance_uid, 'java_method': java_method, 'count': count}
+                           for (instance_uid, java_method), count in self.round_trips.copy().items()]
+        return {
+            'timestamp': time.time(),
+            'calls': calls,
+            'construction_phases': phases,
+            'jvm_round_trips': round_trips,
+            'samples': [{'name': name, 'labels': labels, 'value': value} for name, labels, value in self.collect()]
+        }
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            self._histograms_to_prometheus(lines, 'ohnlp_bridge_call_duration_seconds', 'entry_point',
+                                           self.call_latencies)
+            self._histograms_to_prometheus(lines, 'ohnlp_bridge_construction_phase_duration_seconds', 'phase',
+                                           self.phase_latencies)
+            lines.append('# TYPE ohnlp_bridge_jvm_round_trips_total counter')
+            for (instance_uid, java_method), count in self.round_trips.copy().items():
+                lines.append(f'ohnlp_bridge_jvm_round_trips_total{{instance="{instance_uid}",'
+                             f'java_method="{java_method}"}} {count}')
+        for name, labels, value in self.collect():
+            label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+            if label_str:
+                lines.append(f'ohnlp_bridge_{name}{{{label_str}}} {value}')
+            else:
+                lines.append(f'ohnlp_bridge_{name} {value}')
+        return "\n".join(lines) + "\n"
+
+
+bridge_metrics = BridgeMetrics()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def instrumented(func):
+    """ Instruments a bridge entry point whose first argument (if any) is the UID of the component/UDF instance
+    being called """
+    entry_point = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if not _enabled:
+            return func(self, *args, **kwargs)
+        instance_uid = args[0] if len(args) > 0 and isinstance(args[0], str) else ''
+        previous_instance = bridge_metrics.current_instance
+        bridge_metrics.current_instance = instance_uid
+        start = time.perf_counter()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            bridge_metrics.observe_call(entry_point, instance_uid, time.perf_counter() - start)
+            bridge_metrics.current_instance = previous_instance
+            if entry_point in _TEARDOWN_ENTRY_POINTS and instance_uid != '':
+                bridge_metrics.retire_instance(instance_uid)
+
+    return wrapper
+
+
+@contextmanager
+def timed_phase(phase: str):
+    """ Times a phase of a pipeline construction call, attributed to the instance whose call is being handled """
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        bridge_metrics.observe_phase(phase, bridge_metrics.current_instance, time.perf_counter() - start)
+
+
+def _java_method_of(command: str) -> str:
+    # py4j commands are newline-delimited, with the command type first, and for calls the method name third
+    parts = command.split("\n", 3)
+    if parts[0] == 'c' and len(parts) > 2:
+        return parts[2]
+    return parts[0]
+
+
+def install(gateway):
+    """ Counts every command sent to the JVM through the given gateway as a JVM round trip """
+    # noinspection PyProtectedMember
+    gateway_client = gateway._gateway_client
+    send_command = gateway_client.send_command
+
+    def counting_send_command(command, *args, **kwargs):
+        if _enabled:
+            bridge_metrics.count_round_trip(_java_method_of(command))
+        return send_command(command, *args, **kwargs)
+
+    gateway_client.send_command = counting_send_command
+
+
+class MetricsExporter(object):
+    """ Periodically writes bridge metrics to a Prometheus textfile or JSON file """
+
+    def __init__(self, path: str, fmt: str = 'prometheus', interval_s: float = 10):
+        if fmt not in ('prometheus', 'json'):
+            raise ValueError(f"Unknown metrics format {fmt}, expected one of prometheus or json")
+        self._path = path
+        self._fmt = fmt
+        self._interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def write(self):
+        content = bridge_metrics.to_prometheus() if self._fmt == 'prometheus' else json.dumps(bridge_metrics.to_json())
+        # Write atomically so that scrapers never observe a partially written file
+        tmp_path = self._path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(content)
+        os.replace(tmp_path, self._path)
+
+    def _run(self):
+        while not self._stop.wait(self._interval_s):
+            self.write()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="ohnlp-metrics-exporter", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.write()
+
+
+def enable(gateway, path: str, fmt: str = 'prometheus', interval_s: float = 10) -> MetricsExporter:
+    """ Enables bridge instrumentation and starts periodically exporting metrics
+
+    :param gateway: The bridge's gateway, through which JVM round trips are counted
+    :param path: The file to export to
+    :param fmt: prometheus (textfile collector format) or json
+    :param interval_s: The interval between exports
+    :return: The started exporter
+    """
+    global _enabled
+    install(gateway)
+    _enabled = True
+    exporter = MetricsExporter(path, fmt, interval_s)
+    exporter.start()
+    return exporter
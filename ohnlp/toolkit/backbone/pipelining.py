@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+from py4j import protocol as proto
+from py4j.java_gateway import JavaClass, JavaObject
+from py4j.protocol import Py4JNetworkError, get_command_part, get_return_value, is_python_proxy, smart_decode
+
+from ohnlp.toolkit.backbone import metrics, profiling
+
+
+def _read_answer(connection) -> str:
+    answer = smart_decode(connection.stream.readline()[:-1])
+    if answer.strip() == "":
+        raise Py4JNetworkError("Answer from Java side is empty")
+    if answer.startswith(proto.RETURN_MESSAGE):
+        answer = answer[1:]
+    return answer
+
+
+def send_pipelined(gateway_client, commands: List[str]) -> List[str]:
+    """Sends several py4j protocol commands to the JVM in a single write, then reads back all of their answers.
+
+    The py4j java side processes the commands of a connection strictly in order, so this costs one round trip
+    rather than one per command. Only commands that can never call back into python (e.g. plain java collection
+    or reference bookkeeping calls) may be pipelined, as a callback would be interleaved with the pending commands.
+
+    :param gateway_client: The gateway client (i.e. gateway._gateway_client) to send through
+    :param commands: The py4j protocol commands to send
+    :return: The raw py4j protocol answers, in command order
+    """
+    if len(commands) == 0:
+        return []
+    if metrics.is_enabled():
+        metrics.bridge_metrics.count_round_trip('pipelined')
+    connection = gateway_client._get_connection()
+    try:
+        # Timed here as the send bypasses the gateway client's send_command, which profiling instruments
+        with profiling.jvm_call():
+            answers = [connection.send_command("".join(commands))]
+            for _ in range(len(commands) - 1):
+                answers.append(_read_answer(connection))
+    except Exception as e:
+        # The stream is no longer aligned with the commands sent, so the connection cannot be reused
+        connection.close(True)
+        if isinstance(e, Py4JNetworkError):
+            raise
+        raise Py4JNetworkError("Error while sending or receiving pipelined commands", e, proto.ERROR_ON_RECEIVE)
+    gateway_client._give_back_connection(connection)
+    return answers
+
+
+def _target_id_of(java_obj) -> str:
+    if isinstance(java_obj, JavaClass):
+        # Static methods are called on the class
+        return proto.STATIC_PREFIX + java_obj._fqn
+    return java_obj._target_id
+
+
+def _convert_arg(gateway_client, arg: Any) -> Any:
+    # Mirrors the argument conversion of py4j's own method calls (e.g. of python lists to java lists), which only
+    # applies if the gateway was started with auto_convert
+    if gateway_client.converters is None or isinstance(arg, JavaObject):
+        return arg
+    for converter in gateway_client.converters:
+        if converter.can_convert(arg):
+            return converter.convert(arg, gateway_client)
+    return arg
+
+
+def _command_part(arg: Any, pool) -> str:
+    if isinstance(arg, JavaObject):
+        # py4j's get_command_part first checks whether the argument is a python proxy via hasattr(arg, 'Java'), which
+        # costs a field lookup round trip for java objects if the gateway was started with auto_field
+        return proto.REFERENCE_TYPE + arg._get_object_id() + "\n"
+    return get_command_part(arg, pool)
+
+
+def is_convertible(gateway_client, arg: Any) -> bool:
+    """
+    :param gateway_client: The gateway client (i.e. gateway._gateway_client) the argument would be sent through
+    :param arg: The argument to check
+    :return: Whether the argument can be passed to java methods, i.e. is a primitive, a java object or python proxy,
+    or is converted to one by the gateway's converters (auto_convert)
+    """
+    if arg is None or isinstance(arg, (bool, int, float, Decimal, str, bytes, bytearray)):
+        return True
+    if isinstance(arg, JavaObject) or is_python_proxy(arg) or hasattr(arg, '_get_object_id'):
+        return True
+    return gateway_client.converters is not None and any(
+        converter.can_convert(arg) for converter in gateway_client.converters)
+
+
+def call_pipelined(gateway_client, calls: Sequence[Tuple[Any, str, Sequence[Any]]]) -> List[Any]:
+    """Invokes several java methods in a single round trip. See :func:`send_pipelined` for restrictions.
+
+    :param gateway_client: The gateway client (i.e. gateway._gateway_client) to send through
+    :param calls: (java object, method name, arguments) triples, where java classes (JavaClass) may be given to call
+    their static methods. Arguments must be primitives or java objects, or python collections if the gateway converts
+    them (auto_convert), in which case each collection costs round trips of its own to convert
+    :return: The (python-converted) return values, in call order
+    """
+    pool = gateway_client.gateway_property.pool
+    commands = []
+    target_ids = []
+    for java_obj, method_name, args in calls:
+        target_id = _target_id_of(java_obj)
+        args_command = "".join(_command_part(_convert_arg(gateway_client, arg), pool) for arg in args)
+        commands.append(proto.CALL_COMMAND_NAME + target_id + "\n" + method_name + "\n" +
+                        args_command + proto.END_COMMAND_PART)
+        target_ids.append(target_id)
+    answers = send_pipelined(gateway_client, commands)
+    return [get_return_value(answer, gateway_client, target_id, method_name)
+            for answer, target_id, (_, method_name, _) in zip(answers, target_ids, calls)]
+
+
+def call_static(gateway_client, fqn: str, method_name: str, *args) -> Any:
+    """Invokes a static java method in a single round trip. Calls through py4j's JVM view or JavaClass instead first
+    resolve every package of the class name and then the method through reflection, one round trip each.
+
+    :param gateway_client: The gateway client (i.e. gateway._gateway_client) to send through
+    :param fqn: The fully qualified (binary) name of the class, e.g. org.apache.beam.sdk.schemas.Schema$Field
+    :param method_name: The name of the static method
+    :param args: The primitive or java object arguments
+    :return: The (python-converted) return value
+    """
+    return call_pipelined(gateway_client, [(JavaClass(fqn, gateway_client), method_name, args)])[0]
+
+
+def to_java_list(gateway_client, values: Sequence[Any]):
+    """Builds a java ArrayList of the given values in two round trips regardless of the number of values, in
+    contrast to py4j's ListConverter which costs one round trip per element.
+
+    :param gateway_client: The gateway client (i.e. gateway._gateway_client) to create the list through
+    :param values: The primitive or java object values to add to the list
+    :return: The java list
+    """
+    java_list = JavaClass("java.util.ArrayList", gateway_client)(len(values))
+    call_pipelined(gateway_client, [(java_list, "add", (value,)) for value in values])
+    return java_list
+
+
+def from_java_list(gateway_client, java_list) -> List[Any]:
+    """Reads every element of a java list in two round trips regardless of the number of elements, in contrast to
+    iterating py4j's JavaList which costs one round trip per element.
+
+    :param gateway_client: The gateway client (i.e. gateway._gateway_client) the list belongs to
+    :param java_list: The java list to read
+    :return: The elements of the list
+    """
+    size = call_pipelined(gateway_client, [(java_list, "size", ())])[0]
+    return call_pipelined(gateway_client, [(java_list, "get", (idx,)) for idx in range(size)])
+
+
+def from_java_map(gateway_client, java_map) -> Dict[Any, Any]:
+    """Reads every entry of a java map in a constant number of round trips, in contrast to iterating py4j's JavaMap
+    which costs two round trips per entry.
+
+    :param gateway_client: The gateway client (i.e. gateway._gateway_client) the map belongs to
+    :param java_map: The java map to read
+    :return: The entries of the map
+    """
+    key_set, size = call_pipelined(gateway_client, [(java_map, "keySet", ()), (java_map, "size", ())])
+    if size == 0:
+        return {}
+    iterator = key_set.iterator()
+    keys = call_pipelined(gateway_client, [(iterator, "next", ())] * size)
+    values = call_pipelined(gateway_client, [(java_map, "get", (key,)) for key in keys])
+    return dict(zip(keys, values))
+
+
+def to_java_map(gateway_client, values: Mapping[Any, Any]):
+    """Builds a java HashMap of the given entries in two round trips regardless of the number of entries.
+
+    :param gateway_client: The gateway client (i.e. gateway._gateway_client) to create the map through
+    :param values: The entries, with primitive or java object keys and values
+    :return: The java map
+    """
+    java_map = JavaClass("java.util.HashMap", gateway_client)()
+    call_pipelined(gateway_client, [(java_map, "put", (key, value)) for key, value in values.items()])
+    return java_map
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Profiling is disabled unless explicitly enabled (typically by the module launcher)
+_config: Optional[BundleProfilingConfig] = None
+
+
+class BundleProfilingConfig(object):
+    def __init__(self, udf_uid: str, every_n_bundles: int, output_dir: str):
+        self.udf_uid = udf_uid.lower()
+        self.every_n_bundles = max(every_n_bundles, 1)
+        self.output_dir = output_dir
+
+
+class _BundleProfile(object):
+    """ The profile of a single bundle of a single UDF instance """
+
+    def __init__(self, udf_uid: str, bundle_num: int):
+        self.udf_uid = udf_uid
+        self.bundle_num = bundle_num
+        self.profiler = cProfile.Profile()
+        self.start = time.perf_counter()
+        self.in_bridge_calls_s = 0.0
+        self.jvm_calls_s = 0.0
+
+
+# Bundle counts by UDF instance UID, and the (at most one, as cProfile profilers cannot be nested) active profile
+_bundle_counts: Dict[str, int] = {}
+_active_instance: Optional[str] = None
+_active_profile: Optional[_BundleProfile] = None
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def enable(gateway, udf_uid: str, every_n_bundles: int = 100, output_dir: str = '.'):
+    """ Profiles every Nth bundle of every instance of the given UDF, writing a cProfile pstats file plus a JSON
+    summary of the bundle's time split between python and waiting on the JVM for each profiled bundle
+
+    :param gateway: The bridge's gateway, through which time spent on calls to the JVM is measured
+    :param udf_uid: The UDF UID (as declared via @FunctionIdentifier) to profile
+    :param every_n_bundles: The interval between profiled bundles of each instance
+    :param output_dir: The directory to write profiles to
+    """
+    global _config
+    os.makedirs(output_dir, exist_ok=True)
+    # noinspection PyProtectedMember
+    gateway_client = gateway._gateway_client
+    send_command = gateway_client.send_command
+
+    def timed_send_command(command, *args, **kwargs):
+        with jvm_call():
+            return send_command(command, *args, **kwargs)
+
+    gateway_client.send_command = timed_send_command
+    _config = BundleProfilingConfig(udf_uid, every_n_bundles, output_dir)
+
+
+@contextmanager
+def jvm_call():
+    """ Attributes the time spent within the block to calls to the JVM, if the current thread is handling a call of
+    a profiled bundle. Used for the sends bypassing the gateway client (i.e. pipelined sends) """
+    profile = getattr(_local, 'profile', None)
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.jvm_calls_s += time.perf_counter() - start
+
+
+def _start(instance_uid: str, udf_uid: str):
+    global _active_instance, _active_profile
+    # A profile still active for this instance is of a bundle that never finished
+    _discard(instance_uid)
+    with _lock:
+        bundle_num = _bundle_counts.get(instance_uid, 0) + 1
+        _bundle_counts[instance_uid] = bundle_num
+        if bundle_num % _config.every_n_bundles != 0 or _active_profile is not None:
+            return
+        _active_instance = instance_uid
+        _active_profile = _BundleProfile(udf_uid, bundle_num)
+    _active_profile.profiler.enable()
+
+
+def _discard(instance_uid: str):
+    """ Discards the active profile (if of the given instance) without writing it, e.g. as its bundle failed """
+    global _active_instance, _active_profile
+    with _lock:
+        if _active_instance != instance_uid:
+            return
+        profile = _active_profile
+        _active_instance = None
+        _active_profile = None
+    profile.profiler.disable()
+
+
+def _finish(instance_uid: str):
+    global _active_instance, _active_profile
+    with _lock:
+        if _active_instance != instance_uid:
+            return
+        profile = _active_profile
+        _active_instance = None
+        _active_profile = None
+    profile.profiler.disable()
+    wall_s = time.perf_counter() - profile.start
+    file_prefix = os.path.join(_config.output_dir, f"profile_{profile.udf_uid}_bundle_{profile.bundle_num}")
+    profile.profiler.dump_stats(file_prefix + '.pstats')
+    with open(file_prefix + '.json', 'w') as f:
+        json.dump({
+            'udf_uid': profile.udf_uid,
+            'instance_uid': instance_uid,
+            'bundle': profile.bundle_num,
+            'wall_s': wall_s,
+            # Time spent executing python within bridge calls, excluding the calls made back out to the JVM
+            'python_s': profile.in_bridge_calls_s - profile.jvm_calls_s,
+            # Time spent within bridge calls waiting on calls made back out to the JVM
+            'jvm_calls_s': profile.jvm_calls_s,
+            # Time spent between bridge calls, i.e. waiting on the JVM to supply the next element
+            'bridge_wait_s': wall_s - profile.in_bridge_calls_s
+        }, f)
+
+
+def profiled(func):
+    """ Attributes the time of a UDF bundle lifecycle entry point whose first argument is the UDF instance UID to the
+    profile of that instance's current bundle, if profiled. Bundle start and finish entry points begin and end
+    the profile respectively, while a failed call discards it, as the bundle is then abandoned. Teardown forgets
+    the instance """
+    entry_point = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(self, udf_uid: str, *args, **kwargs):
+        if _config is None:
+            return func(self, udf_uid, *args, **kwargs)
+        if entry_point == 'call_udf_on_teardown':
+            try:
+                return func(self, udf_uid, *args, **kwargs)
+            finally:
+                _discard(udf_uid.lower())
+                with _lock:
+                    _bundle_counts.pop(udf_uid.lower(), None)
+        if entry_point == 'call_udf_on_bundle_start':
+            function = self.check_and_get_active_function(udf_uid)
+            if str(function.toolkit_component_uid).lower() == _config.udf_uid:
+                _start(udf_uid.lower(), _config.udf_uid)
+        profile = _active_profile if _active_instance == udf_uid.lower() else None
+        if profile is None:
+            return func(self, udf_uid, *args, **kwargs)
+        _local.profile = profile
+        start = time.perf_counter()
+        try:
+            ret = func(self, udf_uid, *args, **kwargs)
+        except BaseException:
+            _discard(udf_uid.lower())
+            raise
+        finally:
+            profile.in_bridge_calls_s += time.perf_counter() - start
+            _local.profile = None
+        if entry_point == 'call_udf_on_bundle_finish':
+            _finish(udf_uid.lower())
+        return ret
+
+    return wrapper
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from py4j import protocol as proto
+from py4j.finalizer import ThreadSafeFinalizer
+from py4j.java_gateway import JavaObject
+from py4j.protocol import Py4JError, smart_decode
+
+from ohnlp.toolkit.backbone import metrics, pipelining
+
+# The arena (if any) tracking java references handed to python during the bridge call handled by the current thread
+_local = threading.local()
+# Every arena that has not yet been garbage collected, for live proxy metrics
+_arenas: weakref.WeakSet = weakref.WeakSet()
+_lock = threading.Lock()
+_released_total = 0
+
+
+class ReferenceArena(object):
+    r"""
+    The java references handed to a single UDF instance within its current bundle.
+
+    py4j normally tells the JVM to drop its side of every proxy individually once the python proxy is garbage
+    collected, i.e. one extra message per row, process context, and nested value of every element. Proxies adopted by
+    an arena instead have their individual finalizers removed, and are released all at once in a single round trip
+    when the bundle finishes. Adopted proxies must therefore not be used after their bundle finishes
+    """
+
+    def __init__(self, gateway_client, instance_uid: str = ''):
+        """
+        :param gateway_client: The gateway client (i.e. gateway._gateway_client) the adopted proxies belong to
+        :param instance_uid: The UDF instance UID the arena belongs to, used to label metrics
+        """
+        self._gateway_client = gateway_client
+        self._key_prefix = smart_decode(gateway_client.address) + smart_decode(gateway_client.port)
+        # Used as an insertion-ordered set
+        self._target_ids: Dict[str, None] = {}
+        self.instance_uid = instance_uid
+        with _lock:
+            _arenas.add(self)
+
+    def adopt(self, java_obj: Any) -> Any:
+        """ Moves responsibility for releasing the JVM side of a proxy to this arena. Values that are not proxies of
+        this arena's gateway are ignored
+
+        :param java_obj: The proxy to adopt
+        :return: The proxy
+        """
+        # noinspection PyProtectedMember
+        if not isinstance(java_obj, JavaObject) or java_obj._gateway_client is not self._gateway_client \
+                or not self._gateway_client.gateway_property.enable_memory_management:
+            return java_obj
+        # noinspection PyProtectedMember
+        target_id = java_obj._target_id
+        if target_id not in self._target_ids:
+            ThreadSafeFinalizer.remove_finalizer(self._key_prefix + target_id)
+            self._target_ids[target_id] = None
+        return java_obj
+
+    def release(self):
+        """ Releases the JVM side of every adopted proxy in a single round trip """
+        global _released_total
+        if len(self._target_ids) == 0:
+            return
+        target_ids = list(self._target_ids)
+        self._target_ids = {}
+        if not self._gateway_client.is_connected:
+            return
+        try:
+            pipelining.send_pipelined(self._gateway_client, [
+                proto.MEMORY_COMMAND_NAME + proto.MEMORY_DEL_SUBCOMMAND_NAME + target_id + "\n" +
+                proto.END_COMMAND_PART for target_id in target_ids
+            ])
+        except Py4JError as e:
+            # Mirrors py4j's own finalizers, for which a failure to release only leaks the JVM side of the proxies
+            print(f"Failed to release {len(target_ids)} java references of {self.instance_uid}: {e}")
+            return
+        with _lock:
+            _released_total += len(target_ids)
+
+    def __len__(self):
+        return len(self._target_ids)
+
+
+@contextmanager
+def bind(arena: Optional[ReferenceArena]):
+    """ Makes the given arena the one :func:`track` adopts into on the current thread for the duration of the block """
+    previous = getattr(_local, 'arena', None)
+    _local.arena = arena
+    try:
+        yield arena
+    finally:
+        _local.arena = previous
+
+
+def track(java_obj: Any) -> Any:
+    """ Adopts a proxy into the arena bound to the current thread, if any
+
+    :param java_obj: The proxy (or any other value, which is ignored)
+    :return: The proxy
+    """
+    arena = getattr(_local, 'arena', None)
+    if arena is not None:
+        arena.adopt(java_obj)
+    return java_obj
+
+
+def _collect() -> List[metrics.Sample]:
+    with _lock:
+        arenas = list(_arenas)
+        released_total = _released_total
+    return [
+        # Every proxy of this process whose JVM side is released individually by py4j when garbage collected
+        ('java_proxies_live', {}, len(ThreadSafeFinalizer.finalizers)),
+        ('bundle_arena_released_total', {}, released_total)
+    ] + [('bundle_arena_proxies', {'instance': arena.instance_uid}, len(arena)) for arena in arenas]
+
+
+metrics.bridge_metrics.register_collector(_collect)
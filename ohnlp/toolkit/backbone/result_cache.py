@@ -0,0 +1,192 @@
+"""
+An on-disk cache of the outputs of deterministic UDFs by input, so that reprocessing unchanged inputs (e.g. rerunning
+a pipeline over a mostly unchanged corpus) replays the outputs of the previous run rather than processing them again.
+The cache is a size-bounded SQLite database that may be shared by every bridge (and worker) process of a host, with
+the least recently used results evicted first once the size bound is exceeded.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from ohnlp.toolkit.backbone import metrics
+
+# (tag, output) pairs, with the untagged main output having a tag of None
+Outputs = List[Tuple[Optional[str], Any]]
+
+
+class ResultCache(object):
+    def __init__(self, path: str, max_bytes: int = 1024 * 1024 * 1024):
+        """
+        :param path: The SQLite database file to store results within
+        :param max_bytes: The size bound of stored results, beyond which the least recently used are evicted
+        """
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS results ('
+                         'key BLOB PRIMARY KEY, outputs BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)')
+        # A running total of the size of stored results, so that inserts need not scan the table. The database may be
+        # shared with other processes whose writes the total does not see, so it is resynchronized with the table
+        # before evicting and whenever this process has written a tenth of the size bound since the last resync
+        self._size_total = 0
+        self._written_since_sync = 0
+        self._sync_size()
+
+    def get(self, key: bytes) -> Optional[Outputs]:
+        with self._lock:
+            row = self._db.execute('SELECT outputs FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute('UPDATE results SET last_used = ? WHERE key = ?', (time.time(), key))
+        return pickle.loads(row[0])
+
+    def put(self, key: bytes, outputs: Outputs):
+        payload = pickle.dumps(outputs, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            replaced = self._db.execute('SELECT size FROM results WHERE key = ?', (key,)).fetchone()
+            self._db.execute('INSERT OR REPLACE INTO results (key, outputs, size, last_used) VALUES (?, ?, ?, ?)',
+                             (key, payload, len(payload), time.time()))
+            self._size_total += len(payload) - (replaced[0] if replaced is not None else 0)
+            self._written_since_sync += len(payload)
+            if self._written_since_sync >= self._max_bytes * 0.1:
+                self._sync_size()
+            if self._size_total > self._max_bytes:
+                self._sync_size()
+                if self._size_total > self._max_bytes:
+                    self._evict()
+
+    def _sync_size(self):
+        self._size_total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        self._written_since_sync = 0
+
+    def _evict(self):
+        # Evicts down to 90% of the size bound, so that eviction is not triggered again by the next insert
+        target = self._max_bytes * 0.9
+        excess = self._size_total - target
+        evicted = 0
+        keys = []
+        for key, size in self._db.execute('SELECT key, size FROM results ORDER BY last_used'):
+            if evicted >= excess:
+                break
+            keys.append(key)
+            evicted += size
+        self._db.executemany('DELETE FROM results WHERE key = ?', [(key,) for key in keys])
+        self._size_total -= evicted
+
+    @property
+    def size_bytes(self) -> int:
+        """ :return: The size of stored results as of this process' last write or resync """
+        with self._lock:
+            return self._size_total
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class ResultCacheStats(object):
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.uncacheable = 0
+
+
+# The result cache is disabled unless explicitly enabled (typically by the module launcher)
+_cache: Optional[ResultCache] = None
+# Lookup statistics by UDF UID (as declared via @FunctionIdentifier), updated and read under _stats_lock as lookups
+# may be made concurrently by several threads (e.g. asynchronous UDFs)
+_stats: Dict[str, ResultCacheStats] = {}
+_stats_lock = threading.Lock()
+
+
+def enable(path: str, max_bytes: int = 1024 * 1024 * 1024):
+    """ Caches the outputs of UDFs declared deterministic within the given SQLite database file
+
+    :param path: The database file, which may be shared with other processes
+    :param max_bytes: The size bound of stored results
+    """
+    global _cache
+    _cache = ResultCache(path, max_bytes)
+
+
+def is_enabled() -> bool:
+    return _cache is not None
+
+
+def scope_of(udf_uid: str, version: str, config_hash: str) -> str:
+    """ :return: The part of cache keys identifying a UDF, its implementation version, and its configuration """
+    return f"{udf_uid.lower()}:{version}:{config_hash}"
+
+
+def key_of(scope: str, content: Any) -> bytes:
+    """ :return: The cache key of an input of a UDF, given a picklable representation of the input's content """
+    digest = hashlib.sha256(scope.encode('utf-8'))
+    digest.update(pickle.dumps(content, protocol=4))
+    return digest.digest()
+
+
+def _get_stats(udf_uid: str) -> ResultCacheStats:
+    """ Must be called with _stats_lock held """
+    stats = _stats.get(udf_uid)
+    if stats is None:
+        stats = _stats[udf_uid] = ResultCacheStats()
+    return stats
+
+
+def lookup(udf_uid: str, key: bytes) -> Optional[Outputs]:
+    """ :return: The cached outputs of the input with the given key, or None on a cache miss """
+    outputs = _cache.get(key)
+    with _stats_lock:
+        stats = _get_stats(udf_uid)
+        if outputs is None:
+            stats.misses += 1
+        else:
+            stats.hits += 1
+    return outputs
+
+
+def store(udf_uid: str, key: bytes, outputs: Outputs):
+    try:
+        _cache.put(key, outputs)
+    except (pickle.PicklingError, TypeError, ValueError, AttributeError):
+        # Outputs that cannot leave the bridge process (e.g. references to arbitrary java objects) are never cached
+        mark_uncacheable(udf_uid)
+
+
+def mark_uncacheable(udf_uid: str):
+    """ Records that the outputs of an input of a UDF could not be cached, e.g. as the input could not be keyed """
+    with _stats_lock:
+        _get_stats(udf_uid).uncacheable += 1
+
+
+def _collect() -> List[metrics.Sample]:
+    if _cache is None:
+        return []
+    ret: List[metrics.Sample] = [('result_cache_bytes', {}, _cache.size_bytes)]
+    with _stats_lock:
+        stats_by_udf = [(udf_uid, stats.hits, stats.misses, stats.uncacheable) for udf_uid, stats in _stats.items()]
+    for udf_uid, hits, misses, uncacheable in stats_by_udf:
+        labels = {'udf': udf_uid}
+        lookups = hits + misses
+        ret.extend([
+            ('result_cache_hits_total', labels, hits),
+            ('result_cache_misses_total', labels, misses),
+            ('result_cache_uncacheable_total', labels, uncacheable),
+            ('result_cache_hit_ratio', labels, hits / lookups if lookups > 0 else 0.0)
+        ])
+    return ret
+
+
+metrics.bridge_metrics.register_collector(_collect)
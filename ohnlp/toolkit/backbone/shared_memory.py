@@ -0,0 +1,288 @@
+"""
+An out-of-band channel through which large STRING and BYTES row values are exchanged with the JVM via memory-mapped
+files (within /dev/shm, i.e. POSIX shared memory, where available) rather than through the py4j text protocol, which
+escapes strings and base64-encodes bytes.
+
+A value within the channel is passed in place of the actual value as a handle of the same type (a str for STRING
+fields and UTF-8 encoded bytes for BYTES fields) of the form ``\\0ohnlp-shm\\0<offset>:<length>:<path>``, referring to
+the length bytes (UTF-8 text for STRING fields) at the given offset of the file at path.
+
+The contract with the JVM side of the bridge is that:
+
+- The JVM may substitute a handle for any STRING or BYTES value of a row passed to python. The referenced bytes must
+  remain unmodified until the bundle the row was passed in finishes.
+- Once enabled via :func:`enable` (which the module launcher advertises within the bridge metadata file), python
+  substitutes handles for output values of at least the configured threshold. These refer to segments owned by python
+  that are only valid until the bridge call emitting them returns, so the JVM resolves them as outputs are received.
+"""
+
+from __future__ import annotations
+
+import atexit
+import mmap
+import os
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+HANDLE_PREFIX = '\0ohnlp-shm\0'
+_HANDLE_PREFIX_BYTES = HANDLE_PREFIX.encode('utf-8')
+
+
+def is_handle(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.startswith(HANDLE_PREFIX)
+    if isinstance(value, bytes):
+        return value.startswith(_HANDLE_PREFIX_BYTES)
+    return False
+
+
+def _parse_handle(handle: str) -> Tuple[str, int, int]:
+    offset, length, path = handle[len(HANDLE_PREFIX):].split(':', 2)
+    return path, int(offset), int(length)
+
+
+def _format_handle(path: str, offset: int, length: int) -> str:
+    return f"{HANDLE_PREFIX}{offset}:{length}:{path}"
+
+
+class SharedText(object):
+    r"""
+    A STRING value held within the shared memory channel, decoded from the underlying UTF-8 bytes on first use.
+    Behaves as the str it holds for comparisons, hashing, and str methods, and str(value) returns a plain str
+    """
+    __slots__ = ('handle', 'view', '_text')
+
+    def __init__(self, handle: str, view: memoryview):
+        """
+        :param handle: The handle the value was received as
+        :param view: The UTF-8 bytes of the value
+        """
+        self.handle = handle
+        self.view = view
+        self._text: Optional[str] = None
+
+    def __str__(self):
+        if self._text is None:
+            self._text = str(self.view, 'utf-8')
+        return self._text
+
+    def __repr__(self):
+        return repr(str(self))
+
+    def __len__(self):
+        return len(str(self))
+
+    def __eq__(self, other):
+        return str(self) == (str(other) if isinstance(other, SharedText) else other)
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __contains__(self, item):
+        return str(item) in str(self)
+
+    def __getitem__(self, item):
+        return str(self)[item]
+
+    def __iter__(self):
+        return iter(str(self))
+
+    def __add__(self, other):
+        return str(self) + str(other)
+
+    def __radd__(self, other):
+        return str(other) + str(self)
+
+    def __getattr__(self, name):
+        # Delegates str methods (e.g. upper, split) to the decoded text
+        return getattr(str(self), name)
+
+    def __reduce__(self):
+        # The channel is not available to other processes, so the value is transferred as a plain str
+        return str, (str(self),)
+
+
+class _SegmentReader(object):
+    """ The memory mappings of the segments written by the JVM, of which the most recently used are kept open """
+
+    def __init__(self, max_mappings: int = 64):
+        self._max_mappings = max_mappings
+        self._mappings: OrderedDict[str, mmap.mmap] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def view(self, path: str, offset: int, length: int) -> memoryview:
+        with self._lock:
+            mapping = self._mappings.get(path)
+            if mapping is None or len(mapping) < offset + length:
+                # Segments may grow after being mapped, in which case they are remapped
+                with open(path, 'rb') as f:
+                    mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._mappings[path] = mapping
+            self._mappings.move_to_end(path)
+            while len(self._mappings) > self._max_mappings:
+                # Views of evicted mappings keep them alive (and mapped) until the views are released
+                self._mappings.popitem(last=False)
+        return memoryview(mapping)[offset:offset + length]
+
+
+class _SegmentWriter(object):
+    r"""
+    The segments python writes output values of a single thread to. Values are appended to the current segment, with
+    a larger segment created once it is full. Written values remain valid until :meth:`reset`
+    """
+
+    def __init__(self, directory: str, segment_bytes: int):
+        self._directory = directory
+        self._segment_bytes = segment_bytes
+        self._segments: List[Tuple[str, mmap.mmap]] = []
+        self._offset = 0
+
+    def _new_segment(self, size: int):
+        path = os.path.join(self._directory, f"ohnlp-shm-{os.getpid()}-{uuid.uuid4().hex}")
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            os.ftruncate(fd, size)
+            mapping = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self._segments.append((path, mapping))
+        self._offset = 0
+
+    def write(self, data: Union[bytes, memoryview]) -> str:
+        """ :return: The handle of the written data """
+        length = len(data)
+        if len(self._segments) == 0 or self._offset + length > len(self._segments[-1][1]):
+            self._new_segment(max(self._segment_bytes, length,
+                                  len(self._segments[-1][1]) * 2 if len(self._segments) > 0 else 0))
+        path, mapping = self._segments[-1]
+        offset = self._offset
+        mapping[offset:offset + length] = data
+        self._offset += length
+        return _format_handle(path, offset, length)
+
+    def reset(self):
+        """ Invalidates every written value, retaining only the latest (largest) segment for reuse """
+        for path, mapping in self._segments[:-1]:
+            self._close(path, mapping)
+        self._segments = self._segments[-1:]
+        self._offset = 0
+
+    def close(self):
+        for path, mapping in self._segments:
+            self._close(path, mapping)
+        self._segments = []
+
+    @staticmethod
+    def _close(path: str, mapping: mmap.mmap):
+        mapping.close()
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+class SharedMemoryConfig(object):
+    def __init__(self, threshold_bytes: int, directory: str, segment_bytes: int):
+        self.threshold_bytes = threshold_bytes
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+
+
+# Segments written by the JVM are always resolvable, while output values are only written to the channel once enabled
+_reader = _SegmentReader()
+_config: Optional[SharedMemoryConfig] = None
+_local = threading.local()
+_writers: List[_SegmentWriter] = []
+_writers_lock = threading.Lock()
+
+
+def enable(threshold_bytes: int = 64 * 1024, directory: str = None, segment_bytes: int = 16 * 1024 * 1024):
+    """ Passes STRING and BYTES output values of at least threshold_bytes to the JVM through the channel
+
+    :param threshold_bytes: The (encoded) size at which values are passed through the channel
+    :param directory: The directory to create segments within, defaults to /dev/shm if present or otherwise the
+    temporary directory
+    :param segment_bytes: The initial size of each thread's segment
+    """
+    global _config
+    if directory is None:
+        directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    os.makedirs(directory, exist_ok=True)
+    _config = SharedMemoryConfig(threshold_bytes, directory, segment_bytes)
+
+
+def is_enabled() -> bool:
+    return _config is not None
+
+
+def describe() -> Optional[Dict[str, Any]]:
+    """ :return: The output configuration of the channel as advertised to the JVM, or None if not enabled """
+    if _config is None:
+        return None
+    return {'threshold_bytes': _config.threshold_bytes, 'directory': _config.directory}
+
+
+def resolve(handle: Union[str, bytes], zero_copy: bool = False) -> Union[str, bytes, SharedText, memoryview]:
+    """ Resolves a handle received from the JVM to the value it refers to
+
+    :param handle: The handle, as received within a STRING (str) or BYTES (bytes) field
+    :param zero_copy: Whether to return a lazily decoded :class:`SharedText` or a memoryview over the shared memory
+    rather than copying the value into a str or bytes
+    """
+    if isinstance(handle, bytes):
+        view = _reader.view(*_parse_handle(handle.decode('utf-8')))
+        return view if zero_copy else bytes(view)
+    view = _reader.view(*_parse_handle(handle))
+    return SharedText(handle, view) if zero_copy else str(view, 'utf-8')
+
+
+def _get_writer() -> _SegmentWriter:
+    writer = getattr(_local, 'writer', None)
+    if writer is None:
+        writer = _SegmentWriter(_config.directory, _config.segment_bytes)
+        _local.writer = writer
+        with _writers_lock:
+            _writers.append(writer)
+    return writer
+
+
+def to_java_value(value: Any) -> Any:
+    """ Converts a python row/output value that may be held within or passed through the channel to the value sent to
+    the JVM: a handle if the channel is enabled and the value is large enough, or otherwise a plain str or bytes """
+    if isinstance(value, SharedText):
+        # Values received through the channel remain valid for the bundle, so are passed back without copying
+        return value.handle if _config is not None else str(value)
+    if isinstance(value, memoryview):
+        if _config is not None and value.nbytes >= _config.threshold_bytes:
+            return _get_writer().write(value).encode('utf-8')
+        return value.tobytes()
+    if _config is None:
+        return value
+    if isinstance(value, str):
+        # UTF-8 is at least as long as the number of characters, so shorter strings can be skipped without encoding
+        if len(value) * 4 >= _config.threshold_bytes:
+            data = value.encode('utf-8')
+            if len(data) >= _config.threshold_bytes:
+                return _get_writer().write(data)
+        return value
+    if isinstance(value, bytes) and len(value) >= _config.threshold_bytes:
+        return _get_writer().write(value).encode('utf-8')
+    return value
+
+
+def reset_writes():
+    """ Invalidates the output values written by the current thread, once the JVM has received them """
+    writer = getattr(_local, 'writer', None)
+    if writer is not None:
+        writer.reset()
+
+
+@atexit.register
+def _close_writers():
+    with _writers_lock:
+        for writer in _writers:
+            writer.close()
+        _writers.clear()
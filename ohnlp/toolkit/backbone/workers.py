@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import importlib
+import itertools
+import multiprocessing
+import threading
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+
+from ohnlp.toolkit.backbone import api
+from ohnlp.toolkit.backbone.api import OutputCollector, RecordingOutputCollector, UserDefinedPartitionMappingFunction
+
+
+class _StreamingOutputCollector(RecordingOutputCollector):
+    r"""
+    Records outputs within a worker, sending those recorded so far to the bridge process as a chunk on each flush
+    (i.e. per output_buffer_bytes of outputs yielded by a generator process()), so that outputs are not all held
+    within the worker until the forwarded call returns
+    """
+
+    def __init__(self, conn):
+        super().__init__()
+        self._conn = conn
+
+    def flush(self):
+        if len(self.outputs) > 0:
+            self._conn.send(('chunk', self.outputs))
+            self.outputs = []
+
+
+def _worker_main(conn, entrypoint: str):
+    # Importing the module registers its UDFs via the @ModuleDeclaration decorator
+    importlib.import_module(entrypoint)
+    instances: Dict[str, UserDefinedPartitionMappingFunction] = {}
+    # Instances discarded before being initialized (e.g. in favor of a warm pooled instance) are not torn down
+    initialized = set()
+    while True:
+        try:
+            op, instance_uid, args = conn.recv()
+        except EOFError:
+            break
+        if op == 'shutdown':
+            break
+        try:
+            result = None
+            if op == 'register':
+                instances[instance_uid] = api._registered_udfs[args[0]]()
+            elif op == 'init':
+                instances[instance_uid].init_from_driver(args[0])
+                initialized.add(instance_uid)
+            elif op == 'bundle_start':
+                instances[instance_uid].on_bundle_start()
+            elif op == 'process_batch':
+                out = _StreamingOutputCollector(conn)
+                instances[instance_uid].process_batch(out, args[0])
+                result = out.outputs
+            elif op == 'process_arrow_batch':
+                out = _StreamingOutputCollector(conn)
+                instances[instance_uid].process_arrow_batch(out, api.arrow.RowBatch(args[0]))
+                result = out.outputs
+            elif op == 'bundle_finish':
+                out = _StreamingOutputCollector(conn)
+                api._finish_bundle(instances[instance_uid], out)
+                result = out.outputs
+            elif op == 'teardown':
+                instance = instances.pop(instance_uid)
+                if instance_uid in initialized:
+                    initialized.discard(instance_uid)
+                    instance.on_teardown()
+                api.shared_resources.release_all(instance)
+            else:
+                raise ValueError(f"Unknown worker operation {op}")
+            conn.send(('ok', result))
+        except Exception as e:
+            try:
+                conn.send(('error', (e, traceback.format_exc())))
+            except Exception:
+                # The exception itself could not be pickled
+                conn.send(('error', (RuntimeError(str(e)), traceback.format_exc())))
+    conn.close()
+
+
+class _UDFWorker(object):
+    def __init__(self, ctx, entrypoint: str):
+        self._conn, child_conn = ctx.Pipe()
+        self._process = ctx.Process(target=_worker_main, args=(child_conn, entrypoint), daemon=True)
+        self._process.start()
+        child_conn.close()
+        # Calls for different UDF instances assigned to this worker may arrive on different bridge threads
+        self._lock = threading.Lock()
+
+    def call(self, op: str, instance_uid: str, *args, on_chunk: Callable[[Any], None] = None) -> Any:
+        """ Forwards a call to the worker
+
+        :param on_chunk: Invoked with each chunk of outputs the worker sends ahead of the call's result
+        :return: The result of the call
+        """
+        chunk_error: Optional[BaseException] = None
+        with self._lock:
+            try:
+                self._conn.send((op, instance_uid, args))
+                status, result = self._conn.recv()
+                while status == 'chunk':
+                    if chunk_error is None and on_chunk is not None:
+                        try:
+                            on_chunk(result)
+                        except BaseException as e:
+                            # The remaining messages of the call are still received so that the next call's are not
+                            # misread as its own
+                            chunk_error = e
+                    status, result = self._conn.recv()
+            except (EOFError, OSError) as e:
+                raise RuntimeError(f"UDF worker process {self._process.pid} is no longer available") from e
+        if chunk_error is not None:
+            raise chunk_error
+        if status == 'error':
+            exc, worker_traceback = result
+            raise exc from RuntimeError(f"Raised within UDF worker process {self._process.pid}:\n{worker_traceback}")
+        return result
+
+    def shutdown(self):
+        with self._lock:
+            try:
+                self._conn.send(('shutdown', None, ()))
+            except (EOFError, OSError):
+                pass
+        self._process.join(timeout=10)
+        if self._process.is_alive():
+            self._process.terminate()
+
+
+class RemoteUDF(UserDefinedPartitionMappingFunction):
+    r"""
+    Stands in for a UDF instance hosted within a worker process of a :class:`UDFWorkerPool`. All lifecycle calls of
+    the instance are forwarded to the single worker it was assigned to, so bundle semantics are preserved.
+    Input rows are materialized in the bridge process and transferred by value, and outputs are recorded within the
+    worker and replayed through the bridge's output collector once the forwarded call returns, or in chunks ahead of
+    its return for UDFs whose process is a generator.
+    """
+
+    def __init__(self, worker: _UDFWorker, instance_uid: str, udf_cls):
+        self._worker = worker
+        self._instance_uid = instance_uid
+        self._udf_cls = udf_cls
+        self.toolkit_component_uid = udf_cls.toolkit_component_uid
+        self.data_plane = udf_cls.data_plane
+        self.output_buffer_elements = udf_cls.output_buffer_elements
+        self.output_buffer_bytes = udf_cls.output_buffer_bytes
+        self.poolable = udf_cls.poolable
+        self.deterministic = udf_cls.deterministic
+        self.cache_version = udf_cls.cache_version
+        self.adaptive_batching = udf_cls.adaptive_batching
+        self.batch_target_latency_s = udf_cls.batch_target_latency_s
+        self.batch_max_elements = udf_cls.batch_max_elements
+        self.thread_safe = udf_cls.thread_safe
+        # Rows are always materialized for transfer to the worker
+        self.materialize_rows = True
+        # Input rows are detached from the JVM for transfer to the worker, so no java reference outlives its bundle
+        self.bundle_scoped_references = True
+
+    def init_from_driver(self, json_config: Optional[Dict]) -> None:
+        self._worker.call('init', self._instance_uid, json_config)
+
+    def on_bundle_start(self) -> None:
+        self._worker.call('bundle_start', self._instance_uid)
+
+    def process(self, out: OutputCollector, input_value: Any) -> None:
+        self.process_batch(out, [input_value])
+
+    def process_batch(self, out: OutputCollector, values: List[Any]) -> None:
+        self._replay(self._worker.call('process_batch', self._instance_uid, values,
+                                       on_chunk=lambda outputs: self._replay_chunk(outputs, out)), out)
+
+    def process_arrow_batch(self, out: OutputCollector, batch: api.arrow.RowBatch) -> None:
+        self._replay(self._worker.call('process_arrow_batch', self._instance_uid, batch.to_arrow(),
+                                       on_chunk=lambda outputs: self._replay_chunk(outputs, out)), out)
+
+    def on_bundle_finish(self, out: OutputCollector) -> None:
+        self._replay(self._worker.call('bundle_finish', self._instance_uid,
+                                       on_chunk=lambda outputs: self._replay_chunk(outputs, out)), out)
+
+    def on_teardown(self) -> None:
+        self._worker.call('teardown', self._instance_uid)
+
+    def _get_udf_class(self) -> type:
+        return self._udf_cls
+
+    @staticmethod
+    def _replay(outputs, out: OutputCollector):
+        recorded = RecordingOutputCollector()
+        recorded.outputs = outputs
+        recorded.replay(out)
+
+    @staticmethod
+    def _replay_chunk(outputs, out: OutputCollector):
+        # Chunks are passed on to the JVM as they arrive, rather than accumulating in the bridge process
+        RemoteUDF._replay(outputs, out)
+        out.flush()
+
+
+class UDFWorkerPool(object):
+    r"""
+    A pool of worker processes hosting UDF instances on behalf of a single bridge, so that CPU-bound UDFs are not
+    limited to the single core available to the bridge's interpreter. The py4j gateway remains in the bridge process
+    and acts as a dispatcher.
+
+    UDF instances are assigned to workers round-robin at registration, and every call for an instance is routed to
+    its worker. Parallelism is therefore across UDF instances (i.e. across concurrently executing Beam DoFn
+    instances), which each hold their own instance within their worker exactly as they would within the bridge.
+    """
+
+    def __init__(self, entrypoint: str, num_workers: int, start_method: str = 'spawn'):
+        """
+        :param entrypoint: The module declaring the UDFs, imported by each worker to register them
+        :param num_workers: The number of worker processes to start
+        :param start_method: The multiprocessing start method to use for the worker processes
+        """
+        if num_workers < 1:
+            raise ValueError(f"A worker pool requires at least one worker, got {num_workers}")
+        ctx = multiprocessing.get_context(start_method)
+        self._workers = [_UDFWorker(ctx, entrypoint) for _ in range(num_workers)]
+        self._next_worker = itertools.cycle(self._workers)
+        self._assignment_lock = threading.Lock()
+
+    def create_udf(self, udf_uid: str, instance_uid: str) -> RemoteUDF:
+        with self._assignment_lock:
+            worker = next(self._next_worker)
+        worker.call('register', instance_uid, udf_uid)
+        return RemoteUDF(worker, instance_uid, api._registered_udfs[udf_uid])
+
+    @staticmethod
+    def discard_udf(instance: RemoteUDF):
+        """ Drops a UDF instance that was never initialized from its worker, without calling its on_teardown """
+        instance.on_teardown()
+
+    def shutdown(self):
+        for worker in self._workers:
+            worker.shutdown()
@@ -10,5 +10,9 @@ setup(
     python_requires='>3.7',
     install_requires=[
         'py4j==0.10.9.7'
-    ]
+    ],
+    extras_require={
+        'arrow': ['pyarrow'],
+        'vectorized': ['numpy', 'pandas']
+    }
 )
@@ -0,0 +1,73 @@
+"""
+Shared fixtures of the bridge behavior tests, which run the bridge entry points of a test module against a
+:class:`FakeGateway` standing in for the JVM
+"""
+
+from typing import Dict, List, Optional, Type
+
+from ohnlp.toolkit.backbone.api import OutputCollector, Row, ToolkitModule, UserDefinedPartitionMappingFunction
+from ohnlp.toolkit.backbone.benchmarks.fake_jvm import FakeField, FakeFieldType, FakeGateway, FakeJavaObject, \
+    FakeJVM, FakeProcessContext, FakeRow, FakeSchema, type_names
+
+NOTE_SCHEMA = FakeSchema([
+    FakeField('id', FakeFieldType(type_names['INT64'])),
+    FakeField('text', FakeFieldType(type_names['STRING'])),
+])
+
+
+def note(idx: int, text: str) -> FakeRow:
+    return FakeRow(NOTE_SCHEMA, [idx, text])
+
+
+class RecordingUDF(UserDefinedPartitionMappingFunction):
+    """ Outputs its input row with its text uppercased, counting lifecycle calls by class """
+    inits = 0
+    processed = 0
+    teardowns = 0
+
+    def init_from_driver(self, json_config: Optional[Dict]) -> None:
+        type(self).inits += 1
+
+    def on_bundle_start(self) -> None:
+        pass
+
+    def process(self, out: OutputCollector, input_value: Row) -> None:
+        type(self).processed += 1
+        row = input_value.copy()
+        row.set_value('text', row.get_value('text').upper())
+        out.output(row)
+
+    def on_bundle_finish(self, out: OutputCollector) -> None:
+        pass
+
+    def on_teardown(self) -> None:
+        type(self).teardowns += 1
+
+
+class BridgeEnvironment(object):
+    """ A bridge entry point of a test module connected to a fake JVM """
+
+    def __init__(self, module_cls: Type[ToolkitModule]):
+        self.jvm = FakeJVM()
+        self.gateway = FakeGateway(self.jvm)
+        self.module = module_cls()
+        self.module.python_init(self.gateway)
+        self.module.java_init(self.gateway.wrap(FakeJavaObject()))
+
+    def new_context(self, bulk_output: bool = True):
+        """ :return: The fake process context, and its py4j proxy to pass to the bridge """
+        context = FakeProcessContext(bulk_output=bulk_output, keep_outputs=True)
+        return context, self.gateway.wrap(context)
+
+    def new_udf(self, udf_cls, conf_json_str: str = None) -> str:
+        instance_uid = self.module.register_udf(str(udf_cls.toolkit_component_uid))
+        self.module.call_udf_on_init(instance_uid, conf_json_str)
+        return instance_uid
+
+    def process_bundle(self, instance_uid: str, rows: List[FakeRow]) -> FakeProcessContext:
+        context, java_context = self.new_context()
+        self.module.call_udf_on_bundle_start(instance_uid)
+        for row in rows:
+            self.module.call_udf_process(instance_uid, self.gateway.wrap(row), java_context)
+        self.module.call_udf_on_bundle_finish(instance_uid, java_context)
+        return context
@@ -0,0 +1,94 @@
+import unittest
+from typing import Dict, List
+from unittest import mock
+from uuid import UUID
+
+from fake_bridge import BridgeEnvironment, RecordingUDF, note
+from ohnlp.toolkit.backbone import api
+from ohnlp.toolkit.backbone.api import ModuleDeclaration, OutputCollector, ToolkitModule
+
+
+class _Clock(object):
+    """ Stands in for time.perf_counter, advanced only by the simulated processing time of batches """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+_clock = _Clock()
+
+
+@api.FunctionIdentifier(UUID('1c7e5a3f-8d2b-4f9e-b6a4-3e9d7b1f5c61'))
+class _BatchedInferenceUDF(RecordingUDF):
+    """ Takes 1ms per batch plus 1us per character of text to process, recording the size of each batch """
+    adaptive_batching = True
+    materialize_rows = True
+    batch_target_latency_s = 0.01
+    batch_sizes: List[int] = []
+
+    def process_batch(self, out: OutputCollector, values: List[api.Row]) -> None:
+        type(self).batch_sizes.append(len(values))
+        _clock.now += 0.001 + 1e-6 * sum(len(value.get_value('text')) for value in values)
+        super().process_batch(out, values)
+
+
+class _BatchingModule(ToolkitModule):
+    pass
+
+
+ModuleDeclaration([], [_BatchedInferenceUDF])(_BatchingModule)
+
+
+class AdaptiveBatchingTest(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(api.time, 'perf_counter', _clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.env = BridgeEnvironment(_BatchingModule)
+        _BatchedInferenceUDF.batch_sizes = []
+
+    def _batches_by_reason(self, instance_uid: str) -> Dict[str, int]:
+        # noinspection PyProtectedMember
+        return {labels['reason']: value for name, labels, value in api._collect_batch_schedulers()
+                if name == 'micro_batches_total' and labels['instance'] == instance_uid}
+
+    def test_batch_size_follows_payload(self):
+        instance_uid = self.env.new_udf(_BatchedInferenceUDF)
+        self.env.process_bundle(instance_uid, [note(idx, 'no fever') for idx in range(2000)])
+        short_batches = _BatchedInferenceUDF.batch_sizes
+        _BatchedInferenceUDF.batch_sizes = []
+        context = self.env.process_bundle(instance_uid, [note(idx, 'chest pain ' * 100) for idx in range(200)])
+        long_batches = _BatchedInferenceUDF.batch_sizes
+        self.assertEqual(200, len(context.outputs[None]))
+        # Batches of about 10ms, i.e. about 9000 characters once the per-batch overhead is known
+        self.assertGreater(max(short_batches), 500)
+        self.assertLessEqual(max(long_batches[len(long_batches) // 2:]), 12)
+        self.assertIn('target_latency', self._batches_by_reason(instance_uid))
+
+    def test_buffered_elements_flushed_at_bundle_finish(self):
+        instance_uid = self.env.new_udf(_BatchedInferenceUDF)
+        context, java_context = self.env.new_context()
+        self.env.module.call_udf_on_bundle_start(instance_uid)
+        for idx in range(5):
+            self.env.module.call_udf_process(instance_uid, self.env.gateway.wrap(note(idx, 'no fever')), java_context)
+        # Only the elements of the first call are dispatched before the latency of a batch is known
+        self.assertEqual(['NO FEVER'], [row.values[1] for row in context.outputs[None]])
+        self.env.module.call_udf_on_bundle_finish(instance_uid, java_context)
+        self.assertEqual(list(range(5)), [row.values[0] for row in context.outputs[None]])
+        self.assertEqual([1, 4], _BatchedInferenceUDF.batch_sizes)
+        self.assertEqual({'warmup': 1, 'bundle_finish': 1}, self._batches_by_reason(instance_uid))
+
+    def test_batches_bounded_by_elements(self):
+        instance_uid = self.env.new_udf(_BatchedInferenceUDF)
+        with mock.patch.object(_BatchedInferenceUDF, 'batch_max_elements', 4):
+            self.env.process_bundle(instance_uid, [note(idx, 'no fever') for idx in range(11)])
+        self.assertEqual([1, 4, 4, 2], _BatchedInferenceUDF.batch_sizes)
+        self.assertEqual({'warmup': 1, 'max_elements': 2, 'bundle_finish': 1}, self._batches_by_reason(instance_uid))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+from typing import Any
+from unittest import mock
+from uuid import UUID
+
+from fake_bridge import BridgeEnvironment, RecordingUDF
+from ohnlp.toolkit.backbone import api, arrow
+from ohnlp.toolkit.backbone.api import DataPlane, ModuleDeclaration, OutputCollector, Row, ToolkitModule, \
+    VectorizedPartitionMappingFunction
+
+
+@api.FunctionIdentifier(UUID('5b1e8d3a-2c7f-4a96-b0e4-8f3d6a1c9e21'))
+class _ArrowUDF(RecordingUDF):
+    """ Outputs the uppercased text of each row """
+    data_plane = DataPlane.ARROW
+
+    def process(self, out: OutputCollector, input_value: Row) -> None:
+        out.output(input_value.get_value('text').upper())
+
+
+@api.FunctionIdentifier(UUID('a4f2c6e8-1d3b-4e5a-9c7f-2b8d4e6a0c22'))
+class _PassthroughArrowUDF(RecordingUDF):
+    data_plane = DataPlane.ARROW
+
+    def process(self, out: OutputCollector, input_value: Row) -> None:
+        out.output(input_value)
+
+
+@api.FunctionIdentifier(UUID('c8e4a2f6-3b5d-4f7e-8a1c-6d2b9f4e1a23'))
+class _DeterministicArrowUDF(_ArrowUDF):
+    deterministic = True
+
+
+@api.FunctionIdentifier(UUID('e2a6c4f8-5d7b-4c9e-b3a1-0f6d8b2e4c24'))
+class _VectorizedArrowUDF(VectorizedPartitionMappingFunction, RecordingUDF):
+    data_plane = DataPlane.ARROW
+
+    def process_frame(self, frame: Any) -> Any:
+        return frame
+
+
+class _ArrowModule(ToolkitModule):
+    pass
+
+
+ModuleDeclaration([], [_ArrowUDF, _PassthroughArrowUDF, _DeterministicArrowUDF, _VectorizedArrowUDF])(_ArrowModule)
+
+
+def _payload(texts) -> bytes:
+    pa = arrow.pyarrow
+    batch = pa.RecordBatch.from_pydict({'id': list(range(len(texts))), 'text': texts})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+class ArrowDataPlaneTest(unittest.TestCase):
+
+    def setUp(self):
+        self.env = BridgeEnvironment(_ArrowModule)
+
+    def test_vectorized_udf_rejected(self):
+        instance_uid = self.env.new_udf(_VectorizedArrowUDF)
+        with self.assertRaisesRegex(ValueError, 'vectorized'):
+            self.env.module.call_udf_get_data_plane(instance_uid)
+        context, java_context = self.env.new_context()
+        with self.assertRaisesRegex(ValueError, 'vectorized'):
+            self.env.module.call_udf_process_arrow(instance_uid, b'', java_context)
+        self.assertEqual({}, context.outputs)
+
+    def test_bypassed_result_cache_noted(self):
+        with mock.patch('builtins.print') as printed:
+            data_plane = self.env.module.call_udf_get_data_plane(self.env.new_udf(_DeterministicArrowUDF))
+        self.assertEqual('arrow', data_plane)
+        self.assertIn('not cached', printed.call_args[0][0])
+        with mock.patch('builtins.print') as printed:
+            self.env.module.call_udf_get_data_plane(self.env.new_udf(_ArrowUDF))
+        printed.assert_not_called()
+
+    @unittest.skipIf(arrow.pyarrow is None, "requires pyarrow")
+    def test_rows_processed_as_views(self):
+        instance_uid = self.env.new_udf(_ArrowUDF)
+        context, java_context = self.env.new_context()
+        self.env.module.call_udf_on_bundle_start(instance_uid)
+        self.env.module.call_udf_process_arrow(instance_uid, _payload(['chest pain', 'no fever']), java_context)
+        self.assertEqual(['CHEST PAIN', 'NO FEVER'], context.outputs[None])
+
+    @unittest.skipIf(arrow.pyarrow is None, "requires pyarrow")
+    def test_view_output_rejected(self):
+        instance_uid = self.env.new_udf(_PassthroughArrowUDF)
+        context, java_context = self.env.new_context()
+        self.env.module.call_udf_on_bundle_start(instance_uid)
+        with self.assertRaisesRegex(ValueError, 'Row.of'):
+            self.env.module.call_udf_process_arrow(instance_uid, _payload(['chest pain']), java_context)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import asyncio
+import unittest
+from uuid import UUID
+
+from fake_bridge import BridgeEnvironment, RecordingUDF, note
+from ohnlp.toolkit.backbone import api
+from ohnlp.toolkit.backbone.api import AsyncUserDefinedPartitionMappingFunction, ModuleDeclaration, OutputCollector, \
+    Row, TaggedOutput, ToolkitModule
+
+
+@api.FunctionIdentifier(UUID('1e7c3a9f-6b2d-4f8e-a4c1-9d5b3e7f1a31'))
+class _LookupUDF(AsyncUserDefinedPartitionMappingFunction, RecordingUDF):
+    """ Outputs the uppercased text of each row after a delay that shrinks with its id, so that later elements
+    complete first, recording the most calls in progress at once """
+    max_in_flight = 4
+    in_flight = 0
+    most_in_flight = 0
+
+    async def process(self, out: OutputCollector, input_value: Row) -> None:
+        cls = type(self)
+        cls.in_flight += 1
+        cls.most_in_flight = max(cls.most_in_flight, cls.in_flight)
+        try:
+            await asyncio.sleep(0.002 * (10 - input_value.get_value('id')))
+        finally:
+            cls.in_flight -= 1
+        out.output(input_value.get_value('text').upper())
+
+
+@api.FunctionIdentifier(UUID('6a2f8c4e-3d9b-4e1a-b7f5-2c8e4a6d9b32'))
+class _TokenizingUDF(AsyncUserDefinedPartitionMappingFunction, RecordingUDF):
+    """ Yields a token per word, with every other token tagged """
+
+    async def process(self, out: OutputCollector, input_value: Row):
+        for idx, token in enumerate(input_value.get_value('text').split()):
+            await asyncio.sleep(0)
+            yield TaggedOutput('odd', token) if idx % 2 == 1 else token
+
+
+@api.FunctionIdentifier(UUID('b4d6e8a2-7c1f-4a3b-9e5d-6f2a8c4e1b33'))
+class _FailingUDF(AsyncUserDefinedPartitionMappingFunction, RecordingUDF):
+
+    async def process(self, out: OutputCollector, input_value: Row) -> None:
+        raise ValueError(f"Cannot look up {input_value.get_value('text')}")
+
+
+class _AsyncModule(ToolkitModule):
+    pass
+
+
+ModuleDeclaration([], [_LookupUDF, _TokenizingUDF, _FailingUDF])(_AsyncModule)
+
+
+class AsyncUDFTest(unittest.TestCase):
+
+    def setUp(self):
+        self.env = BridgeEnvironment(_AsyncModule)
+        _LookupUDF.in_flight = 0
+        _LookupUDF.most_in_flight = 0
+
+    def test_outputs_in_submission_order(self):
+        texts = [f"note {idx}" for idx in range(10)]
+        context = self.env.process_bundle(self.env.new_udf(_LookupUDF),
+                                          [note(idx, text) for idx, text in enumerate(texts)])
+        self.assertEqual([text.upper() for text in texts], context.outputs[None])
+        self.assertGreater(_LookupUDF.most_in_flight, 1)
+        self.assertLessEqual(_LookupUDF.most_in_flight, _LookupUDF.max_in_flight)
+
+    def test_async_generator_outputs(self):
+        context = self.env.process_bundle(self.env.new_udf(_TokenizingUDF), [note(0, 'no acute distress')])
+        self.assertEqual(['no', 'distress'], context.outputs[None])
+        self.assertEqual(['acute'], context.outputs['odd'])
+
+    def test_failure_raised_by_bundle(self):
+        with self.assertRaisesRegex(ValueError, 'Cannot look up chest pain'):
+            self.env.process_bundle(self.env.new_udf(_FailingUDF), [note(0, 'chest pain')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+"""
+Tests of starting bridges from a zygote or bridge host, and of falling back to starting them cold
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from typing import Any, Dict, List
+from unittest import mock
+
+from ohnlp.toolkit.backbone import backbone_module_launcher as launcher
+
+
+class _ColdStart(Exception):
+    """ Raised in place of loading the entry point, to stop a cold start before it starts a gateway """
+
+
+class ZygoteFallbackTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.directory, 'zygote.sock')
+        self.requests: List[Dict[str, Any]] = []
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _serve_once(self, response: Dict[str, Any]) -> threading.Thread:
+        server = launcher._listen(self.socket_path)
+
+        def serve():
+            conn, _ = server.accept()
+            with conn:
+                self.requests.append(launcher._receive_request(conn))
+                launcher._reply(conn, response)
+            server.close()
+
+        thread = threading.Thread(target=serve, daemon=True)
+        thread.start()
+        return thread
+
+    def _launch(self):
+        with mock.patch.object(launcher, 'load_entry_point', side_effect=_ColdStart), mock.patch('builtins.print'):
+            launcher.launch_bridge('notes.module', 'NotesModule', 'direct', 'bridge-1', zygote_socket=self.socket_path)
+
+    def test_started_by_zygote(self):
+        thread = self._serve_once({'pid': 1234})
+        self._launch()
+        thread.join(timeout=10)
+        self.assertEqual(['notes.module', 'NotesModule', 'direct'], self.requests[0]['module'])
+        self.assertEqual('bridge-1', self.requests[0]['bridge_id'])
+
+    def test_cold_start_without_zygote(self):
+        with self.assertRaises(_ColdStart):
+            self._launch()
+
+    def test_cold_start_on_zygote_error(self):
+        # e.g. a zygote prewarmed for another module
+        thread = self._serve_once({'error': 'Zygote serves other.module (direct)'})
+        with self.assertRaises(_ColdStart):
+            self._launch()
+        thread.join(timeout=10)
+        self.assertEqual(1, len(self.requests))
+
+    def test_cold_start_on_closed_connection(self):
+        # e.g. a bridge process killed before replying
+        server = launcher._listen(self.socket_path)
+
+        def serve():
+            conn, _ = server.accept()
+            with conn:
+                launcher._receive_request(conn)
+            server.close()
+
+        thread = threading.Thread(target=serve, daemon=True)
+        thread.start()
+        with self.assertRaises(_ColdStart):
+            self._launch()
+        thread.join(timeout=10)
+
+
+class ProcessOptionsTest(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(launcher._process_options, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Stands in for the gateway, which would otherwise start serving
+        patcher = mock.patch.object(launcher, 'ClientServer')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _start(self, bridge_id: str, entry_point, result_cache_max_bytes: int):
+        with mock.patch.object(launcher.result_cache, 'enable'):
+            launcher.start_gateway(entry_point, 'notes.module', bridge_id, result_cache_path='cache.sqlite',
+                                   result_cache_max_bytes=result_cache_max_bytes, directory='/tmp')
+
+    def test_options_released_when_startup_fails(self):
+        failing = mock.Mock()
+        failing.python_init.side_effect = OSError("Address already in use")
+        with self.assertRaises(OSError):
+            self._start('bridge-1', failing, 1024)
+        self.assertEqual({}, launcher._process_options)
+        # Later bridges may configure the result cache differently
+        self._start('bridge-2', mock.Mock(), 2048)
+        with self.assertRaisesRegex(ValueError, 'conflict with the options'):
+            self._start('bridge-3', mock.Mock(), 1024)
+
+
+def _run_zygote(socket_path: str, fail_start: bool):
+    # Stands in for the gateway and metadata files of the forked bridge processes
+    start_gateway = mock.Mock(side_effect=OSError("Address already in use") if fail_start else None,
+                              return_value=(None, 'token'))
+    with mock.patch.object(launcher, 'load_entry_point', return_value=object()), \
+            mock.patch.object(launcher, 'start_gateway', start_gateway), \
+            mock.patch.object(launcher, 'write_bridge_meta'), \
+            mock.patch('traceback.print_exc'):
+        launcher.run_zygote('notes.module', 'NotesModule', 'direct', socket_path)
+
+
+class ZygoteTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.directory, 'zygote.sock')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _start_zygote(self, fail_start: bool) -> multiprocessing.Process:
+        zygote = multiprocessing.get_context('fork').Process(target=_run_zygote, args=(self.socket_path, fail_start),
+                                                             daemon=True)
+        zygote.start()
+        self.addCleanup(zygote.kill)
+        deadline = time.monotonic() + 10
+        while not os.path.exists(self.socket_path) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return zygote
+
+    def _request(self) -> int:
+        return launcher.launch_bridge_from_zygote(self.socket_path, 'bridge-1', 'notes.module', 'NotesModule',
+                                                  'direct', working_dir=self.directory)
+
+    def test_bridge_process_replies_once_started(self):
+        zygote = self._start_zygote(fail_start=False)
+        pid = self._request()
+        self.assertNotIn(pid, (os.getpid(), zygote.pid))
+
+    def test_bridge_process_failure_replied(self):
+        self._start_zygote(fail_start=True)
+        with self.assertRaisesRegex(ValueError, 'failed to start: Address already in use'):
+            self._request()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+import threading
+import unittest
+from typing import List
+from uuid import UUID
+
+from fake_bridge import BridgeEnvironment, RecordingUDF, note
+from ohnlp.toolkit.backbone import api
+from ohnlp.toolkit.backbone.api import ModuleDeclaration, OutputCollector, Row, ToolkitModule
+from ohnlp.toolkit.backbone.benchmarks import suite
+
+
+@api.FunctionIdentifier(UUID('6d2a9f4c-3b7e-4a1d-8f5b-9c4e2a7d1f81'))
+class _ConcurrencyRecordingUDF(RecordingUDF):
+    """ Records the greatest number of threads processing elements of the same instance at once """
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def process(self, out: OutputCollector, input_value: Row) -> None:
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+        try:
+            self._wait_for_others()
+            super().process(out, input_value)
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def _wait_for_others(self):
+        # Gives other threads the chance to enter process if they are allowed to
+        threading.Event().wait(0.005)
+
+
+@api.FunctionIdentifier(UUID('4e9b1d7a-2c6f-4d8e-b3a5-7f1c9e4b2d61'))
+class _RendezvousUDF(_ConcurrencyRecordingUDF):
+    """ Only completes processing an element once another thread is processing an element at the same time """
+    barrier: threading.Barrier = None
+
+    def _wait_for_others(self):
+        type(self).barrier.wait()
+
+
+@api.FunctionIdentifier(UUID('2f8c4e1a-7d3b-4b9f-a5e2-1d6b8f3c9a91'))
+class _ThreadSafeUDF(_RendezvousUDF):
+    thread_safe = True
+
+
+@api.FunctionIdentifier(UUID('8a3e6c2f-5d1b-4e7a-9b4f-6c2a8e5d3b11'))
+class _ThreadSafeBatchingUDF(_ConcurrencyRecordingUDF):
+    # Buffered elements are carried across the calls of a bundle, so calls are serialized despite thread_safe
+    thread_safe = True
+    adaptive_batching = True
+
+
+class _ConcurrencyModule(ToolkitModule):
+    pass
+
+
+ModuleDeclaration([], [_ConcurrencyRecordingUDF, _RendezvousUDF, _ThreadSafeUDF, _ThreadSafeBatchingUDF])(
+    _ConcurrencyModule)
+
+
+class ConcurrentCallTest(unittest.TestCase):
+
+    def setUp(self):
+        self.env = BridgeEnvironment(_ConcurrencyModule)
+        for udf_cls in (_ConcurrencyRecordingUDF, _RendezvousUDF, _ThreadSafeUDF, _ThreadSafeBatchingUDF):
+            udf_cls.max_active = 0
+
+    def _process_concurrently(self, instance_uids: List[str], rows: int) -> List[int]:
+        """ Processes a bundle per instance UID, each on its own thread
+
+        :return: The number of outputs of each bundle
+        """
+        outputs = [0] * len(instance_uids)
+        errors = []
+
+        def process(idx: int, instance_uid: str):
+            try:
+                context = self.env.process_bundle(instance_uid, [note(row, 'chest pain') for row in range(rows)])
+                outputs[idx] = len(context.outputs[None])
+            except BaseException as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=process, args=(idx, instance_uid), daemon=True)
+                   for idx, instance_uid in enumerate(instance_uids)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+        self.assertEqual([], errors)
+        return outputs
+
+    def test_calls_of_an_instance_serialized(self):
+        instance_uid = self.env.new_udf(_ConcurrencyRecordingUDF)
+        self.assertEqual([5] * 4, self._process_concurrently([instance_uid] * 4, 5))
+        self.assertEqual(1, _ConcurrencyRecordingUDF.max_active)
+
+    def test_calls_of_different_instances_parallel(self):
+        _RendezvousUDF.barrier = threading.Barrier(2, timeout=10)
+        # Each element is only processed once an element of the other instance is being processed at the same time
+        instance_uids = [self.env.new_udf(_RendezvousUDF) for _ in range(2)]
+        self.assertEqual([3, 3], self._process_concurrently(instance_uids, 3))
+        self.assertEqual(2, _RendezvousUDF.max_active)
+
+    def test_thread_safe_instance_called_concurrently(self):
+        _ThreadSafeUDF.barrier = threading.Barrier(2, timeout=10)
+        instance_uid = self.env.new_udf(_ThreadSafeUDF)
+        self.assertEqual([3, 3], self._process_concurrently([instance_uid] * 2, 3))
+        self.assertEqual(2, _ThreadSafeUDF.max_active)
+
+    def test_thread_safe_instance_carrying_bundle_state_serialized(self):
+        instance_uid = self.env.new_udf(_ThreadSafeBatchingUDF)
+        # Each bundle's buffered elements are output to its own process context
+        self.assertEqual([5] * 4, self._process_concurrently([instance_uid] * 4, 5))
+        self.assertEqual(1, _ThreadSafeBatchingUDF.max_active)
+
+    def test_failed_bundle_restarted_by_its_thread(self):
+        instance_uid = self.env.new_udf(_ThreadSafeBatchingUDF)
+        # A bundle that failed without finishing, whose thread then starts another
+        self.env.module.call_udf_on_bundle_start(instance_uid)
+        context = self.env.process_bundle(instance_uid, [note(0, 'chest pain')])
+        self.assertEqual(1, len(context.outputs[None]))
+        self.assertEqual([5], self._process_concurrently([instance_uid], 5))
+
+    def test_waiting_bundles_released_by_teardown(self):
+        instance_uid = self.env.new_udf(_ThreadSafeBatchingUDF)
+        # A bundle that failed without finishing, after which the instance is torn down
+        self.env.module.call_udf_on_bundle_start(instance_uid)
+        errors = []
+
+        def start_bundle():
+            try:
+                self.env.module.call_udf_on_bundle_start(instance_uid)
+            except NameError as e:
+                errors.append(e)
+
+        waiting = threading.Thread(target=start_bundle, daemon=True)
+        waiting.start()
+        waiting.join(0.05)
+        self.assertTrue(waiting.is_alive())
+        self.env.module.call_udf_on_teardown(instance_uid)
+        waiting.join(10)
+        self.assertFalse(waiting.is_alive())
+        self.assertEqual(1, len(errors))
+        # noinspection PyProtectedMember
+        self.assertEqual({}, self.env.module._registry.bundle_owners)
+
+
+class RegistryTest(unittest.TestCase):
+
+    def test_transform_teardown_by_uppercase_uid(self):
+        env = suite.BenchmarkEnvironment(0.0, num_rows=1)
+        instance_uid = env.new_transform()
+        env.module.call_transform_teardown(instance_uid.upper())
+        with self.assertRaises(NameError):
+            env.module.check_and_get_active_component(instance_uid)
+
+
+if __name__ == '__main__':
+    unittest.main()
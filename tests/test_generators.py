@@ -0,0 +1,56 @@
+import unittest
+from typing import List
+from uuid import UUID
+
+from fake_bridge import BridgeEnvironment, RecordingUDF, note
+from ohnlp.toolkit.backbone import api
+from ohnlp.toolkit.backbone.api import ModuleDeclaration, OutputCollector, Row, TaggedOutput, ToolkitModule
+from ohnlp.toolkit.backbone.benchmarks.fake_jvm import FakeProcessContext
+
+
+@api.FunctionIdentifier(UUID('4b8e2d6a-9c1f-4e3b-a7d5-2c6f9a1e8b31'))
+class _TokenizingUDF(RecordingUDF):
+    """ Yields a token per whitespace-separated word, with every other token tagged """
+    output_buffer_bytes = 64
+    # The process context outputs are delivered to, recording how many had been delivered as each token was yielded
+    context: FakeProcessContext = None
+    delivered_at_yield: List[int] = []
+
+    def process(self, out: OutputCollector, input_value: Row):
+        for idx, token in enumerate(input_value.get_value('text').split()):
+            _TokenizingUDF.delivered_at_yield.append(sum(_TokenizingUDF.context.output_counts.values()))
+            yield TaggedOutput('odd', token) if idx % 2 == 1 else token
+
+
+class _GeneratorModule(ToolkitModule):
+    pass
+
+
+ModuleDeclaration([], [_TokenizingUDF])(_GeneratorModule)
+
+
+class GeneratorChunkingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.env = BridgeEnvironment(_GeneratorModule)
+        _TokenizingUDF.delivered_at_yield = []
+
+    def test_outputs_delivered_while_generating(self):
+        instance_uid = self.env.new_udf(_TokenizingUDF)
+        tokens = [f"token{idx}" for idx in range(200)]
+        context, java_context = self.env.new_context()
+        _TokenizingUDF.context = context
+        self.env.module.call_udf_on_bundle_start(instance_uid)
+        self.env.module.call_udf_process(instance_uid, self.env.gateway.wrap(note(0, ' '.join(tokens))), java_context)
+        self.assertEqual(tokens[0::2], context.outputs[None])
+        self.assertEqual(tokens[1::2], context.outputs['odd'])
+        # Chunks of output_buffer_bytes of outputs are sent to the JVM as they are yielded, rather than all at once
+        # when the generator is exhausted
+        delivered = _TokenizingUDF.delivered_at_yield
+        self.assertEqual(0, delivered[0])
+        self.assertGreater(delivered[-1], len(tokens) / 2)
+        self.assertLess(max(b - a for a, b in zip(delivered, delivered[1:])), 16)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Tests of UDF instance pooling. This module also serves as the entrypoint imported by the worker processes of the
+worker pool test
+"""
+
+import time
+import unittest
+from unittest import mock
+from uuid import UUID
+
+from fake_bridge import BridgeEnvironment, RecordingUDF, note
+from ohnlp.toolkit.backbone import api
+from ohnlp.toolkit.backbone.api import ModuleDeclaration, ToolkitModule, UDFInstancePool
+from ohnlp.toolkit.backbone.workers import UDFWorkerPool
+
+
+@api.FunctionIdentifier(UUID('0c6f3b9e-41d2-4a7f-8e15-6b2d9c4a7e01'))
+class _PoolableUDF(RecordingUDF):
+    poolable = True
+
+
+class _PoolModule(ToolkitModule):
+    pass
+
+
+ModuleDeclaration([], [_PoolableUDF])(_PoolModule)
+
+
+class UDFInstancePoolTest(unittest.TestCase):
+
+    def setUp(self):
+        _PoolableUDF.inits = 0
+        _PoolableUDF.teardowns = 0
+
+    def test_warm_instance_reused_for_same_config(self):
+        env = BridgeEnvironment(_PoolModule)
+        first_uid = env.new_udf(_PoolableUDF, '{"a": 1, "b": 2}')
+        first = env.module.check_and_get_active_function(first_uid)
+        env.module.call_udf_on_teardown(first_uid)
+        # Configurations are compared by their canonical JSON
+        second_uid = env.new_udf(_PoolableUDF, '{"b": 2, "a": 1}')
+        self.assertIs(first, env.module.check_and_get_active_function(second_uid))
+        self.assertEqual(1, _PoolableUDF.inits)
+        context = env.process_bundle(second_uid, [note(0, 'chest pain')])
+        self.assertEqual(['CHEST PAIN'], [row.values[1] for row in context.outputs[None]])
+
+    def test_cold_instance_for_other_config_or_bridge(self):
+        env = BridgeEnvironment(_PoolModule)
+        first_uid = env.new_udf(_PoolableUDF, '{"a": 1}')
+        first = env.module.check_and_get_active_function(first_uid)
+        env.module.call_udf_on_teardown(first_uid)
+        other_config_uid = env.new_udf(_PoolableUDF, '{"a": 2}')
+        self.assertIsNot(first, env.module.check_and_get_active_function(other_config_uid))
+        # Instances hold references to the JVM of the bridge they were created within, so are never shared across
+        other_env = BridgeEnvironment(_PoolModule)
+        other_bridge_uid = other_env.new_udf(_PoolableUDF, '{"a": 1}')
+        self.assertIsNot(first, other_env.module.check_and_get_active_function(other_bridge_uid))
+        self.assertEqual(3, _PoolableUDF.inits)
+
+    def test_idle_instances_evicted_without_further_calls(self):
+        pool = UDFInstancePool(idle_timeout_s=0.05)
+        instances = [_PoolableUDF() for _ in range(2)]
+        for instance in instances:
+            pool.track(instance, str(_PoolableUDF.toolkit_component_uid), '{}')
+            pool.checkin(instance)
+        deadline = time.monotonic() + 5
+        while _PoolableUDF.teardowns < len(instances) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(instances), _PoolableUDF.teardowns)
+        self.assertEqual({'hits': 0, 'misses': 0, 'evictions': 2, 'idle': 0}, pool.stats())
+
+    def test_failed_teardown_of_evicted_instance(self):
+        pool = UDFInstancePool(idle_timeout_s=0)
+        instance = _PoolableUDF()
+        pool.track(instance, str(_PoolableUDF.toolkit_component_uid), '{}')
+        with mock.patch.object(instance, 'on_teardown', side_effect=OSError("Model server unreachable")), \
+                mock.patch('builtins.print') as printed:
+            pool.checkin(instance)
+            pool.evict_idle()
+        self.assertIn('Model server unreachable', printed.call_args[0][0])
+        self.assertEqual(0, pool.stats()['idle'])
+
+
+class WorkerPoolInstancePoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = UDFWorkerPool(__name__, 1)
+        self.env = BridgeEnvironment(_PoolModule)
+        self.env.module.use_worker_pool(self.pool)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_warm_pooled_instance_drops_worker_instance(self):
+        _PoolableUDF.inits = 0
+        first_uid = self.env.new_udf(_PoolableUDF, '{}')
+        first = self.env.module.check_and_get_active_function(first_uid)
+        self.env.module.call_udf_on_teardown(first_uid)
+        second_uid = self.env.module.register_udf(str(_PoolableUDF.toolkit_component_uid))
+        replaced = self.env.module.check_and_get_active_function(second_uid)
+        self.env.module.call_udf_on_init(second_uid, '{}')
+        self.assertIs(first, self.env.module.check_and_get_active_function(second_uid))
+        # The replaced instance was never initialized, and no longer exists within its worker
+        with self.assertRaises(KeyError):
+            replaced.on_bundle_start()
+        context = self.env.process_bundle(second_uid, [note(0, 'no fever')])
+        self.assertEqual(['NO FEVER'], [row.values[1] for row in context.outputs[None]])
+
+
+if __name__ == '__main__':
+    unittest.main()
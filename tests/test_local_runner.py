@@ -0,0 +1,88 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from typing import Dict, Optional
+from unittest import mock
+
+from ohnlp.toolkit.backbone import local_runner
+from ohnlp.toolkit.backbone.api import OutputCollector, Row, TypeName, UserDefinedPartitionMappingFunction
+from ohnlp.toolkit.backbone.local_runner import LocalUDFRunner
+
+
+class _NegationUDF(UserDefinedPartitionMappingFunction):
+    """ Outputs the text of each note with its negated findings tagged, counting bundles per instance """
+
+    def init_from_driver(self, json_config: Optional[Dict]) -> None:
+        self.cue = json_config['cue']
+        self.bundles = 0
+
+    def on_bundle_start(self) -> None:
+        self.bundles += 1
+
+    def process(self, out: OutputCollector, input_value: Row) -> None:
+        text = input_value.get_value('text')
+        out.output(text)
+        for finding in input_value.get_value('findings'):
+            if text.startswith(self.cue):
+                out.output_tagged('negated', finding.get_value('name'))
+
+    def on_bundle_finish(self, out: OutputCollector) -> None:
+        out.output_tagged('bundles', self.bundles)
+
+    def on_teardown(self) -> None:
+        pass
+
+
+def _records():
+    return [{'id': idx, 'text': text, 'findings': [{'name': finding}]}
+            for idx, (text, finding) in enumerate([('no fever', 'fever'), ('chest pain', 'pain'),
+                                                   ('no cough', 'cough')])]
+
+
+class LocalRunnerTest(unittest.TestCase):
+
+    def test_schema_inference_and_conversion(self):
+        record = {'id': 1, 'score': 0.5, 'flag': True, 'text': 'note', 'sections': [{'name': 'HPI'}]}
+        schema = local_runner.infer_schema(record)
+        self.assertEqual([TypeName.INT64, TypeName.DOUBLE, TypeName.BOOLEAN, TypeName.STRING, TypeName.ARRAY],
+                         [f.get_type().get_type_name() for f in schema.get_fields()])
+        row = local_runner.record_to_row(schema, record)
+        self.assertEqual('HPI', row.get_value('sections')[0].get_value('name'))
+        self.assertEqual(record, local_runner.row_to_record(row))
+
+    def test_run_in_process(self):
+        outputs = LocalUDFRunner(_NegationUDF, {'cue': 'no '}, bundle_size=2, num_workers=1).run(_records())
+        self.assertEqual(['no fever', 'chest pain', 'no cough'], [value for tag, value in outputs if tag is None])
+        self.assertEqual(['fever', 'cough'], [value for tag, value in outputs if tag == 'negated'])
+        # A single instance handles both bundles
+        self.assertEqual([1, 2], [value for tag, value in outputs if tag == 'bundles'])
+
+    def test_run_partitioned(self):
+        outputs = LocalUDFRunner(_NegationUDF, {'cue': 'no '}, bundle_size=1, num_workers=2).run(_records())
+        self.assertEqual(['no fever', 'no cough', 'chest pain'], [value for tag, value in outputs if tag is None])
+        # Each partition is handled by its own instance
+        self.assertEqual([1, 2, 1], [value for tag, value in outputs if tag == 'bundles'])
+
+    def test_command_line(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        paths = {name: os.path.join(directory, name) for name in ('input.jsonl', 'config.json', 'output.jsonl')}
+        with open(paths['input.jsonl'], 'w') as f:
+            f.writelines(json.dumps(record) + '\n' for record in _records())
+        with open(paths['config.json'], 'w') as f:
+            json.dump({'cue': 'no '}, f)
+        with mock.patch.object(sys, 'argv', ['local_runner', f'{__name__}:_NegationUDF', paths['input.jsonl'],
+                                             paths['output.jsonl'], '--config', paths['config.json'],
+                                             '--workers', '1']):
+            local_runner.main()
+        with open(paths['output.jsonl']) as f:
+            outputs = [json.loads(line) for line in f]
+        self.assertEqual({'tag': 'negated', 'value': 'fever'}, outputs[1])
+        self.assertEqual(6, len(outputs))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from uuid import UUID
+
+from fake_bridge import BridgeEnvironment, RecordingUDF, note
+from ohnlp.toolkit.backbone import api, metrics
+from ohnlp.toolkit.backbone.api import ModuleDeclaration, ToolkitModule
+from ohnlp.toolkit.backbone.metrics import RETIRED_INSTANCE, bridge_metrics
+
+
+@api.FunctionIdentifier(UUID('7d3f1b9e-4a6c-4e2d-8b5f-1c9e3a7d5b41'))
+class _UppercasingUDF(RecordingUDF):
+    pass
+
+
+class _MetricsModule(ToolkitModule):
+    pass
+
+
+ModuleDeclaration([], [_UppercasingUDF])(_MetricsModule)
+
+
+class BridgeMetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(metrics, '_enabled', True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.env = BridgeEnvironment(_MetricsModule)
+        metrics.install(self.env.gateway)
+
+    def _instance_series(self, instance_uid: str):
+        return ([key for key in bridge_metrics.call_latencies if key[1] == instance_uid],
+                [key for key in bridge_metrics.round_trips if key[0] == instance_uid])
+
+    def test_calls_and_round_trips_by_instance(self):
+        instance_uid = self.env.new_udf(_UppercasingUDF)
+        self.env.process_bundle(instance_uid, [note(0, 'chest pain'), note(1, 'no fever')])
+        self.assertEqual(2, bridge_metrics.call_latencies[('call_udf_process', instance_uid)].count)
+        self.assertGreater(sum(count for (uid, _), count in bridge_metrics.round_trips.items()
+                               if uid == instance_uid), 0)
+
+    def test_torn_down_instances_retired(self):
+        retired = bridge_metrics.call_latencies.get(('call_udf_process', RETIRED_INSTANCE))
+        retired_before = retired.count if retired is not None else 0
+        for _ in range(3):
+            instance_uid = self.env.new_udf(_UppercasingUDF)
+            self.env.process_bundle(instance_uid, [note(0, 'chest pain')])
+            self.env.module.call_udf_on_teardown(instance_uid)
+            self.assertEqual(([], []), self._instance_series(instance_uid))
+        self.assertEqual(retired_before + 3,
+                         bridge_metrics.call_latencies[('call_udf_process', RETIRED_INSTANCE)].count)
+        self.assertIn(f'instance="{RETIRED_INSTANCE}"', bridge_metrics.to_prometheus())
+
+    def test_finalizers_counted_while_exporting(self):
+        # py4j finalizers run whenever garbage is collected, including while the metrics lock is held for an export
+        proxies = [self.env.gateway.wrap(note(0, 'chest pain')) for _ in range(2)]
+        finished = threading.Event()
+        exported = metrics.BridgeMetrics()
+
+        def release_under_lock():
+            # noinspection PyProtectedMember
+            with exported._lock:
+                proxies.clear()
+            finished.set()
+
+        with mock.patch.object(metrics, 'bridge_metrics', exported):
+            threading.Thread(target=release_under_lock, daemon=True).start()
+            self.assertTrue(finished.wait(5))
+        # Proxies left over by other tests may also be collected meanwhile
+        self.assertGreaterEqual(sum(count for (_, method), count in exported.round_trips.items() if method == 'm'), 2)
+
+    def test_json_export(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        instance_uid = self.env.new_udf(_UppercasingUDF)
+        self.env.process_bundle(instance_uid, [note(0, 'chest pain')])
+        path = os.path.join(directory, 'metrics.json')
+        metrics.MetricsExporter(path, 'json').write()
+        with open(path) as f:
+            exported = json.load(f)
+        self.assertIn({'entry_point': 'call_udf_on_bundle_start', 'instance': instance_uid},
+                      [{key: call[key] for key in ('entry_point', 'instance')} for call in exported['calls']])
+
+
+if __name__ == '__main__':
+    unittest.main()
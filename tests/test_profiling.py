@@ -0,0 +1,101 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from typing import List
+from unittest import mock
+from uuid import UUID
+
+from fake_bridge import BridgeEnvironment, RecordingUDF, note
+from ohnlp.toolkit.backbone import api, profiling
+from ohnlp.toolkit.backbone.api import ModuleDeclaration, OutputCollector, Row, ToolkitModule
+from ohnlp.toolkit.backbone.benchmarks.fake_jvm import FakeArrayList, FakeRow
+
+
+@api.FunctionIdentifier(UUID('2b8e4d6a-9c3f-4a1e-b7d5-3f9a1c7e5b51'))
+class _ProfiledUDF(RecordingUDF):
+    """ Uppercases text, failing for text 'fail' """
+
+    def process(self, out: OutputCollector, input_value: Row) -> None:
+        if input_value.get_value('text') == 'fail':
+            raise ValueError("Cannot process note")
+        super().process(out, input_value)
+
+
+class _ProfilingModule(ToolkitModule):
+    pass
+
+
+ModuleDeclaration([], [_ProfiledUDF])(_ProfilingModule)
+
+
+class BundleProfilingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.env = BridgeEnvironment(_ProfilingModule)
+        profiling.enable(self.env.gateway, str(_ProfiledUDF.toolkit_component_uid), every_n_bundles=1,
+                         output_dir=self.directory)
+
+    def tearDown(self):
+        profiling._config = None
+        profiling._active_instance = None
+        profiling._active_profile = None
+        profiling._bundle_counts.clear()
+        shutil.rmtree(self.directory)
+
+    def _process_bundle(self, instance_uid: str, rows: List[FakeRow]):
+        # Chunks are read via pipelined sends
+        context, java_context = self.env.new_context()
+        self.env.module.call_udf_on_bundle_start(instance_uid)
+        self.env.module.call_udf_process_batch(instance_uid, self.env.gateway.wrap(FakeArrayList(rows)), java_context)
+        self.env.module.call_udf_on_bundle_finish(instance_uid, java_context)
+
+    def _summary(self, bundle_num: int):
+        uid = str(_ProfiledUDF.toolkit_component_uid).lower()
+        with open(os.path.join(self.directory, f"profile_{uid}_bundle_{bundle_num}.json")) as f:
+            return json.load(f)
+
+    def test_pipelined_sends_timed(self):
+        instance_uid = self.env.new_udf(_ProfiledUDF)
+        self.env.jvm.latency_s = 0.002
+        # Counts the round trips made while handling the bundle's calls, excluding those of py4j's finalizers
+        # between calls
+        handle = self.env.jvm.handle
+        in_call_round_trips = []
+
+        def counting_handle(data: bytes):
+            if getattr(profiling._local, 'profile', None) is not None:
+                in_call_round_trips.append(data)
+            return handle(data)
+
+        with mock.patch.object(self.env.jvm, 'handle', counting_handle):
+            self._process_bundle(instance_uid, [note(idx, 'chest pain') for idx in range(4)])
+        summary = self._summary(1)
+        self.assertGreaterEqual(summary['jvm_calls_s'], 0.9 * len(in_call_round_trips) * self.env.jvm.latency_s)
+        self.assertGreaterEqual(summary['python_s'], 0)
+
+    def test_failed_bundle_discards_profile(self):
+        instance_uid = self.env.new_udf(_ProfiledUDF)
+        with self.assertRaises(ValueError):
+            self._process_bundle(instance_uid, [note(0, 'fail')])
+        self.assertIsNone(profiling._active_profile)
+        self._process_bundle(instance_uid, [note(0, 'chest pain')])
+        self.assertEqual(2, self._summary(2)['bundle'])
+        self.assertFalse(os.path.exists(os.path.join(self.directory, f"profile_{instance_uid}_bundle_1.json")))
+
+    def test_teardown_forgets_instance(self):
+        instance_uid = self.env.new_udf(_ProfiledUDF)
+        self.env.module.call_udf_on_bundle_start(instance_uid)
+        self.env.module.call_udf_on_teardown(instance_uid)
+        self.assertIsNone(profiling._active_profile)
+        self.assertNotIn(instance_uid, profiling._bundle_counts)
+        # Other instances are profiled once the unfinished bundle's instance is gone
+        other_uid = self.env.new_udf(_ProfiledUDF)
+        self._process_bundle(other_uid, [note(0, 'chest pain')])
+        self.assertEqual(other_uid, self._summary(1)['instance_uid'])
+
+
+if __name__ == '__main__':
+    unittest.main()
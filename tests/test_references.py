@@ -0,0 +1,92 @@
+import gc
+import unittest
+from typing import List
+from unittest import mock
+from uuid import UUID
+
+from fake_bridge import BridgeEnvironment, RecordingUDF, note
+from ohnlp.toolkit.backbone import api, references
+from ohnlp.toolkit.backbone.api import ModuleDeclaration, ToolkitModule
+
+_RELEASE_COMMAND = 'm\nd\n'
+
+
+@api.FunctionIdentifier(UUID('5e1a7c3d-9b2f-4d6e-a8c4-2f7b1d9e3a61'))
+class _BundleScopedUDF(RecordingUDF):
+    bundle_scoped_references = True
+
+
+@api.FunctionIdentifier(UUID('8c4e2a6f-1d3b-4f7a-9e5c-6b2d8f1a4c71'))
+class _UnscopedUDF(RecordingUDF):
+    pass
+
+
+class _ReferencesModule(ToolkitModule):
+    pass
+
+
+ModuleDeclaration([], [_BundleScopedUDF, _UnscopedUDF])(_ReferencesModule)
+
+
+class ReferenceArenaTest(unittest.TestCase):
+
+    def setUp(self):
+        self.env = BridgeEnvironment(_ReferencesModule)
+
+    def _release_writes(self, udf_cls, rows: int) -> List[int]:
+        """ :return: The number of references released by each write to the JVM releasing any while a bundle is
+        processed """
+        instance_uid = self.env.new_udf(udf_cls)
+        # Proxies used to resolve the input schema on the instance's first call are not bundle scoped
+        self.env.process_bundle(instance_uid, [note(0, 'chest pain')])
+        gc.collect()
+        handle = self.env.jvm.handle
+        writes = []
+
+        def recording_handle(data: bytes):
+            if _RELEASE_COMMAND in data.decode('utf-8'):
+                writes.append(data.decode('utf-8').count(_RELEASE_COMMAND))
+            return handle(data)
+
+        with mock.patch.object(self.env.jvm, 'handle', recording_handle):
+            self.env.process_bundle(instance_uid, [note(idx, 'chest pain') for idx in range(rows)])
+            gc.collect()
+        return writes
+
+    def test_bundle_references_released_at_once(self):
+        writes = sorted(self._release_writes(_BundleScopedUDF, 5), reverse=True)
+        # The input row and the proxies used to build the output row of each element. Output rows themselves remain
+        # referenced by their python rows, which may outlive the bundle, so are released individually whenever collected
+        self.assertGreaterEqual(writes[0], 5 * 4)
+        self.assertEqual([1] * 5, writes[1:])
+
+    def test_references_released_individually_without_opting_in(self):
+        writes = self._release_writes(_UnscopedUDF, 5)
+        self.assertGreaterEqual(len(writes), 5 * 5)
+        self.assertEqual({1}, set(writes))
+
+    def test_arena_proxies_reported(self):
+        instance_uid = self.env.new_udf(_BundleScopedUDF)
+        context, java_context = self.env.new_context()
+        self.env.module.call_udf_on_bundle_start(instance_uid)
+        self.env.module.call_udf_process(instance_uid, self.env.gateway.wrap(note(0, 'chest pain')), java_context)
+        # noinspection PyProtectedMember
+        live = {labels['instance']: value for name, labels, value in references._collect()
+                if name == 'bundle_arena_proxies'}
+        self.assertGreater(live[instance_uid], 0)
+        self.env.module.call_udf_on_bundle_finish(instance_uid, java_context)
+        # noinspection PyProtectedMember
+        self.assertIn(('bundle_arena_proxies', {'instance': instance_uid}, 0), references._collect())
+
+    def test_release_on_disconnected_gateway_skipped(self):
+        arena = references.ReferenceArena(self.env.gateway._gateway_client, 'instance')
+        arena.adopt(self.env.gateway.wrap(note(0, 'chest pain')))
+        self.env.jvm.reset_counters()
+        with mock.patch.object(self.env.gateway._gateway_client, 'is_connected', False):
+            arena.release()
+        self.assertEqual(0, len(arena))
+        self.assertEqual(0, self.env.jvm.round_trips)
+
+
+if __name__ == '__main__':
+    unittest.main()
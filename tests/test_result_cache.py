@@ -0,0 +1,115 @@
+"""
+Tests of the result cache of deterministic UDFs. This module also serves as the entrypoint imported by the worker
+processes of the worker pool test
+"""
+
+import asyncio
+import shutil
+import tempfile
+import unittest
+from uuid import UUID
+
+from fake_bridge import BridgeEnvironment, RecordingUDF, note
+from ohnlp.toolkit.backbone import api, result_cache
+from ohnlp.toolkit.backbone.api import AsyncUserDefinedPartitionMappingFunction, ModuleDeclaration, \
+    OutputCollector, Row, ToolkitModule
+from ohnlp.toolkit.backbone.benchmarks.fake_jvm import FakeField, FakeFieldType, FakeJavaTime, FakeRow, FakeSchema, \
+    type_names
+from ohnlp.toolkit.backbone.workers import UDFWorkerPool
+
+# A schema with a field of a logical type whose java values cannot be transferred out of the bridge process
+ZONED_NOTE_SCHEMA = FakeSchema([
+    FakeField('id', FakeFieldType(type_names['INT64'])),
+    FakeField('text', FakeFieldType(type_names['STRING'])),
+    FakeField('written', FakeFieldType(type_names['LOGICAL_TYPE'])),
+])
+
+
+@api.FunctionIdentifier(UUID('7a2e5d10-9b3c-4f6e-a1d8-3c5f7e9b2a02'))
+class _DeterministicUDF(RecordingUDF):
+    deterministic = True
+
+
+@api.FunctionIdentifier(UUID('9f3c7a1e-5b2d-4e8f-a6c4-1d7b9e3f5a21'))
+class _DeterministicLookupUDF(AsyncUserDefinedPartitionMappingFunction, RecordingUDF):
+    """ Outputs the uppercased text of each row once looked up, so after the call processing it returns """
+    deterministic = True
+
+    async def process(self, out: OutputCollector, input_value: Row) -> None:
+        await asyncio.sleep(0.001)
+        out.output(input_value.get_value('text').upper())
+
+
+class _ResultCacheModule(ToolkitModule):
+    pass
+
+
+ModuleDeclaration([], [_DeterministicUDF, _DeterministicLookupUDF])(_ResultCacheModule)
+
+
+class ResultCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        result_cache.enable(f"{self.directory}/results.db")
+        # noinspection PyProtectedMember
+        result_cache._stats.clear()
+        _DeterministicUDF.processed = 0
+
+    def tearDown(self):
+        # noinspection PyProtectedMember
+        result_cache._cache.close()
+        result_cache._cache = None
+        shutil.rmtree(self.directory)
+
+    def _stats(self, udf_cls) -> result_cache.ResultCacheStats:
+        # noinspection PyProtectedMember
+        return result_cache._stats[str(udf_cls.toolkit_component_uid)]
+
+    def test_repeated_input_replays_cached_outputs(self):
+        env = BridgeEnvironment(_ResultCacheModule)
+        instance_uid = env.new_udf(_DeterministicUDF, '{"threshold": 1}')
+        rows = [note(0, 'chest pain'), note(1, 'no fever'), note(0, 'chest pain')]
+        context = env.process_bundle(instance_uid, rows)
+        self.assertEqual(['CHEST PAIN', 'NO FEVER', 'CHEST PAIN'], [row.values[1] for row in context.outputs[None]])
+        self.assertEqual(2, _DeterministicUDF.processed)
+        # A new instance of the same configuration shares the cached results of the first
+        other_uid = env.new_udf(_DeterministicUDF, '{"threshold": 1}')
+        env.process_bundle(other_uid, [note(1, 'no fever')])
+        self.assertEqual(2, _DeterministicUDF.processed)
+        stats = self._stats(_DeterministicUDF)
+        self.assertEqual((2, 2), (stats.hits, stats.misses))
+
+    def test_other_config_misses(self):
+        env = BridgeEnvironment(_ResultCacheModule)
+        env.process_bundle(env.new_udf(_DeterministicUDF, '{"threshold": 1}'), [note(0, 'chest pain')])
+        env.process_bundle(env.new_udf(_DeterministicUDF, '{"threshold": 2}'), [note(0, 'chest pain')])
+        self.assertEqual(2, _DeterministicUDF.processed)
+
+    def test_inputs_without_transferable_content_processed(self):
+        env = BridgeEnvironment(_ResultCacheModule)
+        instance_uid = env.new_udf(_DeterministicUDF)
+        row = FakeRow(ZONED_NOTE_SCHEMA, [0, 'chest pain', FakeJavaTime('java.time.ZonedDateTime', '2024-03-01Z')])
+        for _ in range(2):
+            context = env.process_bundle(instance_uid, [row])
+            self.assertEqual(['CHEST PAIN'], [output.values[1] for output in context.outputs[None]])
+        self.assertEqual(2, _DeterministicUDF.processed)
+        stats = self._stats(_DeterministicUDF)
+        self.assertEqual((0, 0, 2), (stats.hits, stats.misses, stats.uncacheable))
+
+    def test_worker_hosted_async_udf_not_cached(self):
+        pool = UDFWorkerPool(__name__, 1)
+        self.addCleanup(pool.shutdown)
+        env = BridgeEnvironment(_ResultCacheModule)
+        env.module.use_worker_pool(pool)
+        instance_uid = env.new_udf(_DeterministicLookupUDF)
+        # Outputs of asynchronous UDFs are only emitted once the bundle finishes, so cannot be attributed to inputs
+        for _ in range(2):
+            context = env.process_bundle(instance_uid, [note(0, 'chest pain'), note(1, 'no fever')])
+            self.assertEqual(['CHEST PAIN', 'NO FEVER'], context.outputs[None])
+        # noinspection PyProtectedMember
+        self.assertNotIn(str(_DeterministicLookupUDF.toolkit_component_uid), result_cache._stats)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from uuid import UUID
+
+from fake_bridge import BridgeEnvironment, RecordingUDF, note
+from ohnlp.toolkit.backbone import api, shared_memory
+from ohnlp.toolkit.backbone.api import ModuleDeclaration, OutputCollector, Row, ToolkitModule
+from ohnlp.toolkit.backbone.benchmarks.fake_jvm import FakeField, FakeFieldType, FakeRow, FakeSchema, type_names
+from ohnlp.toolkit.backbone.shared_memory import SharedText
+
+_PAYLOAD_SCHEMA = FakeSchema([
+    FakeField('id', FakeFieldType(type_names['INT64'])),
+    FakeField('payload', FakeFieldType(type_names['BYTES'])),
+])
+
+
+@api.FunctionIdentifier(UUID('3a9d5f1b-7c2e-4b8a-9d6f-4e1c7a3b5d81'))
+class _UppercasingUDF(RecordingUDF):
+    pass
+
+
+@api.FunctionIdentifier(UUID('6f2b8d4a-1e9c-4a7d-b3f5-8c6a2e4d1b91'))
+class _ZeroCopyUDF(RecordingUDF):
+    """ Outputs the text of each note as received, and the length of its payload (if any) """
+    zero_copy_values = True
+    received = []
+
+    def process(self, out: OutputCollector, input_value: Row) -> None:
+        value = input_value.get_value(input_value.get_schema().get_fields()[1].get_name())
+        type(self).received.append(value)
+        out.output(len(value) if isinstance(value, memoryview) else value)
+
+
+class _SharedMemoryModule(ToolkitModule):
+    pass
+
+
+ModuleDeclaration([], [_UppercasingUDF, _ZeroCopyUDF])(_SharedMemoryModule)
+
+
+class SharedMemoryChannelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.env = BridgeEnvironment(_SharedMemoryModule)
+        _ZeroCopyUDF.received = []
+
+    def tearDown(self):
+        shared_memory._config = None
+        # noinspection PyProtectedMember
+        shared_memory._close_writers()
+        shared_memory._local.writer = None
+        shutil.rmtree(self.directory)
+
+    def _segment(self, *values: bytes) -> list:
+        """ Writes a segment as the JVM would
+
+        :return: The handles of the values
+        """
+        path = os.path.join(self.directory, 'jvm-segment')
+        handles, offset = [], 0
+        with open(path, 'wb') as f:
+            for value in values:
+                f.write(value)
+                # noinspection PyProtectedMember
+                handles.append(shared_memory._format_handle(path, offset, len(value)))
+                offset += len(value)
+        return handles
+
+    def test_input_values_resolved(self):
+        handles = self._segment('no fever'.encode('utf-8'), 'chest pain'.encode('utf-8'))
+        instance_uid = self.env.new_udf(_UppercasingUDF)
+        context = self.env.process_bundle(instance_uid, [note(0, handles[0]), note(1, handles[1])])
+        self.assertEqual(['NO FEVER', 'CHEST PAIN'], [row.values[1] for row in context.outputs[None]])
+
+    def test_zero_copy_values(self):
+        text_handle, payload_handle = self._segment('décès'.encode('utf-8'), b'\x00\x01\x02')
+        shared_memory.enable(threshold_bytes=1024, directory=self.directory)
+        instance_uid = self.env.new_udf(_ZeroCopyUDF)
+        context = self.env.process_bundle(instance_uid, [
+            note(0, text_handle),
+            FakeRow(_PAYLOAD_SCHEMA, [1, payload_handle.encode('utf-8')])
+        ])
+        text, payload = _ZeroCopyUDF.received
+        self.assertIsInstance(text, SharedText)
+        self.assertEqual('DÉCÈS', text.upper())
+        self.assertEqual(b'\x00\x01\x02', payload.tobytes())
+        # Values received through the channel are passed back as their handles without copying, regardless of size
+        self.assertEqual([text_handle, 3], context.outputs[None])
+        # Worker processes cannot map the channel, so receive plain strings
+        self.assertEqual('décès', pickle.loads(pickle.dumps(text)))
+
+    def test_large_outputs_written_to_channel(self):
+        shared_memory.enable(threshold_bytes=64, directory=self.directory)
+        long_text = 'chest pain radiating to the left arm ' * 4
+        instance_uid = self.env.new_udf(_UppercasingUDF)
+        context = self.env.process_bundle(instance_uid, [note(0, 'no fever'), note(1, long_text)])
+        short_output, long_output = [row.values[1] for row in context.outputs[None]]
+        self.assertEqual('NO FEVER', short_output)
+        self.assertTrue(shared_memory.is_handle(long_output))
+        # The segment is retained for reuse by the thread's next bridge call
+        self.assertEqual(long_text.upper(), shared_memory.resolve(long_output))
+
+    def test_bytes_outputs_written_to_channel(self):
+        shared_memory.enable(threshold_bytes=16, directory=self.directory)
+        handle = shared_memory.to_java_value(b'\x00' * 32)
+        self.assertIsInstance(handle, bytes)
+        self.assertEqual(b'\x00' * 32, shared_memory.resolve(handle))
+        self.assertEqual(b'\x00' * 8, shared_memory.to_java_value(b'\x00' * 8))
+
+
+if __name__ == '__main__':
+    unittest.main()
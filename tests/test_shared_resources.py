@@ -0,0 +1,92 @@
+import threading
+import unittest
+
+from ohnlp.toolkit.backbone.api import SharedResourceCache
+
+
+class _Owner(object):
+    pass
+
+
+class SharedResourceCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = SharedResourceCache()
+        self.loads = 0
+
+    def _load(self, value):
+        self.loads += 1
+        return value
+
+    def test_loaded_once_per_config(self):
+        first, second = _Owner(), _Owner()
+        model = self.cache.acquire(first, 'model', {'path': 'a'}, lambda: self._load(['a']))
+        self.assertIs(model, self.cache.acquire(second, 'model', {'path': 'a'}, lambda: self._load(['a'])))
+        self.cache.acquire(second, 'model', {'path': 'b'}, lambda: self._load(['b']))
+        self.assertEqual(2, self.loads)
+
+    def test_unreferenced_resources_evicted_over_budget(self):
+        owner = _Owner()
+        self.cache.acquire(owner, 'model', 'a', lambda: 'a', size_bytes=60)
+        self.cache.acquire(owner, 'model', 'b', lambda: 'b', size_bytes=60)
+        self.cache.set_memory_budget(100)
+        # Referenced resources are never evicted
+        self.assertEqual(2, len(self.cache))
+        self.cache.release_all(owner)
+        self.assertEqual(1, len(self.cache))
+        self.assertEqual(60, self.cache.cached_bytes)
+
+    def test_other_resources_load_concurrently(self):
+        started = {key: threading.Event() for key in ('a', 'b')}
+
+        def load(key: str, other: str) -> str:
+            started[key].set()
+            # Both loads must be in progress at once for either to complete
+            if not started[other].wait(5):
+                raise TimeoutError(f"Load of {other} did not start while {key} was loading")
+            return key
+
+        results = {}
+        threads = [threading.Thread(target=lambda k=key, o=other: results.update({k: self.cache.acquire(
+            _Owner(), 'model', k, lambda: load(k, o))})) for key, other in (('a', 'b'), ('b', 'a'))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual({'a': 'a', 'b': 'b'}, results)
+
+    def test_concurrent_acquisitions_share_one_load(self):
+        release = threading.Event()
+
+        def load():
+            release.wait(5)
+            return self._load(object())
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.cache.acquire(_Owner(), 'model', {}, load)))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(1, self.loads)
+        self.assertEqual(4, len(results))
+        self.assertTrue(all(result is results[0] for result in results))
+
+    def test_failed_load_retried(self):
+        def fail():
+            raise OSError("Model file not found")
+
+        with self.assertRaises(OSError):
+            self.cache.acquire(_Owner(), 'model', {}, fail)
+        self.assertEqual('model', self.cache.acquire(_Owner(), 'model', {}, lambda: 'model'))
+
+    def test_reentrant_load_rejected(self):
+        owner = _Owner()
+        with self.assertRaisesRegex(ValueError, 'own loader'):
+            self.cache.acquire(owner, 'model', {}, lambda: self.cache.acquire(owner, 'model', {}, lambda: 'model'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+from typing import Dict, List
+from unittest import mock
+
+from ohnlp.toolkit.backbone import api, metrics
+from ohnlp.toolkit.backbone.benchmarks import fake_jvm, suite
+from ohnlp.toolkit.backbone.benchmarks.fake_jvm import FakeHashMap, FakePCollection, FakePCollectionRowTuple, \
+    FakePipeline
+from ohnlp.toolkit.backbone.metrics import bridge_metrics
+
+
+class TransformConstructionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.env = suite.BenchmarkEnvironment(0.0, num_rows=1)
+
+    def _input_tuple(self, tags: List[str]) -> FakePCollectionRowTuple:
+        pipeline = FakePipeline()
+        return FakePCollectionRowTuple(pipeline, {tag: FakePCollection(pipeline, self.env.schema) for tag in tags})
+
+    def _expand(self, transform_cls, input_tuple: FakePCollectionRowTuple) -> FakePCollectionRowTuple:
+        java_output = self.env.module.call_transform_expand(self.env.new_transform(transform_cls),
+                                                            self.env.gateway.wrap(input_tuple))
+        return self.env.jvm.get(java_output._target_id)
+
+    def _expand_merging(self) -> FakePCollectionRowTuple:
+        input_tuple = self._input_tuple(suite.CONSTRUCTION_TAGS)
+        output = self._expand(suite._MergingTransform, input_tuple)
+        self.assertEqual({'merged': input_tuple.pcolls[suite.CONSTRUCTION_TAGS[0]]}, output.pcolls)
+        self.assertIs(input_tuple.pipeline, output.pipeline)
+        return output
+
+    def _round_trips_by_tag_count(self, construct, max_tags: int) -> Dict[int, int]:
+        """ :return: The round trips of a construction call handling 2 and max_tags tags, excluding those of py4j's
+        finalizers releasing the proxies of the call's collections and schemas once garbage collected """
+        handle = self.env.jvm.handle
+        round_trips = {}
+        for num_tags in (2, max_tags):
+            tags = suite.CONSTRUCTION_TAGS[:num_tags]
+            writes = []
+
+            def recording_handle(data: bytes):
+                if not data.startswith(b'm\nd\n'):
+                    writes.append(data)
+                return handle(data)
+
+            with mock.patch.object(suite, 'CONSTRUCTION_TAGS', tags), \
+                    mock.patch.object(self.env.jvm, 'handle', recording_handle):
+                construct(tags)
+            round_trips[num_tags] = len(writes)
+        return round_trips
+
+    def test_python_built_tuple(self):
+        self._expand_merging()
+
+    def test_python_built_tuple_without_of(self):
+        # Java bridges whose PCollectionRowTuple lacks of() build the tuple from an empty one of the pipeline instead
+        statics = fake_jvm._CLASSES['org.apache.beam.sdk.values.PCollectionRowTuple']['statics']
+
+        def of(*args):
+            raise AttributeError("Method of does not exist")
+
+        with mock.patch.dict(statics, {'of': of}):
+            self._expand_merging()
+        # noinspection PyProtectedMember
+        self.assertIs(False, api._row_tuple_of_supported[id(self.env.gateway._gateway_client)])
+
+    def test_expand_round_trips_independent_of_tags(self):
+        def expand(tags: List[str]):
+            input_tuple = self._input_tuple(tags)
+            self.assertEqual(input_tuple.pcolls, self._expand(suite._PassthroughTransform, input_tuple).pcolls)
+
+        # Tags beyond those accepted by the largest PCollectionRowTuple.of overload are each chained with a call of and
+        # noinspection PyProtectedMember
+        round_trips = self._round_trips_by_tag_count(expand, api._ROW_TUPLE_OF_MAX_PAIRS)
+        # noinspection PyProtectedMember
+        self.assertEqual(round_trips[2], round_trips[api._ROW_TUPLE_OF_MAX_PAIRS])
+
+    def test_output_schema_round_trips_independent_of_tags(self):
+        def get_output_schema(tags: List[str]):
+            input_schemas = FakeHashMap()
+            for tag in tags:
+                input_schemas.put(tag, self.env.schema)
+            java_output = self.env.module.call_transform_get_output_schema(
+                self.env.new_transform(), self.env.gateway.wrap(input_schemas))
+            self.assertEqual(tags, sorted(self.env.jvm.get(java_output._target_id).values,
+                                          key=suite.CONSTRUCTION_TAGS.index))
+
+        round_trips = self._round_trips_by_tag_count(get_output_schema, len(suite.CONSTRUCTION_TAGS))
+        self.assertEqual(round_trips[2], round_trips[len(suite.CONSTRUCTION_TAGS)])
+
+    def test_construction_phases_timed(self):
+        with mock.patch.object(metrics, '_enabled', True):
+            instance_uid = self.env.new_transform()
+            self.env.module.call_transform_expand(instance_uid, self.env.gateway.wrap(
+                self._input_tuple(suite.CONSTRUCTION_TAGS)))
+        for phase in ('expand_read_inputs', 'expand_transform', 'expand_build_outputs'):
+            self.assertEqual(1, bridge_metrics.phase_latencies[(phase, instance_uid)].count)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import importlib.util
+import unittest
+from typing import Any, List
+from unittest import mock
+from uuid import UUID
+
+from fake_bridge import BridgeEnvironment, RecordingUDF, note
+from ohnlp.toolkit.backbone import api
+from ohnlp.toolkit.backbone.api import Field, FieldType, ModuleDeclaration, Schema, ToolkitModule, TypeName, \
+    VectorizedPartitionMappingFunction
+
+_HAS_PANDAS = importlib.util.find_spec('pandas') is not None
+_HAS_NUMPY = importlib.util.find_spec('numpy') is not None
+
+
+@api.FunctionIdentifier(UUID('2d8f4b6a-3e1c-4a9d-b7f2-5c1e8a4d6b21'))
+class _UppercasingFrameUDF(VectorizedPartitionMappingFunction, RecordingUDF):
+    """ Uppercases the text column of each frame, recording the size of each frame """
+    frame_batch_rows = 3
+    frame_sizes: List[int] = []
+
+    def process_frame(self, frame: Any) -> Any:
+        type(self).frame_sizes.append(len(frame['text']))
+        frame['text'] = frame['text'].str.upper()
+        return frame
+
+
+@api.FunctionIdentifier(UUID('8b4d2f6e-1a7c-4e3b-9d5f-7a3c1e9b5d41'))
+class _ScoringArrayUDF(VectorizedPartitionMappingFunction, RecordingUDF):
+    """ Scores each note by the length of its text, from numpy arrays """
+    frame_type = 'numpy'
+    frame_dtypes: List[Any] = []
+
+    def get_output_schema(self, input_schema: Schema) -> Schema:
+        return Schema.of([Field.of('id', FieldType.of(TypeName.INT64)),
+                          Field.of('score', FieldType.of(TypeName.DOUBLE))])
+
+    def process_frame(self, frame: Any) -> Any:
+        type(self).frame_dtypes.append(frame['id'].dtype)
+        return {'id': frame['id'], 'score': [len(text) / 10 for text in frame['text']]}
+
+
+class _VectorizedModule(ToolkitModule):
+    pass
+
+
+ModuleDeclaration([], [_UppercasingFrameUDF, _ScoringArrayUDF])(_VectorizedModule)
+
+
+class VectorizedUDFTest(unittest.TestCase):
+
+    def setUp(self):
+        self.env = BridgeEnvironment(_VectorizedModule)
+        _UppercasingFrameUDF.frame_sizes = []
+        _ScoringArrayUDF.frame_dtypes = []
+
+    @unittest.skipUnless(_HAS_PANDAS, "requires pandas")
+    def test_rows_batched_into_frames(self):
+        instance_uid = self.env.new_udf(_UppercasingFrameUDF)
+        rows = [note(idx, f'note {idx}') for idx in range(7)]
+        context = self.env.process_bundle(instance_uid, rows)
+        # The remaining row is processed before the bundle finishes
+        self.assertEqual([3, 3, 1], _UppercasingFrameUDF.frame_sizes)
+        self.assertEqual([f'NOTE {idx}' for idx in range(7)], [row.values[1] for row in context.outputs[None]])
+
+    @unittest.skipUnless(_HAS_PANDAS, "requires pandas")
+    def test_frames_bounded_by_bytes(self):
+        instance_uid = self.env.new_udf(_UppercasingFrameUDF)
+        with mock.patch.object(_UppercasingFrameUDF, 'frame_batch_bytes', 256):
+            self.env.process_bundle(instance_uid, [note(idx, 'x' * 300) for idx in range(3)])
+        self.assertEqual([1, 1, 1], _UppercasingFrameUDF.frame_sizes)
+
+    @unittest.skipUnless(_HAS_NUMPY, "requires numpy")
+    def test_numpy_frames_with_output_schema(self):
+        instance_uid = self.env.new_udf(_ScoringArrayUDF)
+        context = self.env.process_bundle(instance_uid, [note(0, 'chest pain'), note(1, 'no fever')])
+        self.assertEqual([[0, 1.0], [1, 0.8]], [row.values for row in context.outputs[None]])
+        self.assertEqual(['id', 'score'], [field.getName() for field in context.outputs[None][0].schema.getFields()])
+        # Columns without nulls are typed
+        self.assertNotEqual(object, _ScoringArrayUDF.frame_dtypes[0])
+
+    @unittest.skipIf(_HAS_NUMPY, "requires numpy to be missing")
+    def test_missing_frame_library_reported(self):
+        instance_uid = self.env.new_udf(_ScoringArrayUDF)
+        with self.assertRaisesRegex(ImportError, r'ohnlptk-xlang-python\[vectorized\]'):
+            self.env.process_bundle(instance_uid, [note(0, 'chest pain')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Tests of UDFs hosted by a worker pool. This module also serves as the entrypoint imported by the worker processes
+"""
+
+import unittest
+from datetime import timedelta
+from uuid import UUID
+
+from fake_bridge import BridgeEnvironment, RecordingUDF
+from ohnlp.toolkit.backbone import api
+from ohnlp.toolkit.backbone.api import ModuleDeclaration, OutputCollector, Row, ToolkitModule
+from ohnlp.toolkit.backbone.benchmarks.fake_jvm import FakeArrayList, FakeField, FakeFieldType, FakeHashMap, \
+    FakeInstant, FakeJavaTime, FakeRow, FakeSchema, type_names
+from ohnlp.toolkit.backbone.workers import UDFWorkerPool
+
+SECTION_SCHEMA = FakeSchema([FakeField('name', FakeFieldType(type_names['STRING']))])
+# A schema with an ARRAY<ROW> field and a MAP<STRING, ROW> field
+SECTIONED_NOTE_SCHEMA = FakeSchema([
+    FakeField('id', FakeFieldType(type_names['INT64'])),
+    FakeField('sections', FakeFieldType(type_names['ARRAY'],
+                                        element_type=FakeFieldType(type_names['ROW'], row_schema=SECTION_SCHEMA))),
+    FakeField('headers', FakeFieldType(type_names['MAP'],
+                                       map_value_type=FakeFieldType(type_names['ROW'], row_schema=SECTION_SCHEMA))),
+])
+# A schema with a DATETIME field and a field of Beam's SQL DATE logical type
+ADMISSION_SCHEMA = FakeSchema([
+    FakeField('id', FakeFieldType(type_names['INT64'])),
+    FakeField('admitted', FakeFieldType(type_names['DATETIME'])),
+    FakeField('admitted_on', FakeFieldType(type_names['LOGICAL_TYPE'])),
+])
+
+
+@api.FunctionIdentifier(UUID('3d9a6f2c-8e4b-4c1d-b5a3-9e2f6c8d4b04'))
+class _SectionNamesUDF(RecordingUDF):
+    """ Outputs its input row unmodified, followed by the names of its nested section and header rows """
+
+    def process(self, out: OutputCollector, input_value: Row) -> None:
+        out.output(input_value)
+        out.output(','.join(section.get_value('name') for section in input_value.get_value('sections')))
+        out.output(','.join(f"{key}={header.get_value('name')}"
+                            for key, header in sorted(input_value.get_value('headers').items())))
+
+
+@api.FunctionIdentifier(UUID('9f3b7d1e-5a2c-4e8b-b6d4-2c7e9a1f3b05'))
+class _PostponingUDF(RecordingUDF):
+    """ Outputs its input row with its admission moved a day later """
+
+    def process(self, out: OutputCollector, input_value: Row) -> None:
+        row = input_value.copy()
+        row.set_value('admitted', row.get_value('admitted') + timedelta(days=1))
+        row.set_value('admitted_on', row.get_value('admitted_on') + timedelta(days=1))
+        out.output(row)
+
+
+class _WorkersModule(ToolkitModule):
+    pass
+
+
+ModuleDeclaration([], [_SectionNamesUDF, _PostponingUDF])(_WorkersModule)
+
+
+def _sectioned_note() -> FakeRow:
+    headers = FakeHashMap()
+    headers.put('hpi', FakeRow(SECTION_SCHEMA, ['History of Present Illness']))
+    headers.put('ap', FakeRow(SECTION_SCHEMA, ['Assessment and Plan']))
+    sections = FakeArrayList([FakeRow(SECTION_SCHEMA, [name]) for name in ('HPI', 'Assessment')])
+    return FakeRow(SECTIONED_NOTE_SCHEMA, [7, sections, headers])
+
+
+class NestedRowTest(unittest.TestCase):
+
+    def _check_nested_rows(self, env: BridgeEnvironment):
+        context = env.process_bundle(env.new_udf(_SectionNamesUDF), [_sectioned_note()])
+        output_row, section_names, header_names = context.outputs[None]
+        self.assertEqual('HPI,Assessment', section_names)
+        self.assertEqual('ap=Assessment and Plan,hpi=History of Present Illness', header_names)
+        self.assertEqual(7, output_row.values[0])
+        self.assertEqual([['HPI'], ['Assessment']], [section.values for section in output_row.values[1].values])
+        self.assertEqual({'hpi': ['History of Present Illness'], 'ap': ['Assessment and Plan']},
+                         {key: header.values for key, header in output_row.values[2].values.items()})
+
+    def test_in_process(self):
+        self._check_nested_rows(BridgeEnvironment(_WorkersModule))
+
+    def test_in_worker(self):
+        pool = UDFWorkerPool(__name__, 1)
+        try:
+            env = BridgeEnvironment(_WorkersModule)
+            env.module.use_worker_pool(pool)
+            self._check_nested_rows(env)
+        finally:
+            pool.shutdown()
+
+
+class DateTimeTransferTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = UDFWorkerPool(__name__, 1)
+        self.env = BridgeEnvironment(_WorkersModule)
+        self.env.module.use_worker_pool(self.pool)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_datetime_and_logical_date_values(self):
+        admitted_ms = 1709294400123
+        row = FakeRow(ADMISSION_SCHEMA, [1, FakeInstant(admitted_ms),
+                                         FakeJavaTime('java.time.LocalDate', '2024-03-01')])
+        context = self.env.process_bundle(self.env.new_udf(_PostponingUDF), [row])
+        output_row, = context.outputs[None]
+        admitted, admitted_on = output_row.values[1:]
+        self.assertIsInstance(admitted, FakeInstant)
+        self.assertEqual(admitted_ms + 24 * 60 * 60 * 1000, admitted.millis)
+        self.assertEqual(('java.time.LocalDate',), admitted_on.java_classes)
+        self.assertEqual('2024-03-02', admitted_on.iso_value)
+
+    def test_untransferable_value(self):
+        row = FakeRow(ADMISSION_SCHEMA, [1, FakeInstant(0), FakeJavaTime('java.time.ZonedDateTime', '1970-01-01Z')])
+        with self.assertRaisesRegex(ValueError, 'java.time.ZonedDateTime cannot be transferred'):
+            self.env.process_bundle(self.env.new_udf(_PostponingUDF), [row])
+
+
+if __name__ == '__main__':
+    unittest.main()